@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for clearing the favourites database.
+Imports a number of generated f_*.hpd trees (with their stored records)
+into a scratch database, then times clearing all user settings three ways,
+each from the same starting copy: Django's per-model .delete() (the old
+behaviour), set-based DELETEs (mode=delete) and rebuilding the file
+(mode=recreate). The project databases are not touched.
+
+Usage:
+    python bench_clear.py [--lists N] [--groups N]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'uniden_assistant.settings')
+
+
+def setup_django(work_dir):
+    import django
+    import uniden_assistant.settings as project_settings
+
+    project_settings.DATABASES['default']['NAME'] = os.path.join(work_dir, 'db.sqlite3')
+    project_settings.DATABASES['favorites']['NAME'] = os.path.join(work_dir, 'favourites.sqlite3')
+    project_settings.EXPORT_CACHE_DIR = os.path.join(work_dir, 'export_cache')
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    call_command('migrate', database='favorites', verbosity=0)
+
+
+def fill(lists, groups, work_dir):
+    from uniden_assistant.favourites.favorites_hpd_parser import FavoritesHPDParser
+    from uniden_assistant.favourites.models import FavoritesList
+    from uniden_assistant.favourites.tests import build_hpd
+
+    path = os.path.join(work_dir, 'sample.hpd')
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        fh.write(build_hpd(groups))
+    parser = FavoritesHPDParser()
+    for idx in range(lists):
+        favorites_list = FavoritesList.objects.using('favorites').create(
+            user_name=f'List {idx}', filename=f'f_{idx + 1:06d}.hpd', order=idx,
+        )
+        parser.parse_file(path, favorites_list)
+
+
+def orm_clear():
+    from uniden_assistant.favourites.bulk_clear import USER_SETTINGS_PLAN
+
+    for model, _ in USER_SETTINGS_PLAN:
+        model.objects.using('favorites').all().delete()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lists', type=int, default=10, help='favourites lists to import (default 10)')
+    parser.add_argument('--groups', type=int, default=400, help='groups per list (default 400)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_clear_') as work_dir:
+        setup_django(work_dir)
+        from django.db import connections
+        from uniden_assistant.favourites import bulk_clear
+
+        start = time.perf_counter()
+        fill(args.lists, args.groups, work_dir)
+        connections.close_all()
+        print(f'{args.lists} lists imported in {time.perf_counter() - start:.1f}s')
+
+        live = os.path.join(work_dir, 'favourites.sqlite3')
+        template = os.path.join(work_dir, 'template.sqlite3')
+        shutil.copyfile(live, template)
+        size = os.path.getsize(template)
+
+        rows = None
+        timings = {}
+        strategies = {
+            'orm .delete()': orm_clear,
+            'mode=delete': lambda: bulk_clear.clear(bulk_clear.USER_SETTINGS_PLAN),
+            'mode=recreate': lambda: bulk_clear.clear(bulk_clear.USER_SETTINGS_PLAN, recreate=True),
+        }
+        for name, run in strategies.items():
+            connections.close_all()
+            shutil.copyfile(template, live)
+            if rows is None:
+                rows = sum(bulk_clear._count(bulk_clear.USER_SETTINGS_PLAN, 'favorites').values())
+            start = time.perf_counter()
+            run()
+            timings[name] = (time.perf_counter() - start, os.path.getsize(live))
+        connections.close_all()
+
+    print(f'{rows} rows, database {size / 1e6:.1f} MB')
+    print(f'{"strategy":<16} {"seconds":>9} {"file MB after":>14}')
+    for name, (seconds, after) in timings.items():
+        print(f'{name:<16} {seconds:>9.2f} {after / 1e6:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark for frequency range and nearest-neighbour search.
+Fills a scratch favourites database with C-Freq and T-Freq channels at
+random frequencies, then times range (+/- tolerance) and nearest-channel
+lookups with the frequency indexes and again after dropping them. The
+project databases are not touched.
+
+Usage:
+    python bench_frequency_search.py [--channels N] [--queries N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'uniden_assistant.settings')
+
+LOW_HZ, HIGH_HZ = 25000000, 960000000
+
+
+def setup_django(work_dir):
+    import django
+    import uniden_assistant.settings as project_settings
+
+    project_settings.DATABASES['default']['NAME'] = os.path.join(work_dir, 'db.sqlite3')
+    project_settings.DATABASES['favorites']['NAME'] = os.path.join(work_dir, 'favourites.sqlite3')
+    project_settings.EXPORT_CACHE_DIR = os.path.join(work_dir, 'export_cache')
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    call_command('migrate', database='favorites', verbosity=0)
+
+
+def fill(channels, rng):
+    """channels C-Freqs in groups of 100 plus a quarter as many T-Freqs."""
+    from uniden_assistant.favourites.models import (
+        CFreq, CGroup, ConventionalSystem, FavoritesList, Site, TFreq, TrunkSystem,
+    )
+    db = 'favorites'
+    favorites_list = FavoritesList.objects.using(db).create(user_name='Bench', filename='f_000001.hpd')
+    system = ConventionalSystem.objects.using(db).create(favorites_list=favorites_list, name_tag='Conventional')
+    groups = CGroup.objects.using(db).bulk_create([
+        CGroup(conventional_system=system, name_tag=f'Group {idx}', order=idx) for idx in range(channels // 100 + 1)
+    ])
+    CFreq.objects.using(db).bulk_create((
+        CFreq(cgroup=groups[idx // 100], name_tag=f'Channel {idx}', frequency=rng.randrange(LOW_HZ, HIGH_HZ, 50),
+              modulation='NFM', func_tag_id=21, order=idx % 100)
+        for idx in range(channels)
+    ), batch_size=5000)
+
+    trunk = TrunkSystem.objects.using(db).create(favorites_list=favorites_list, name_tag='Trunk')
+    sites = Site.objects.using(db).bulk_create([
+        Site(trunk_system=trunk, name_tag=f'Site {idx}', order=idx) for idx in range(channels // 400 + 1)
+    ])
+    TFreq.objects.using(db).bulk_create((
+        TFreq(site=sites[idx // 100], frequency=rng.randrange(LOW_HZ, HIGH_HZ, 50), order=idx % 100)
+        for idx in range(channels // 4)
+    ), batch_size=5000)
+
+
+def time_queries(targets, tolerance):
+    from uniden_assistant.favourites.frequency_search import frequency_range, nearest_frequencies
+
+    timings = {'range': [], 'nearest': []}
+    for target in targets:
+        start = time.perf_counter()
+        frequency_range(target - tolerance, target + tolerance)
+        timings['range'].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        nearest_frequencies(target, 10)
+        timings['nearest'].append(time.perf_counter() - start)
+    return {kind: statistics.median(values) * 1000 for kind, values in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--channels', type=int, default=300000, help='C-Freq rows to create (default 300000)')
+    parser.add_argument('--queries', type=int, default=50, help='lookups per measurement (default 50)')
+    parser.add_argument('--tolerance-khz', type=float, default=12.5, help='range half-width (default 12.5)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory(prefix='bench_frequency_') as work_dir:
+        setup_django(work_dir)
+        from django.db import connections
+
+        start = time.perf_counter()
+        fill(args.channels, rng)
+        print(f'{args.channels + args.channels // 4} channels created in {time.perf_counter() - start:.1f}s')
+
+        targets = [rng.randrange(LOW_HZ, HIGH_HZ, 12500) for _ in range(args.queries)]
+        tolerance = int(args.tolerance_khz * 1000)
+        indexed = time_queries(targets, tolerance)
+
+        with connections['favorites'].cursor() as cursor:
+            cursor.execute('DROP INDEX cfreq_frequency_idx')
+            cursor.execute('DROP INDEX tfreq_frequency_idx')
+        scanned = time_queries(targets, tolerance)
+        connections.close_all()
+
+    print(f'{"query":<10} {"indexed ms":>12} {"full scan ms":>14}')
+    for kind in ('range', 'nearest'):
+        print(f'{kind:<10} {indexed[kind]:>12.2f} {scanned[kind]:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark for writing parsed favourites f_*.hpd trees.
+Times FavoritesHPDParser.write_tree (bulk_create per level, one transaction)
+against the per-row create() path it replaced (one autocommitted INSERT per
+row, stored lines included) on the same parsed tree. Runs against a scratch
+database with stock SQLite settings unless --profile performance is given;
+the project databases are not touched.
+
+Usage:
+    python bench_hpd_write.py [path/to/f_000001.hpd] [--lines N] [--repeat N] [--profile NAME]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'uniden_assistant.settings')
+
+
+def setup_django(work_dir, profile):
+    import django
+    import uniden_assistant.settings as project_settings
+
+    project_settings.FAVOURITES_SQLITE_PROFILE = profile
+    project_settings.DATABASES['default']['NAME'] = os.path.join(work_dir, 'db.sqlite3')
+    project_settings.DATABASES['favorites']['NAME'] = os.path.join(work_dir, 'favourites.sqlite3')
+    project_settings.EXPORT_CACHE_DIR = os.path.join(work_dir, 'export_cache')
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    call_command('migrate', database='favorites', verbosity=0)
+
+
+def write_sample(path, lines):
+    from uniden_assistant.favourites.tests import build_hpd
+    # build_hpd writes 13 lines per group plus 8 header and system lines
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        fh.write(build_hpd(groups=max(1, (lines - 8) // 13)))
+
+
+def write_per_row(tree, favorites_list):
+    """The pre-bulk write pattern: every row created on its own, in autocommit."""
+    from uniden_assistant.favourites import models as m
+    from uniden_assistant.favourites.record_schemas import build_records, create_source
+
+    def create(model, **kwargs):
+        return model.objects.using('favorites').create(**kwargs)
+
+    if tree.records:
+        source = create_source(tree.file_name, 'favorites_lists/' + tree.file_name)
+        for record in build_records(source, tree.records):
+            record.save(using='favorites', force_insert=True)
+    systems = [create(m.ConventionalSystem, favorites_list=favorites_list, **kw) for kw in tree.conventional_systems]
+    cgroups = [create(m.CGroup, conventional_system=systems[idx], **kw) for idx, kw in tree.cgroups]
+    for idx, kw in tree.cfreqs:
+        create(m.CFreq, cgroup=cgroups[idx], **kw)
+    trunks = [create(m.TrunkSystem, favorites_list=favorites_list, **kw) for kw in tree.trunk_systems]
+    for model, rows in ((m.FleetMap, tree.fleet_maps), (m.UnitId, tree.unit_ids), (m.AvoidTgid, tree.avoid_tgids)):
+        for idx, kw in rows:
+            create(model, trunk_system=trunks[idx], **kw)
+    sites = [create(m.Site, trunk_system=trunks[idx], **kw) for idx, kw in tree.sites]
+    for idx, kw in tree.bandplans_p25.items():
+        create(m.BandPlanP25, site=sites[idx], **kw)
+    for idx, kw in tree.bandplans_mot.items():
+        create(m.BandPlanMot, site=sites[idx], **kw)
+    for idx, kw in tree.tfreqs:
+        create(m.TFreq, site=sites[idx], **kw)
+    tgroups = [create(m.TGroup, trunk_system=trunks[idx], **kw) for idx, kw in tree.tgroups]
+    for idx, kw in tree.tgids:
+        create(m.TGID, tgroup=tgroups[idx], **kw)
+    parents = {'site': sites, 'tgroup': tgroups, 'cgroup': cgroups}
+    for parent_type, idx, kw in tree.rectangles:
+        create(m.Rectangle, **{parent_type: parents[parent_type][idx]}, **kw)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', help='favorites .hpd file to write (defaults to synthetic data)')
+    parser.add_argument('--lines', type=int, default=50000, help='size of the synthetic file')
+    parser.add_argument('--repeat', type=int, default=3, help='writes per method; the best time is reported')
+    parser.add_argument('--profile', choices=('default', 'performance'), default='default',
+                        help='FAVOURITES_SQLITE_PROFILE of the scratch database')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_hpd_write_', dir=BACKEND_DIR) as work_dir:
+        setup_django(work_dir, args.profile)
+        from uniden_assistant.favourites.favorites_hpd_parser import FavoritesHPDParser
+        from uniden_assistant.favourites.models import FavoritesList, ScannerRecordSource
+
+        hpd_path = args.path or os.path.join(work_dir, 'f_000001.hpd')
+        if not args.path:
+            write_sample(hpd_path, args.lines)
+        hpd_parser = FavoritesHPDParser()
+        tree = hpd_parser.parse_tree(hpd_path)
+        print(f"{len(tree.records)} lines, {args.profile} profile, best of {args.repeat}")
+
+        methods = (('per-row', write_per_row), ('bulk', hpd_parser.write_tree))
+        best = {}
+        for run in range(args.repeat):
+            for name, write in methods:
+                favorites_list = FavoritesList.objects.using('favorites').create(
+                    user_name=f'{name} {run}', filename='f_000001.hpd',
+                )
+                start = time.perf_counter()
+                write(tree, favorites_list)
+                elapsed = time.perf_counter() - start
+                best[name] = min(best.get(name, elapsed), elapsed)
+                # Keep the database the same size for every run
+                favorites_list.delete()
+                ScannerRecordSource.objects.using('favorites').all().delete()
+        for name, _ in methods:
+            print(f"{name:<8} {best[name]:8.2f}s  {len(tree.records) / best[name]:10.0f} lines/s")
+        print(f"speedup  {best['per-row'] / best['bulk']:8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
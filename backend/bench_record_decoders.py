@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the spec-compiled record decoders.
+Compares lines/sec of record_parser.decoders against the hand-written
+`fields[n] if len(fields) > n else default` mapping the parsers used before.
+
+Usage:
+    python bench_record_decoders.py [path/to/f_000001.hpd] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from uniden_assistant.favourites.record_parser.decoders import DECODERS
+
+
+def _is_int(value):
+    try:
+        int(value)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def _to_decimal(value):
+    try:
+        return float(value) if value != '' else None
+    except (ValueError, TypeError):
+        return None
+
+
+def hand_cgroup(fields):
+    return {
+        'my_id': fields[0] if len(fields) > 0 else '',
+        'parent_id': fields[1] if len(fields) > 1 else '',
+        'name_tag': fields[2] if len(fields) > 2 else '',
+        'avoid': fields[3] if len(fields) > 3 else 'Off',
+        'latitude': _to_decimal(fields[4]) if len(fields) > 4 else None,
+        'longitude': _to_decimal(fields[5]) if len(fields) > 5 else None,
+        'range_miles': _to_decimal(fields[6]) if len(fields) > 6 else None,
+        'location_type': fields[7] if len(fields) > 7 else 'Circle',
+        'quick_key': fields[8] if len(fields) > 8 else 'Off',
+        'filter': fields[9] if len(fields) > 9 else '',
+    }
+
+
+def hand_cfreq(fields):
+    return {
+        'my_id': fields[0] if len(fields) > 0 else '',
+        'parent_id': fields[1] if len(fields) > 1 else '',
+        'name_tag': fields[2] if len(fields) > 2 else '',
+        'avoid': fields[3] if len(fields) > 3 else 'Off',
+        'frequency': int(fields[4]) if len(fields) > 4 and fields[4].isdigit() else 0,
+        'modulation': fields[5] if len(fields) > 5 else 'AUTO',
+        'audio_option': fields[6] if len(fields) > 6 else '',
+        'func_tag_id': int(fields[7]) if len(fields) > 7 and fields[7].isdigit() else 21,
+        'attenuator': fields[8] if len(fields) > 8 else 'Off',
+        'delay': int(fields[9]) if len(fields) > 9 and _is_int(fields[9]) else 2,
+        'volume_offset': int(fields[10]) if len(fields) > 10 and _is_int(fields[10]) else 0,
+        'alert_tone': fields[11] if len(fields) > 11 else 'Off',
+        'alert_volume': fields[12] if len(fields) > 12 else 'Auto',
+        'alert_color': fields[13] if len(fields) > 13 else 'Off',
+        'alert_pattern': fields[14] if len(fields) > 14 else 'On',
+        'number_tag': fields[15] if len(fields) > 15 else 'Off',
+        'priority_channel': fields[16] if len(fields) > 16 else 'Off',
+    }
+
+
+def hand_tgid(fields):
+    return {
+        'my_id': fields[0] if len(fields) > 0 else '',
+        'parent_id': fields[1] if len(fields) > 1 else '',
+        'name_tag': fields[2] if len(fields) > 2 else '',
+        'avoid': fields[3] if len(fields) > 3 else 'Off',
+        'tgid': fields[4] if len(fields) > 4 else '',
+        'audio_type': fields[5] if len(fields) > 5 else 'ALL',
+        'func_tag_id': int(fields[6]) if len(fields) > 6 and fields[6].isdigit() else 21,
+        'delay': int(fields[7]) if len(fields) > 7 and _is_int(fields[7]) else 2,
+        'volume_offset': int(fields[8]) if len(fields) > 8 and _is_int(fields[8]) else 0,
+        'alert_tone': fields[9] if len(fields) > 9 else 'Off',
+        'alert_volume': fields[10] if len(fields) > 10 else 'Auto',
+        'alert_color': fields[11] if len(fields) > 11 else 'Off',
+        'alert_pattern': fields[12] if len(fields) > 12 else 'On',
+        'number_tag': fields[13] if len(fields) > 13 else 'Off',
+        'priority_channel': fields[14] if len(fields) > 14 else 'Off',
+        'tdma_slot': fields[15] if len(fields) > 15 else 'Any',
+    }
+
+
+def hand_rectangle(fields):
+    return {
+        'my_id': fields[0],
+        'latitude1': _to_decimal(fields[1]),
+        'longitude1': _to_decimal(fields[2]),
+        'latitude2': _to_decimal(fields[3]),
+        'longitude2': _to_decimal(fields[4]),
+    }
+
+
+# Parsers skip records shorter than this before mapping them
+MIN_FIELDS = {'Rectangle': 5}
+
+HAND_MAPPINGS = {
+    'C-Group': hand_cgroup,
+    'C-Freq': hand_cfreq,
+    'TGID': hand_tgid,
+    'Rectangle': hand_rectangle,
+}
+
+
+def sample_lines():
+    """Synthetic f_*.hpd body: full-width and truncated records."""
+    lines = []
+    for group in range(50):
+        lines.append(f'C-Group\tCGroupId={group}\tAgencyId=1\tGroup {group}\tOff\t35.1\t-80.2\t5.0\tCircle\tOff\t')
+        lines.append(f'Rectangle\tCGroupId={group}\t35.0\t-80.0\t36.0\t-81.0')
+        for channel in range(40):
+            lines.append(
+                f'C-Freq\tCFreqId={channel}\tCGroupId={group}\tChannel {channel}\tOff\t{154000000 + channel * 12500}'
+                f'\tNFM\tTONE=C67.0\t3\tOff\t2\t0\tOff\tAuto\tOff\tOn\tOff\tOff'
+            )
+        lines.append(f'C-Freq\tCFreqId=x\tCGroupId={group}\tShort\tOff\t155000000')
+        for tgid in range(20):
+            lines.append(
+                f'TGID\tTid={tgid}\tTGroupId={group}\tTalkgroup {tgid}\tOff\t{1000 + tgid}\tALL\t3\t2\t-1'
+                '\tOff\tAuto\tOff\tOn\tOff\tOff\tAny'
+            )
+    return lines
+
+
+def load_lines(path):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return [line.rstrip('\r\n') for line in f if line.strip()]
+
+
+def collect(lines):
+    records = []
+    for line in lines:
+        parts = line.split('\t')
+        if parts[0] in HAND_MAPPINGS and len(parts) > MIN_FIELDS.get(parts[0], 0):
+            records.append((parts[0], parts[1:]))
+    return records
+
+
+def run(records, mappers, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for record_type, fields in records:
+            mappers[record_type](fields)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(records), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', help='favorites .hpd file to decode (defaults to synthetic data)')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    lines = load_lines(args.path) if args.path else sample_lines()
+    decoders = {record_type: DECODERS[record_type].decode for record_type in HAND_MAPPINGS}
+
+    records = collect(lines)
+
+    # Both mappings must agree before their speed means anything
+    for record_type, fields in records:
+        expected = HAND_MAPPINGS[record_type](fields)
+        actual = decoders[record_type](fields)
+        if expected != actual:
+            print(f"MISMATCH on {record_type}:\n  hand:    {expected}\n  decoder: {actual}")
+            return 1
+
+    count, hand_time = run(records, HAND_MAPPINGS, args.repeat)
+    _, decoder_time = run(records, decoders, args.repeat)
+    if not count:
+        print("No C-Group/C-Freq/TGID/Rectangle records found")
+        return 1
+
+    print(f"Records decoded per pass: {count}")
+    print(f"  hand-written mapping: {count / hand_time:>12,.0f} lines/sec")
+    print(f"  spec decoders:        {count / decoder_time:>12,.0f} lines/sec")
+    print(f"  speedup:              {hand_time / decoder_time:>12.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
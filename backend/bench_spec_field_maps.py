@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for spec field-name resolution.
+Resolves field names for every record type in the spec (fixed and
+variable-width, at several widths) and compares the memoized
+get_spec_field_names against rebuilding the name list on every call, as
+the importers did before.
+
+Usage:
+    python bench_spec_field_maps.py [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from uniden_assistant.favourites.record_parser.spec_field_maps import (
+    FIXED_FIELD_MAPS,
+    _SIZED_RECORD_TYPES,
+    _dynamic_field_names,
+    _layout_variant,
+    get_spec_field_names,
+)
+
+# Record types whose names are only computed from the record width
+DYNAMIC_RECORD_TYPES = ['AvoidTgids', 'BandPlan_Mot', 'BandPlan_P25', 'DQKs_Status', 'ServiceType',
+                        'CustomServiceType', 'Avoid']
+
+
+def rebuilt_field_names(record_type, fields):
+    if record_type in FIXED_FIELD_MAPS and record_type not in _SIZED_RECORD_TYPES:
+        return FIXED_FIELD_MAPS[record_type]
+    return _dynamic_field_names(record_type, len(fields), _layout_variant(record_type, fields))
+
+
+def sample_records():
+    """Every spec record type at its natural width, plus wider and narrower variants."""
+    records = []
+    for record_type in [*FIXED_FIELD_MAPS, *DYNAMIC_RECORD_TYPES]:
+        width = len(FIXED_FIELD_MAPS.get(record_type, ())) or 4
+        for count in (max(width - 2, 0), width, width + 8):
+            records.append((record_type, [f'{idx}' for idx in range(count)]))
+    records.append(('Avoid', ['1', '2', 'SiteId=3']))
+    records.append(('Avoid', ['1', '2', 'DeptId=3']))
+    return records
+
+
+def run(records, resolve, repeat, passes):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(passes):
+            for record_type, fields in records:
+                resolve(record_type, fields)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--passes', type=int, default=200)
+    args = parser.parse_args()
+
+    records = sample_records()
+
+    for record_type, fields in records:
+        expected = list(rebuilt_field_names(record_type, fields))
+        actual = get_spec_field_names(record_type, fields)
+        if expected != list(actual) or not isinstance(actual, tuple):
+            print(f"MISMATCH on {record_type} ({len(fields)} fields):\n  rebuilt: {expected}\n  cached:  {actual}")
+            return 1
+
+    count = len(records) * args.passes
+    rebuilt_time = run(records, rebuilt_field_names, args.repeat, args.passes)
+    cached_time = run(records, get_spec_field_names, args.repeat, args.passes)
+
+    print(f"Records resolved per pass: {count} ({len(records)} record shapes)")
+    print(f"  rebuilt per call:     {count / rebuilt_time:>12,.0f} records/sec")
+    print(f"  memoized:             {count / cached_time:>12,.0f} records/sec")
+    print(f"  speedup:              {rebuilt_time / cached_time:>12.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the favourites SQLite profile.
+Measures read latency on the favourites database while another thread
+imports f_*.hpd trees, once with the stock SQLite settings and once with
+the 'performance' profile (WAL, synchronous=NORMAL, mmap, persistent
+connections). Each profile runs in its own process against a scratch
+database; the project databases are not touched.
+
+Usage:
+    python bench_sqlite_profile.py [path/to/f_000001.hpd] [--imports N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'uniden_assistant.settings')
+
+PROFILES = ('default', 'performance')
+
+
+def setup_django(profile, work_dir):
+    import django
+    import uniden_assistant.settings as project_settings
+
+    project_settings.FAVOURITES_SQLITE_PROFILE = profile
+    conn_max_age = 600 if profile == 'performance' else 0
+    project_settings.DATABASES['default']['NAME'] = os.path.join(work_dir, 'db.sqlite3')
+    project_settings.DATABASES['favorites'].update({
+        'NAME': os.path.join(work_dir, 'favourites.sqlite3'),
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': conn_max_age > 0,
+    })
+    project_settings.EXPORT_CACHE_DIR = os.path.join(work_dir, 'export_cache')
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    call_command('migrate', database='favorites', verbosity=0)
+
+
+def write_sample(path):
+    from uniden_assistant.favourites.tests import build_hpd
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        fh.write(build_hpd(groups=300))
+
+
+def run_profile(profile, hpd_path, imports):
+    """Run one profile in this process and print one result line."""
+    with tempfile.TemporaryDirectory(prefix='bench_sqlite_') as work_dir:
+        setup_django(profile, work_dir)
+
+        from django.db import close_old_connections, connections
+        from django.db.models import Count
+        from uniden_assistant.favourites.favorites_hpd_parser import FavoritesHPDParser
+        from uniden_assistant.favourites.models import CGroup, FavoritesList
+
+        if hpd_path is None:
+            hpd_path = os.path.join(work_dir, 'f_000001.hpd')
+            write_sample(hpd_path)
+
+        parser = FavoritesHPDParser()
+        tree = parser.parse_tree(hpd_path)
+        seed = FavoritesList.objects.using('favorites').create(user_name='Seed', filename='f_000000.hpd')
+        parser.write_tree(tree, seed)
+        connections.close_all()
+
+        done = threading.Event()
+
+        def importer():
+            try:
+                for idx in range(imports):
+                    favorites_list = FavoritesList.objects.using('favorites').create(
+                        user_name=f'Import {idx}', filename=f'f_{idx + 1:06d}.hpd',
+                    )
+                    parser.write_tree(tree, favorites_list)
+            finally:
+                connections.close_all()
+                done.set()
+
+        latencies = []
+        errors = 0
+        thread = threading.Thread(target=importer)
+        started = time.perf_counter()
+        thread.start()
+        while not done.is_set():
+            # One "request": a favourites detail style read, then the request-end connection handling
+            start = time.perf_counter()
+            try:
+                list(CGroup.objects.using('favorites').filter(
+                    conventional_system__favorites_list=seed
+                ).annotate(freq_count=Count('cfreqs')).order_by('order'))
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+            close_old_connections()
+        thread.join()
+        elapsed = time.perf_counter() - started
+        connections.close_all()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    print(
+        f"{profile:<12} import {elapsed:6.2f}s  reads {len(latencies):5d}  "
+        f"p50 {statistics.median(latencies) * 1000:8.1f}ms  p95 {p95 * 1000:8.1f}ms  "
+        f"max {latencies[-1] * 1000:8.1f}ms  errors {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', help='favorites .hpd file to import (defaults to synthetic data)')
+    parser.add_argument('--imports', type=int, default=3, help='lists imported while reading')
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args.profile, args.path, args.imports)
+        return 0
+
+    print("Read latency on the favourites database during a concurrent import")
+    for profile in PROFILES:
+        command = [sys.executable, os.path.abspath(__file__), '--profile', profile, '--imports', str(args.imports)]
+        if args.path:
+            command.append(os.path.abspath(args.path))
+        result = subprocess.run(command, cwd=BACKEND_DIR)
+        if result.returncode:
+            return result.returncode
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,9 @@
 """
 ASGI config for uniden_assistant project.
+
+Serving through ASGI (e.g. `uvicorn uniden_assistant.asgi:application`) lets
+the import progress stream (/api/uniden_manager/import/events/) run as an
+async generator instead of holding a worker thread per open connection.
 """
 
 import os
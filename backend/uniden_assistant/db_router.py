@@ -7,6 +7,10 @@ FAVORITES_MODELS = {
     'agency',
     'favoriteslist',
     'scannerfilerecord',
+    'scannerrecordschema',
+    'scannerrecordsource',
+    'scannerrawfile',
+    'importedfile',
     # New hierarchical favorites models
     'conventionalsystem',
     'trunksystem',
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class FavouritesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'uniden_assistant.favourites'
+
+    def ready(self):
+        from .sqlite_profile import apply_sqlite_profile
+
+        connection_created.connect(apply_sqlite_profile, dispatch_uid='favourites_sqlite_profile')
@@ -0,0 +1,163 @@
+"""Fast clearing of favourites data.
+
+Django's .delete() collects every related row into Python to cascade,
+which takes minutes on databases with hundreds of thousands of channels
+and records. Here each table is emptied with one set-based DELETE,
+children before parents, inside a single transaction. The FTS name index
+and the R-tree location index are recreated empty first when their source
+tables are cleared completely, so their per-row triggers find nothing to
+remove.
+
+With recreate=True the database file is rebuilt instead: the surviving
+rows are copied into a shadow file, which is swapped in (see shadow_db.py).
+That also returns the freed space to the filesystem.
+"""
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.apps import apps
+from django.db import connections, router, transaction
+
+from . import shadow_db
+from .models import (
+    Agency, AvoidTgid, BandPlanMot, BandPlanP25, CFreq, CGroup, ChannelGroup, ConventionalSystem, FavoritesList,
+    FleetMap, Frequency, ImportedFile, Rectangle, ScannerFileRecord, ScannerProfile, ScannerRawFile,
+    ScannerRecordSchema, ScannerRecordSource, Site, TFreq, TGID, TGroup, TrunkSystem, UnitId,
+)
+
+logger = logging.getLogger(__name__)
+
+# (model, where) leaf to root; where=None clears the whole table
+USER_SETTINGS_PLAN = [
+    (ImportedFile, None),
+    (ScannerFileRecord, None),
+    (ScannerRecordSource, None),
+    (ScannerRecordSchema, None),
+    (Rectangle, None),
+    (TGID, None),
+    (TGroup, None),
+    (TFreq, None),
+    (BandPlanMot, None),
+    (BandPlanP25, None),
+    (Site, None),
+    (AvoidTgid, None),
+    (UnitId, None),
+    (FleetMap, None),
+    (TrunkSystem, None),
+    (CFreq, None),
+    (CGroup, None),
+    (ConventionalSystem, None),
+    (Frequency, None),
+    (ChannelGroup, None),
+    (FavoritesList, None),
+    (Agency, None),
+    (ScannerProfile, None),
+]
+
+SCANNER_RAW_PLAN = [
+    (ImportedFile, 'raw_file_id IS NOT NULL'),
+    (ScannerRawFile, None),
+]
+
+# What a replace-mode favourites import starts without: every list and what hangs off it
+FAVORITES_LISTS_PLAN = [
+    (ImportedFile, "file_path LIKE 'favorites_lists/%' OR favorites_list_id IS NOT NULL"),
+    (ScannerFileRecord, (
+        "source_id IN (SELECT id FROM favourites_scannerrecordsource WHERE file_path LIKE 'favorites_lists/%')"
+    )),
+    (ScannerRecordSource, "file_path LIKE 'favorites_lists/%'"),
+    (Rectangle, None),
+    (TGID, None),
+    (TGroup, None),
+    (TFreq, None),
+    (BandPlanMot, None),
+    (BandPlanP25, None),
+    (Site, None),
+    (AvoidTgid, None),
+    (UnitId, None),
+    (FleetMap, None),
+    (TrunkSystem, None),
+    (CFreq, None),
+    (CGroup, None),
+    (ConventionalSystem, None),
+    (Frequency, "channel_group_id IN (SELECT id FROM favourites_channelgroup WHERE favorites_list_id IS NOT NULL)"),
+    (ChannelGroup, 'favorites_list_id IS NOT NULL'),
+    (FavoritesList, None),
+]
+
+# What a replace-mode HPDB import starts without
+HPDB_PLAN = [
+    (ImportedFile, (
+        "file_path LIKE 'HPDB/%' "
+        "OR raw_file_id IN (SELECT id FROM favourites_scannerrawfile WHERE file_path LIKE 'HPDB/%')"
+    )),
+    (ScannerRawFile, "file_path LIKE 'HPDB/%'"),
+]
+
+# Trigger-maintained indexes and the tables that feed them
+DERIVED_INDEXES = {
+    'favourites_name_search': (
+        FavoritesList, ConventionalSystem, TrunkSystem, CGroup, TGroup, Site, CFreq, TGID,
+    ),
+    'favourites_location_index': (CGroup, TGroup, Site, Rectangle),
+}
+
+Plan = List[Tuple[type, Optional[str]]]
+
+
+def _statement(model, where: Optional[str], verb: str) -> str:
+    sql = f'{verb} FROM "{model._meta.db_table}"'
+    return f'{sql} WHERE {where}' if where else sql
+
+
+def _emptied_indexes(plan: Plan) -> List[str]:
+    cleared = {model for model, where in plan if where is None}
+    return [index for index, sources in DERIVED_INDEXES.items() if cleared.issuperset(sources)]
+
+
+def kept_rows(plan: Plan, using: str = 'favorites') -> List[Tuple[str, Optional[str]]]:
+    """(table, where) of every row in the database that `plan` does not delete."""
+    wheres = dict(plan)
+    keep = []
+    for model in apps.get_app_config('favourites').get_models():
+        if not router.allow_migrate_model(using, model):
+            continue
+        if model not in wheres:
+            keep.append((model._meta.db_table, None))
+        elif wheres[model] is not None:
+            keep.append((model._meta.db_table, f'NOT ({wheres[model]})'))
+    return keep
+
+
+def _count(plan: Plan, using: str) -> Dict[str, int]:
+    counts = {}
+    with connections[using].cursor() as cursor:
+        for model, where in plan:
+            cursor.execute(_statement(model, where, 'SELECT count(*)'))
+            counts[model._meta.model_name] = counts.get(model._meta.model_name, 0) + cursor.fetchone()[0]
+    return counts
+
+
+def clear(plan: Plan, recreate: bool = False, using: str = 'favorites') -> dict:
+    """Delete the rows in `plan`; returns mode, per-model row counts and elapsed seconds."""
+    start = time.perf_counter()
+    if recreate:
+        deleted = _count(plan, using)
+        shadow_db.swap_in(shadow_db.build_shadow(kept_rows(plan, using), using=using), using=using)
+    else:
+        deleted = {}
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            for index in _emptied_indexes(plan):
+                # Dropping and recreating is much faster than deleting R-tree/FTS rows one by one
+                cursor.execute("SELECT sql FROM sqlite_master WHERE name = %s", [index])
+                create_sql = cursor.fetchone()[0]
+                cursor.execute(f'DROP TABLE "{index}"')
+                cursor.execute(create_sql)
+            for model, where in plan:
+                cursor.execute(_statement(model, where, 'DELETE'))
+                deleted[model._meta.model_name] = deleted.get(model._meta.model_name, 0) + cursor.rowcount
+    elapsed = round(time.perf_counter() - start, 3)
+    logger.info("Cleared %d rows in %.3fs (%s)", sum(deleted.values()), elapsed, 'recreate' if recreate else 'delete')
+    return {'mode': 'recreate' if recreate else 'delete', 'deleted': deleted, 'elapsed_seconds': elapsed}
+
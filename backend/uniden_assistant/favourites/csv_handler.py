@@ -1,259 +1,264 @@
 """
 CSV export/import handler for Favourite Lists
-Supports importing and exporting complete Favourite Lists with Systems, Departments, and Channels
+One row per channel (C-Freq) or talkgroup (TGID) with the system and group it
+belongs to, so a list can be edited in a spreadsheet and imported back
 """
 import csv
 import io
-from typing import Dict, List, Tuple, Any
-from .models import (
-    FavoritesList, ConventionalSystem, TrunkSystem, CGroup, Frequency
-)
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Union
 
+from django.db import transaction
+from django.db.models import Max
 
-class FavoritesListCSVHandler:
-    """Handle CSV export and import for Favourite Lists"""
-
-    # CSV Section markers
-    SECTION_METADATA = 'METADATA'
-    SECTION_CONVENTIONAL = 'CONVENTIONAL_SYSTEM'
-    SECTION_TRUNK = 'TRUNK_SYSTEM'
-    SECTION_DEPARTMENT = 'DEPARTMENT'
-    SECTION_CHANNEL = 'CHANNEL'
-
-    @staticmethod
-    def export_to_csv(favorites_list: FavoritesList) -> str:
-        """
-        Export a Favourite List to CSV format
-        
-        Format:
-        METADATA,name,user_name,scanner_model,format_version
-        CONVENTIONAL_SYSTEM,order,name_tag,avoid,modulation,...
-        CHANNEL,name_tag,frequency,modulation,...
-        TRUNK_SYSTEM,order,name_tag,system_type,...
-        DEPARTMENT,name_tag,...
-        CHANNEL,name_tag,frequency,...
-        """
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Write metadata
-        writer.writerow([
-            'METADATA',
-            favorites_list.user_name or '',
-            favorites_list.scanner_model or 'BCDx36HP',
-            favorites_list.format_version or '1.00',
-        ])
+from .export_cache import bump_export_generation
+from .favorites_hpd_parser import insert_rows
+from .json_handler import CFREQ_DEFAULTS, TGID_DEFAULTS
+from .models import CFreq, CGroup, ConventionalSystem, FavoritesList, TGID, TGroup, TrunkSystem
 
-        # Write Conventional Systems and their channels
-        conventional = ConventionalSystem.objects.using('favorites').filter(
-            favorites_list=favorites_list
-        ).order_by('order')
+RECORD_CFREQ = 'C-Freq'
+RECORD_TGID = 'TGID'
 
-        for conv_system in conventional:
-            writer.writerow([
-                'CONVENTIONAL_SYSTEM',
-                conv_system.order,
-                conv_system.name_tag or '',
-                conv_system.avoid or 'Off',
-                conv_system.system_type or '',
-                conv_system.quick_key or 'Off',
-            ])
+COLUMNS = [
+    'record', 'system', 'system_type', 'group', 'order', 'name_tag', 'avoid',
+    'frequency', 'modulation', 'audio_option', 'attenuator',
+    'tgid', 'audio_type', 'tdma_slot',
+    'func_tag_id', 'delay', 'volume_offset', 'alert_tone', 'alert_volume', 'alert_color', 'alert_pattern',
+    'number_tag', 'priority_channel',
+]
 
-            # Write channels for this conventional system
-            channels = Frequency.objects.using('favorites').filter(
-                cgroup__conventional_system=conv_system
-            ).order_by('cgroup__order', 'order')
+INTEGER_FIELDS = ('order', 'frequency', 'func_tag_id', 'delay', 'volume_offset')
 
-            for channel in channels:
-                writer.writerow([
-                    'CHANNEL',
-                    channel.cgroup.name_tag or '',  # Department name
-                    channel.name_tag or '',
-                    channel.frequency or '',
-                    channel.modulation or '',
-                    channel.att_delay or '',
-                    channel.offset or '',
-                    channel.offset_direction or '',
-                    channel.tone_mode or '',
-                    channel.tone_freq or '',
-                    channel.ctcss_decode or '',
-                    channel.ctcss_encode or '',
-                    channel.dcs_decode or '',
-                    channel.dcs_encode or '',
-                    channel.quick_key or 'Off',
-                    channel.avoid or 'Off',
-                ])
 
-        # Write Trunk Systems and their sites/departments/channels
-        trunked = TrunkSystem.objects.using('favorites').filter(
-            favorites_list=favorites_list
-        ).order_by('order')
+class _Level:
+    """How one record type hangs off the hierarchy: system model -> group model -> row model"""
 
-        for trunk_system in trunked:
-            writer.writerow([
-                'TRUNK_SYSTEM',
-                trunk_system.order,
-                trunk_system.name_tag or '',
-                trunk_system.system_type or 'P25Standard',
-                trunk_system.avoid or 'Off',
-                trunk_system.reserve or '',
-                trunk_system.system_id_search or 'Srch',
-            ])
+    def __init__(self, record, system_model, group_model, row_model, system_field, group_field, defaults,
+                 system_type):
+        self.record = record
+        self.system_model = system_model
+        self.group_model = group_model
+        self.row_model = row_model
+        self.system_field = system_field
+        self.group_field = group_field
+        self.defaults = defaults
+        self.system_type = system_type  # For systems the CSV creates without one
 
-            # Write departments for this trunk system
-            departments = CGroup.objects.using('favorites').filter(
-                trunk_system=trunk_system
-            ).order_by('order')
+    def export_query(self, favorites_list: FavoritesList):
+        """Every row of the list with its system and group, in file order, as one query"""
+        system = f'{self.group_field}__{self.system_field}'
+        fields = [f'{system}__name_tag', f'{system}__system_type', f'{self.group_field}__name_tag', 'order']
+        fields += [name for name in self.defaults]
+        return self.row_model.objects.using('favorites').filter(
+            **{f'{system}__favorites_list': favorites_list}
+        ).order_by(
+            f'{system}__order', f'{system}__pk', f'{self.group_field}__order', f'{self.group_field}__pk', 'order', 'pk'
+        ).values_list(*fields)
 
-            for dept in departments:
-                writer.writerow([
-                    'DEPARTMENT',
-                    dept.name_tag or '',
-                    dept.avoid or 'Off',
-                    dept.quick_key or 'Off',
-                ])
 
-                # Write channels for this department
-                channels = Frequency.objects.using('favorites').filter(
-                    cgroup=dept
-                ).order_by('order')
+LEVELS = {
+    RECORD_CFREQ: _Level(
+        RECORD_CFREQ, ConventionalSystem, CGroup, CFreq, 'conventional_system', 'cgroup', CFREQ_DEFAULTS,
+        'Conventional',
+    ),
+    RECORD_TGID: _Level(
+        RECORD_TGID, TrunkSystem, TGroup, TGID, 'trunk_system', 'tgroup', TGID_DEFAULTS, 'P25Standard',
+    ),
+}
 
-                for channel in channels:
-                    writer.writerow([
-                        'CHANNEL',
-                        channel.name_tag or '',
-                        channel.frequency or '',
-                        channel.modulation or '',
-                        channel.att_delay or '',
-                        channel.offset or '',
-                        channel.offset_direction or '',
-                        channel.tone_mode or '',
-                        channel.tone_freq or '',
-                        channel.ctcss_decode or '',
-                        channel.ctcss_encode or '',
-                        channel.dcs_decode or '',
-                        channel.dcs_encode or '',
-                        channel.quick_key or 'Off',
-                        channel.avoid or 'Off',
-                    ])
 
-        return output.getvalue()
+class _HierarchyResolver:
+    """Systems and groups of one list by name, created in bulk when rows name new ones"""
 
-    @staticmethod
-    def import_from_csv(csv_content: str, favorites_list: FavoritesList) -> Tuple[int, List[str]]:
-        """
-        Import a Favourite List from CSV content
-        Returns: (count of imported items, list of errors)
-        """
-        errors = []
-        imported_count = 0
-        
-        try:
-            reader = csv.reader(io.StringIO(csv_content))
-            current_system = None
-            current_department = None
-            
-            for row_num, row in enumerate(reader, 1):
-                if not row or not row[0]:
-                    continue
+    def __init__(self, favorites_list: FavoritesList):
+        self.favorites_list = favorites_list
+        self.systems = {}
+        self.groups = {}
+        self.next_order = {}
+        for record, level in LEVELS.items():
+            systems = level.system_model.objects.using('favorites').filter(favorites_list=favorites_list)
+            for system in systems.order_by('order', 'pk'):
+                self.systems.setdefault((record, system.name_tag), system)
+            top = systems.aggregate(top=Max('order'))['top']
+            self.next_order[record] = 0 if top is None else top + 1
+            groups = level.group_model.objects.using('favorites').filter(
+                **{f'{level.system_field}__favorites_list': favorites_list}
+            )
+            for group in groups.order_by('order', 'pk'):
+                self.groups.setdefault((record, getattr(group, f'{level.system_field}_id'), group.name_tag), group)
+            group_tops = groups.order_by().values_list(f'{level.system_field}_id').annotate(top=Max('order'))
+            for system_id, top in group_tops:
+                self.next_order[(record, system_id)] = top + 1
+            rows = level.row_model.objects.using('favorites').filter(
+                **{f'{level.group_field}__{level.system_field}__favorites_list': favorites_list}
+            )
+            row_tops = rows.order_by().values_list(f'{level.group_field}_id').annotate(top=Max('order'))
+            for group_id, top in row_tops:
+                self.next_order[(record, 'group', group_id)] = top + 1
 
-                section = row[0]
+    def resolve(self, rows: List[Dict[str, Any]]) -> None:
+        """Set row['_group'] for every row, creating missing systems then missing groups with one bulk_create each"""
+        for record, level in LEVELS.items():
+            level_rows = [row for row in rows if row['record'] == record]
+            new_systems = {}
+            for row in level_rows:
+                key = (record, row['system'])
+                if key not in self.systems and key not in new_systems:
+                    new_systems[key] = level.system_model(
+                        favorites_list=self.favorites_list,
+                        name_tag=row['system'],
+                        system_type=row['system_type'] or level.system_type,
+                        order=self.next_order[record],
+                    )
+                    self.next_order[record] += 1
+            if new_systems:
+                insert_rows(level.system_model, list(new_systems.values()))
+                self.systems.update(new_systems)
 
-                try:
-                    if section == FavoritesListCSVHandler.SECTION_METADATA:
-                        # Update metadata
-                        if len(row) > 1:
-                            favorites_list.user_name = row[1]
-                        if len(row) > 2:
-                            favorites_list.scanner_model = row[2]
-                        if len(row) > 3:
-                            favorites_list.format_version = row[3]
-                        favorites_list.save(using='favorites')
-                        imported_count += 1
+            new_groups = {}
+            for row in level_rows:
+                system = self.systems[(record, row['system'])]
+                key = (record, system.pk, row['group'])
+                if key not in self.groups and key not in new_groups:
+                    order_key = (record, system.pk)
+                    new_groups[key] = level.group_model(
+                        **{level.system_field: system},
+                        name_tag=row['group'],
+                        order=self.next_order.get(order_key, 0),
+                    )
+                    self.next_order[order_key] = self.next_order.get(order_key, 0) + 1
+                row['_group'] = self.groups.get(key) or new_groups[key]
+            if new_groups:
+                insert_rows(level.group_model, list(new_groups.values()))
+                self.groups.update(new_groups)
 
-                    elif section == FavoritesListCSVHandler.SECTION_CONVENTIONAL:
-                        # Create/update conventional system
-                        current_system = ConventionalSystem.objects.using('favorites').update_or_create(
-                            favorites_list=favorites_list,
-                            order=int(row[1]) if len(row) > 1 and row[1] else 0,
-                            defaults={
-                                'name_tag': row[2] if len(row) > 2 else '',
-                                'avoid': row[3] if len(row) > 3 else 'Off',
-                                'modulation': row[4] if len(row) > 4 else 'AUTO',
-                                'att_delay': row[5] if len(row) > 5 else '',
-                            }
-                        )[0]
-                        current_department = None
-                        imported_count += 1
 
-                    elif section == FavoritesListCSVHandler.SECTION_TRUNK:
-                        # Create/update trunk system
-                        current_system = TrunkSystem.objects.using('favorites').update_or_create(
-                            favorites_list=favorites_list,
-                            order=int(row[1]) if len(row) > 1 and row[1] else 0,
-                            defaults={
-                                'name_tag': row[2] if len(row) > 2 else '',
-                                'system_type': row[3] if len(row) > 3 else 'P25Standard',
-                                'avoid': row[4] if len(row) > 4 else 'Off',
-                                'reserve': row[5] if len(row) > 5 else '',
-                                'system_id_search': row[6] if len(row) > 6 else 'Srch',
-                            }
-                        )[0]
-                        current_department = None
-                        imported_count += 1
+class FavoritesListCSVHandler:
+    """Handle CSV export and import for Favourite Lists"""
 
-                    elif section == FavoritesListCSVHandler.SECTION_DEPARTMENT:
-                        # Create/update department (CGroup)
-                        if isinstance(current_system, TrunkSystem):
-                            current_department = CGroup.objects.using('favorites').create(
-                                trunk_system=current_system,
-                                name_tag=row[1] if len(row) > 1 else '',
-                                avoid=row[2] if len(row) > 2 else 'Off',
-                                quick_key=row[3] if len(row) > 3 else 'Off',
-                                order=0,  # Will be set by save_to_db logic
-                            )
-                            imported_count += 1
+    # Text gathered before each chunk is yielded
+    STREAM_CHUNK_SIZE = 64 * 1024
+    # Rows parsed before their systems, groups and channels are written
+    IMPORT_BATCH_SIZE = 2000
 
-                    elif section == FavoritesListCSVHandler.SECTION_CHANNEL:
-                        # Create/update channel (Frequency)
-                        if current_system:
-                            if isinstance(current_system, ConventionalSystem):
-                                # For conventional, department is the channel group (system-level group)
-                                dept, _ = CGroup.objects.using('favorites').get_or_create(
-                                    conventional_system=current_system,
-                                    name_tag=row[1] if len(row) > 1 else 'Default',
-                                    defaults={'order': 0}
-                                )
-                            else:
-                                # For trunk, use the current department
-                                dept = current_department
+    @classmethod
+    def export_to_csv(cls, favorites_list: FavoritesList) -> str:
+        """
+        Export a Favourite List to CSV format
+        Returns the whole document; iter_csv() yields it in chunks
+        """
+        return ''.join(cls.iter_csv(favorites_list))
 
-                            if dept:
-                                Frequency.objects.using('favorites').create(
-                                    cgroup=dept,
-                                    name_tag=row[2] if len(row) > 2 else '',
-                                    frequency=row[3] if len(row) > 3 else '',
-                                    modulation=row[4] if len(row) > 4 else '',
-                                    att_delay=row[5] if len(row) > 5 else '',
-                                    offset=row[6] if len(row) > 6 else '',
-                                    offset_direction=row[7] if len(row) > 7 else '',
-                                    tone_mode=row[8] if len(row) > 8 else '',
-                                    tone_freq=row[9] if len(row) > 9 else '',
-                                    ctcss_decode=row[10] if len(row) > 10 else '',
-                                    ctcss_encode=row[11] if len(row) > 11 else '',
-                                    dcs_decode=row[12] if len(row) > 12 else '',
-                                    dcs_encode=row[13] if len(row) > 13 else '',
-                                    quick_key=row[14] if len(row) > 14 else 'Off',
-                                    avoid=row[15] if len(row) > 15 else 'Off',
-                                    order=0,
-                                )
-                                imported_count += 1
+    @classmethod
+    def iter_csv(cls, favorites_list: FavoritesList) -> Iterator[str]:
+        """
+        Yield the CSV of a list as text chunks of about STREAM_CHUNK_SIZE
+        Rows are read with one query per record type and streamed from the
+        cursor, so memory does not grow with the number of channels
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNS)
+        for record, level in LEVELS.items():
+            field_names = ['system', 'system_type', 'group', 'order'] + list(level.defaults)
+            positions = [field_names.index(column) if column in field_names else None for column in COLUMNS[1:]]
+            for values in level.export_query(favorites_list).iterator(chunk_size=2000):
+                writer.writerow([record] + ['' if pos is None else values[pos] for pos in positions])
+                if buffer.tell() >= cls.STREAM_CHUNK_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
 
-                except (ValueError, IndexError) as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
+    @classmethod
+    def import_from_csv(cls, csv_content: Union[str, TextIO], favorites_list: FavoritesList) -> Tuple[int, List[str]]:
+        """
+        Import channels and TGIDs from CSV content (a string or a text stream) into a Favourite List
+        Systems and groups are matched by name and created when missing. Rows
+        are read from the stream in batches of IMPORT_BATCH_SIZE and written
+        with bulk_create, all in one transaction; rows with bad values are
+        skipped and reported, any other error imports nothing.
+        Returns: (count of imported rows, list of errors)
+        """
+        errors = []
+        imported_count = 0
+        stream = io.StringIO(csv_content) if isinstance(csv_content, str) else csv_content
 
+        try:
+            with transaction.atomic(using='favorites'):
+                reader = csv.DictReader(stream)
+                if not reader.fieldnames or 'record' not in reader.fieldnames:
+                    return 0, ['Invalid CSV format: missing header row with a record column']
+                resolver = _HierarchyResolver(favorites_list)
+                batch = []
+                for row in reader:
+                    try:
+                        parsed = cls._parse_row(row)
+                    except ValueError as e:
+                        errors.append(f"Row {reader.line_num}: {str(e)}")
+                        continue
+                    if parsed is not None:
+                        batch.append(parsed)
+                    if len(batch) >= cls.IMPORT_BATCH_SIZE:
+                        imported_count += cls._write_batch(batch, resolver)
+                        batch = []
+                imported_count += cls._write_batch(batch, resolver)
+            if imported_count:
+                bump_export_generation(favorites_list.pk)
             return imported_count, errors
 
         except Exception as e:
             errors.append(f"CSV parsing error: {str(e)}")
             return 0, errors
+
+    @staticmethod
+    def _parse_row(row: Dict[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+        """Typed values of one CSV row, or None for a blank row; ValueError if it cannot be imported"""
+        record = (row.get('record') or '').strip()
+        if not record and not any(row.values()):
+            return None
+        level = LEVELS.get(record)
+        if level is None:
+            raise ValueError(f"unknown record type '{record}' (expected {RECORD_CFREQ} or {RECORD_TGID})")
+        key = 'frequency' if record == RECORD_CFREQ else 'tgid'
+        if not row.get(key):
+            raise ValueError(f"{record} row has no {key}")
+        parsed = {
+            'record': record,
+            'system': row.get('system') or '',
+            'system_type': row.get('system_type') or '',
+            'group': row.get('group') or '',
+            'order': row.get('order') or None,
+        }
+        for name, default in level.defaults.items():
+            value = row.get(name)
+            parsed[name] = default if value in (None, '') else value
+        for name in INTEGER_FIELDS:
+            if isinstance(parsed.get(name), str):
+                try:
+                    parsed[name] = int(parsed[name])
+                except ValueError:
+                    raise ValueError(f"{name} must be a whole number, got '{parsed[name]}'") from None
+        return parsed
+
+    @staticmethod
+    def _write_batch(batch: List[Dict[str, Any]], resolver: _HierarchyResolver) -> int:
+        if not batch:
+            return 0
+        resolver.resolve(batch)
+        for record, level in LEVELS.items():
+            objects = []
+            for row in batch:
+                if row['record'] != record:
+                    continue
+                group = row['_group']
+                order_key = (record, 'group', group.pk)
+                order = row['order']
+                if order is None:
+                    order = resolver.next_order.get(order_key, 0)
+                resolver.next_order[order_key] = max(resolver.next_order.get(order_key, 0), order + 1)
+                fields = {name: row[name] for name in level.defaults}
+                objects.append(level.row_model(**{level.group_field: group}, order=order, **fields))
+            if objects:
+                insert_rows(level.row_model, objects)
+        return len(batch)
@@ -0,0 +1,115 @@
+"""On-disk cache of generated favourites export artifacts.
+
+Artifacts are keyed by FavoritesList id plus its export_generation counter.
+Every write through the favourites API bumps the counter of the list it
+touches (bump_export_generation), so a stale artifact is never looked up
+again; the bump also removes that list's old files so the cache does not
+grow with edits.
+
+Layout under settings.EXPORT_CACHE_DIR:
+    hpd/<list id>-<generation>.hpd      f_*.hpd text of one list
+    json/<list id>-<generation>.json    export-json of one list
+    json/multi-<digest>.json            export-json-multiple of a set of lists
+    json/....min.json                   the same with compact=true
+    zip/<digest>.zip                    export-favorites/ archive
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import FavoritesList
+
+logger = logging.getLogger(__name__)
+
+
+def list_key(favorites_list: FavoritesList) -> str:
+    return f"{favorites_list.pk}-{favorites_list.export_generation}"
+
+
+def _digest(favorites_lists: Iterable[FavoritesList]) -> str:
+    keys = ','.join(list_key(favorites_list) for favorites_list in favorites_lists)
+    return hashlib.sha1(keys.encode('ascii')).hexdigest()
+
+
+class ExportCache:
+    """Paths and atomic writes for cached export artifacts."""
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = Path(root or settings.EXPORT_CACHE_DIR)
+
+    def hpd_path(self, favorites_list: FavoritesList) -> Path:
+        return self.root / 'hpd' / f"{list_key(favorites_list)}.hpd"
+
+    def json_path(self, favorites_lists: Iterable[FavoritesList], compact: bool = False) -> Path:
+        favorites_lists = list(favorites_lists)
+        suffix = '.min.json' if compact else '.json'
+        if len(favorites_lists) == 1:
+            return self.root / 'json' / f"{list_key(favorites_lists[0])}{suffix}"
+        return self.root / 'json' / f"multi-{_digest(favorites_lists)}{suffix}"
+
+    def zip_path(self, favorites_lists: Iterable[FavoritesList]) -> Path:
+        return self.root / 'zip' / f"{_digest(favorites_lists)}.zip"
+
+    @staticmethod
+    def get(path: Path) -> Optional[Path]:
+        """Return path if the artifact has been generated, else None."""
+        return path if path.is_file() else None
+
+    @contextmanager
+    def writer(self, path: Path):
+        """Open a temporary file that replaces path only if the block completes.
+
+        Readers never see a partial artifact, and an interrupted generation
+        (error or client disconnect) leaves nothing behind.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                yield fh
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def write_bytes(self, path: Path, content: bytes) -> Path:
+        with self.writer(path) as fh:
+            fh.write(content)
+        return path
+
+    def invalidate(self, favorites_list_id: int) -> None:
+        """Remove every artifact that may contain the given list."""
+        patterns = [
+            ('hpd', f"{favorites_list_id}-*.hpd"),
+            ('json', f"{favorites_list_id}-*.json"),
+            ('json', 'multi-*.json'),
+            ('zip', '*.zip'),
+        ]
+        for subdir, pattern in patterns:
+            for path in (self.root / subdir).glob(pattern):
+                try:
+                    path.unlink()
+                except OSError as exc:
+                    logger.warning("Could not remove cached export %s: %s", path, exc)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def bump_export_generation(favorites_list_id: int, using: str = 'favorites') -> None:
+    """Mark a list's cached exports stale after its content changed."""
+    FavoritesList.objects.using(using).filter(pk=favorites_list_id).update(
+        export_generation=F('export_generation') + 1
+    )
+    ExportCache().invalidate(favorites_list_id)
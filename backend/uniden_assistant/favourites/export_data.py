@@ -0,0 +1,141 @@
+"""Bulk loader for favourites export.
+
+Fetches every table of the favorites hierarchy once for a set of
+FavoritesList rows and groups the children by parent id in memory, so
+building f_*.hpd files costs a fixed number of queries however many
+systems, groups and channels the lists contain.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from .models import (
+    FavoritesList,
+    ConventionalSystem,
+    TrunkSystem,
+    FleetMap,
+    UnitId,
+    AvoidTgid,
+    CGroup,
+    CFreq,
+    Site,
+    BandPlanP25,
+    BandPlanMot,
+    TFreq,
+    TGroup,
+    TGID,
+    Rectangle,
+)
+
+
+def _group_by(queryset, key: str) -> Dict[int, List]:
+    grouped = defaultdict(list)
+    for obj in queryset:
+        grouped[getattr(obj, key)].append(obj)
+    return grouped
+
+
+class FavoritesExportData:
+    """Prefetched system -> group -> channel hierarchy for favorites lists.
+
+    Usage:
+        data = FavoritesExportData(FavoritesList.objects.using('favorites').all())
+        for system in data.conventional_systems_for(favorites_list):
+            for group in data.cgroups_for(system):
+                ...
+    """
+
+    def __init__(self, favorites_lists: Iterable[FavoritesList], using: str = 'favorites') -> None:
+        self.favorites_lists = list(favorites_lists)
+        list_ids = [favorites_list.pk for favorites_list in self.favorites_lists]
+        self._list_ids = set(list_ids)
+
+        def fetch(model, **filters):
+            return model.objects.using(using).filter(**filters).order_by('order', 'pk')
+
+        conventional = {'conventional_system__favorites_list_id__in': list_ids}
+        trunk = {'trunk_system__favorites_list_id__in': list_ids}
+        site = {'site__trunk_system__favorites_list_id__in': list_ids}
+        tgroup = {'tgroup__trunk_system__favorites_list_id__in': list_ids}
+
+        self.conventional_systems = _group_by(
+            fetch(ConventionalSystem, favorites_list_id__in=list_ids), 'favorites_list_id')
+        self.cgroups = _group_by(fetch(CGroup, **conventional), 'conventional_system_id')
+        self.cfreqs = _group_by(
+            fetch(CFreq, cgroup__conventional_system__favorites_list_id__in=list_ids), 'cgroup_id')
+
+        self.trunk_systems = _group_by(
+            fetch(TrunkSystem, favorites_list_id__in=list_ids), 'favorites_list_id')
+        self.fleet_maps = _group_by(fetch(FleetMap, **trunk), 'trunk_system_id')
+        self.unit_ids = _group_by(fetch(UnitId, **trunk), 'trunk_system_id')
+        self.avoid_tgids = _group_by(fetch(AvoidTgid, **trunk), 'trunk_system_id')
+        self.sites = _group_by(fetch(Site, **trunk), 'trunk_system_id')
+        self.tfreqs = _group_by(fetch(TFreq, **site), 'site_id')
+        self.tgroups = _group_by(fetch(TGroup, **trunk), 'trunk_system_id')
+        self.tgids = _group_by(fetch(TGID, **tgroup), 'tgroup_id')
+
+        self.bandplans_p25 = {
+            bandplan.site_id: bandplan
+            for bandplan in BandPlanP25.objects.using(using).filter(**site)
+        }
+        self.bandplans_mot = {
+            bandplan.site_id: bandplan
+            for bandplan in BandPlanMot.objects.using(using).filter(**site)
+        }
+
+        self.site_rectangles = _group_by(
+            fetch(Rectangle, site__trunk_system__favorites_list_id__in=list_ids), 'site_id')
+        self.tgroup_rectangles = _group_by(
+            fetch(Rectangle, tgroup__trunk_system__favorites_list_id__in=list_ids), 'tgroup_id')
+        self.cgroup_rectangles = _group_by(
+            fetch(Rectangle, cgroup__conventional_system__favorites_list_id__in=list_ids), 'cgroup_id')
+
+    def holds(self, favorites_list: FavoritesList) -> bool:
+        """True if this hierarchy was loaded for the given list."""
+        return favorites_list.pk in self._list_ids
+
+    def conventional_systems_for(self, favorites_list: FavoritesList) -> List[ConventionalSystem]:
+        return self.conventional_systems.get(favorites_list.pk, [])
+
+    def trunk_systems_for(self, favorites_list: FavoritesList) -> List[TrunkSystem]:
+        return self.trunk_systems.get(favorites_list.pk, [])
+
+    def cgroups_for(self, system: ConventionalSystem) -> List[CGroup]:
+        return self.cgroups.get(system.pk, [])
+
+    def cfreqs_for(self, group: CGroup) -> List[CFreq]:
+        return self.cfreqs.get(group.pk, [])
+
+    def fleet_maps_for(self, system: TrunkSystem) -> List[FleetMap]:
+        return self.fleet_maps.get(system.pk, [])
+
+    def unit_ids_for(self, system: TrunkSystem) -> List[UnitId]:
+        return self.unit_ids.get(system.pk, [])
+
+    def avoid_tgids_for(self, system: TrunkSystem) -> List[AvoidTgid]:
+        return self.avoid_tgids.get(system.pk, [])
+
+    def sites_for(self, system: TrunkSystem) -> List[Site]:
+        return self.sites.get(system.pk, [])
+
+    def tfreqs_for(self, site: Site) -> List[TFreq]:
+        return self.tfreqs.get(site.pk, [])
+
+    def tgroups_for(self, system: TrunkSystem) -> List[TGroup]:
+        return self.tgroups.get(system.pk, [])
+
+    def tgids_for(self, tgroup: TGroup) -> List[TGID]:
+        return self.tgids.get(tgroup.pk, [])
+
+    def bandplan_p25_for(self, site: Site):
+        return self.bandplans_p25.get(site.pk)
+
+    def bandplan_mot_for(self, site: Site):
+        return self.bandplans_mot.get(site.pk)
+
+    def rectangles_for(self, parent) -> List[Rectangle]:
+        """Rectangles of a Site, TGroup or CGroup."""
+        if isinstance(parent, Site):
+            return self.site_rectangles.get(parent.pk, [])
+        if isinstance(parent, TGroup):
+            return self.tgroup_rectangles.get(parent.pk, [])
+        return self.cgroup_rectangles.get(parent.pk, [])
@@ -2,7 +2,16 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Tuple
+
+import django
+from django.db import connections, transaction
 
 from .models import (
     FavoritesList,
@@ -22,20 +31,67 @@ from .models import (
     Rectangle,
     ScannerFileRecord,
 )
-from .record_parser.spec_field_maps import build_spec_field_map
+from .export_cache import bump_export_generation
+from .record_parser.decoders import DECODERS
+from .record_schemas import build_records, create_source
 
 logger = logging.getLogger(__name__)
 
+_CONVENTIONAL = DECODERS['Conventional']
+_TRUNK = DECODERS['Trunk']
+_CGROUP = DECODERS['C-Group']
+_CFREQ = DECODERS['C-Freq']
+_SITE = DECODERS['Site']
+_TFREQ = DECODERS['T-Freq']
+_TGROUP = DECODERS['T-Group']
+_TGID = DECODERS['TGID']
+_RECTANGLE = DECODERS['Rectangle']
+_FLEETMAP = DECODERS['FleetMap']
+_UNITIDS = DECODERS['UnitIds']
+
+
+@dataclass
+class ParsedFavoritesFile:
+    """In-memory system -> group -> channel tree for one f_*.hpd file.
+
+    Child rows reference their parent by index into the parent level's list,
+    so the whole tree is plain Python data that can be written level by level.
+    """
+    file_name: str
+    scanner_model: Optional[str] = None
+    format_version: Optional[str] = None
+    records: list = field(default_factory=list)  # ScannerFileRecord rows for build_records()
+    conventional_systems: list = field(default_factory=list)  # kwargs
+    cgroups: list = field(default_factory=list)  # (conventional index, kwargs)
+    cfreqs: list = field(default_factory=list)  # (cgroup index, kwargs)
+    trunk_systems: list = field(default_factory=list)  # kwargs
+    fleet_maps: list = field(default_factory=list)  # (trunk index, kwargs)
+    unit_ids: list = field(default_factory=list)  # (trunk index, kwargs)
+    avoid_tgids: list = field(default_factory=list)  # (trunk index, kwargs)
+    sites: list = field(default_factory=list)  # (trunk index, kwargs)
+    bandplans_p25: dict = field(default_factory=dict)  # site index -> kwargs
+    bandplans_mot: dict = field(default_factory=dict)  # site index -> kwargs
+    tfreqs: list = field(default_factory=list)  # (site index, kwargs)
+    tgroups: list = field(default_factory=list)  # (trunk index, kwargs)
+    tgids: list = field(default_factory=list)  # (tgroup index, kwargs)
+    rectangles: list = field(default_factory=list)  # ('site'|'tgroup'|'cgroup', parent index, kwargs)
+
 
 class FavoritesHPDParser:
-    """Parse a favorites f_*.hpd file and store all record types."""
-
-    def __init__(self) -> None:
-        self.current_conventional: Optional[ConventionalSystem] = None
-        self.current_cgroup: Optional[CGroup] = None
-        self.current_trunk: Optional[TrunkSystem] = None
-        self.current_site: Optional[Site] = None
-        self.current_tgroup: Optional[TGroup] = None
+    """Parse a favorites f_*.hpd file and store all record types.
+
+    Parsing builds a ParsedFavoritesFile in memory; writing then inserts each
+    level of the hierarchy with bulk_create inside a single transaction.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None) -> None:
+        self.batch_size = batch_size
+        self.tree: Optional[ParsedFavoritesFile] = None
+        self.current_conventional: Optional[int] = None
+        self.current_cgroup: Optional[int] = None
+        self.current_trunk: Optional[int] = None
+        self.current_site: Optional[int] = None
+        self.current_tgroup: Optional[int] = None
         self.conventional_order = 0
         self.trunk_order = 0
         self.cgroup_order = 0
@@ -51,90 +107,168 @@ class FavoritesHPDParser:
 
     def parse_file(self, file_path: str, favorites_list: FavoritesList) -> None:
         """Parse a favorites file into models."""
-        self._reset_state()
+        tree = self.parse_tree(file_path)
+        self.write_tree(tree, favorites_list)
 
+    def parse_tree(self, file_path: str) -> ParsedFavoritesFile:
+        """Parse a favorites file into an in-memory tree without touching the database."""
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line_number, raw_line in enumerate(f, start=1):
-                raw_line = raw_line.rstrip('\n').rstrip('\r')
-                if not raw_line:
-                    continue
-
-                parts_all = raw_line.split('\t')
-                record_type = parts_all[0] if parts_all else ''
-                fields = parts_all[1:] if len(parts_all) > 1 else []
-
-                # Store structured record for reference
-                self._store_record(file_path, record_type, fields, line_number, raw_line)
-
-                if record_type == 'TargetModel':
-                    favorites_list.scanner_model = fields[0] if fields else favorites_list.scanner_model
-                    favorites_list.save(update_fields=['scanner_model'])
-                    continue
-
-                if record_type == 'FormatVersion':
-                    favorites_list.format_version = fields[0] if fields else favorites_list.format_version
-                    favorites_list.save(update_fields=['format_version'])
-                    continue
-
-                if record_type == 'Conventional':
-                    self._parse_conventional(fields, favorites_list)
-                    continue
-
-                if record_type == 'Trunk':
-                    self._parse_trunk(fields, favorites_list)
-                    continue
-
-                if record_type == 'DQKs_Status':
-                    self._parse_dqks_status(fields)
-                    continue
-
-                if record_type == 'C-Group':
-                    self._parse_cgroup(fields)
-                    continue
-
-                if record_type == 'C-Freq':
-                    self._parse_cfreq(fields)
-                    continue
-
-                if record_type == 'Site':
-                    self._parse_site(fields)
-                    continue
-
-                if record_type == 'BandPlan_P25':
-                    self._parse_bandplan_p25(fields)
-                    continue
-
-                if record_type == 'BandPlan_Mot':
-                    self._parse_bandplan_mot(fields)
-                    continue
-
-                if record_type == 'FleetMap':
-                    self._parse_fleetmap(fields)
-                    continue
-
-                if record_type == 'UnitIds':
-                    self._parse_unitids(fields)
-                    continue
+            return self.parse_lines(enumerate(f, start=1), file_path.split('/')[-1])
 
-                if record_type == 'AvoidTgids':
-                    self._parse_avoid_tgids(fields)
-                    continue
-
-                if record_type == 'T-Freq':
-                    self._parse_tfreq(fields)
-                    continue
-
-                if record_type == 'T-Group':
-                    self._parse_tgroup(fields)
-                    continue
-
-                if record_type == 'TGID':
-                    self._parse_tgid(fields)
-                    continue
-
-                if record_type == 'Rectangle':
-                    self._parse_rectangle(fields)
-                    continue
+    def parse_lines(self, lines: Iterable[Tuple[int, str]], file_name: str) -> ParsedFavoritesFile:
+        """Parse (line_number, line) pairs of a favorites file into an in-memory tree."""
+        self._reset_state()
+        self.tree = ParsedFavoritesFile(file_name=file_name)
+
+        for line_number, raw_line in lines:
+            raw_line = raw_line.rstrip('\n').rstrip('\r')
+            if not raw_line:
+                continue
+
+            parts_all = raw_line.split('\t')
+            record_type = parts_all[0] if parts_all else ''
+            fields = parts_all[1:] if len(parts_all) > 1 else []
+
+            # Store structured record for reference
+            self._store_record(record_type, fields, line_number, raw_line)
+
+            if record_type == 'TargetModel':
+                if fields:
+                    self.tree.scanner_model = fields[0]
+                continue
+
+            if record_type == 'FormatVersion':
+                if fields:
+                    self.tree.format_version = fields[0]
+                continue
+
+            if record_type == 'Conventional':
+                self._parse_conventional(fields)
+                continue
+
+            if record_type == 'Trunk':
+                self._parse_trunk(fields)
+                continue
+
+            if record_type == 'DQKs_Status':
+                self._parse_dqks_status(fields)
+                continue
+
+            if record_type == 'C-Group':
+                self._parse_cgroup(fields)
+                continue
+
+            if record_type == 'C-Freq':
+                self._parse_cfreq(fields)
+                continue
+
+            if record_type == 'Site':
+                self._parse_site(fields)
+                continue
+
+            if record_type == 'BandPlan_P25':
+                self._parse_bandplan_p25(fields)
+                continue
+
+            if record_type == 'BandPlan_Mot':
+                self._parse_bandplan_mot(fields)
+                continue
+
+            if record_type == 'FleetMap':
+                self._parse_fleetmap(fields)
+                continue
+
+            if record_type == 'UnitIds':
+                self._parse_unitids(fields)
+                continue
+
+            if record_type == 'AvoidTgids':
+                self._parse_avoid_tgids(fields)
+                continue
+
+            if record_type == 'T-Freq':
+                self._parse_tfreq(fields)
+                continue
+
+            if record_type == 'T-Group':
+                self._parse_tgroup(fields)
+                continue
+
+            if record_type == 'TGID':
+                self._parse_tgid(fields)
+                continue
+
+            if record_type == 'Rectangle':
+                self._parse_rectangle(fields)
+                continue
+
+        tree, self.tree = self.tree, None
+        return tree
+
+    def write_tree(self, tree: ParsedFavoritesFile, favorites_list: FavoritesList) -> None:
+        """Insert a parsed tree level by level inside one atomic transaction."""
+        with transaction.atomic(using='favorites'):
+            update_fields = []
+            if tree.scanner_model is not None:
+                favorites_list.scanner_model = tree.scanner_model
+                update_fields.append('scanner_model')
+            if tree.format_version is not None:
+                favorites_list.format_version = tree.format_version
+                update_fields.append('format_version')
+            if update_fields:
+                favorites_list.save(update_fields=update_fields)
+
+            if tree.records:
+                source = create_source(tree.file_name, 'favorites_lists/' + tree.file_name)
+                self._insert(ScannerFileRecord, build_records(source, tree.records))
+
+            conventional_systems = self._insert(ConventionalSystem, [
+                ConventionalSystem(favorites_list=favorites_list, **kwargs)
+                for kwargs in tree.conventional_systems
+            ])
+            cgroups = self._insert(CGroup, [
+                CGroup(conventional_system=conventional_systems[idx], **kwargs)
+                for idx, kwargs in tree.cgroups
+            ])
+            self._insert(CFreq, [CFreq(cgroup=cgroups[idx], **kwargs) for idx, kwargs in tree.cfreqs])
+
+            trunk_systems = self._insert(TrunkSystem, [
+                TrunkSystem(favorites_list=favorites_list, **kwargs)
+                for kwargs in tree.trunk_systems
+            ])
+            self._insert(FleetMap, [
+                FleetMap(trunk_system=trunk_systems[idx], **kwargs) for idx, kwargs in tree.fleet_maps
+            ])
+            self._insert(UnitId, [
+                UnitId(trunk_system=trunk_systems[idx], **kwargs) for idx, kwargs in tree.unit_ids
+            ])
+            self._insert(AvoidTgid, [
+                AvoidTgid(trunk_system=trunk_systems[idx], **kwargs) for idx, kwargs in tree.avoid_tgids
+            ])
+            sites = self._insert(Site, [
+                Site(trunk_system=trunk_systems[idx], **kwargs) for idx, kwargs in tree.sites
+            ])
+            self._insert(BandPlanP25, [
+                BandPlanP25(site=sites[idx], **kwargs) for idx, kwargs in tree.bandplans_p25.items()
+            ])
+            self._insert(BandPlanMot, [
+                BandPlanMot(site=sites[idx], **kwargs) for idx, kwargs in tree.bandplans_mot.items()
+            ])
+            self._insert(TFreq, [TFreq(site=sites[idx], **kwargs) for idx, kwargs in tree.tfreqs])
+            tgroups = self._insert(TGroup, [
+                TGroup(trunk_system=trunk_systems[idx], **kwargs) for idx, kwargs in tree.tgroups
+            ])
+            self._insert(TGID, [TGID(tgroup=tgroups[idx], **kwargs) for idx, kwargs in tree.tgids])
+
+            parents = {'site': sites, 'tgroup': tgroups, 'cgroup': cgroups}
+            self._insert(Rectangle, [
+                Rectangle(**{parent_type: parents[parent_type][idx]}, **kwargs)
+                for parent_type, idx, kwargs in tree.rectangles
+            ])
+        bump_export_generation(favorites_list.pk)
+
+    def _insert(self, model, objs: list) -> list:
+        return insert_rows(model, objs, batch_size=self.batch_size)
 
     def _reset_state(self) -> None:
         self.current_conventional = None
@@ -155,43 +289,24 @@ class FavoritesHPDParser:
         self.unitid_order = 0
         self.avoid_tgid_order = 0
 
-    def _store_record(self, file_path: str, record_type: str, fields: list[str], line_number: int, raw_line: str) -> None:
+    def _store_record(self, record_type: str, fields: list[str], line_number: int, raw_line: str) -> None:
         trailing_empty = len(raw_line) - len(raw_line.rstrip('\t'))
-        spec_field_order, spec_field_map = build_spec_field_map(record_type, fields)
-        ScannerFileRecord.objects.using('favorites').create(
-            file_name=file_path.split('/')[-1],
-            file_path='favorites_lists/' + file_path.split('/')[-1],
-            record_type=record_type,
-            fields=fields,
-            spec_field_order=spec_field_order,
-            spec_field_map=spec_field_map,
-            trailing_empty_fields=trailing_empty,
-            line_number=line_number,
-        )
-
-    def _parse_conventional(self, fields: list[str], favorites_list: FavoritesList) -> None:
+        self.tree.records.append({
+            'record_type': record_type,
+            'fields': fields,
+            'trailing_empty_fields': trailing_empty,
+            'line_number': line_number,
+        })
+
+    def _parse_conventional(self, fields: list[str]) -> None:
         # Don't trim - keep field positions per spec
         if not fields:
             return
 
-        self.current_conventional = ConventionalSystem.objects.using('favorites').create(
-            favorites_list=favorites_list,
-            my_id=fields[0] if len(fields) > 0 else '',
-            parent_id=fields[1] if len(fields) > 1 else '',
-            name_tag=fields[2] if len(fields) > 2 else '',
-            avoid=fields[3] if len(fields) > 3 else 'Off',
-            reserve=fields[4] if len(fields) > 4 else '',
-            system_type=fields[5] if len(fields) > 5 else '',
-            quick_key=fields[6] if len(fields) > 6 else 'Off',
-            number_tag=fields[7] if len(fields) > 7 else 'Off',
-            system_hold_time=int(fields[8]) if len(fields) > 8 and fields[8].isdigit() else 0,
-            analog_agc=fields[9] if len(fields) > 9 else 'Off',
-            digital_agc=fields[10] if len(fields) > 10 else 'Off',
-            digital_waiting_time=int(fields[11]) if len(fields) > 11 and fields[11].isdigit() else 400,
-            digital_threshold_mode=fields[12] if len(fields) > 12 else 'Manual',
-            digital_threshold_level=int(fields[13]) if len(fields) > 13 and fields[13].isdigit() else 8,
-            order=self.conventional_order,
-        )
+        system = _CONVENTIONAL.decode(fields)
+        system['order'] = self.conventional_order
+        self.tree.conventional_systems.append(system)
+        self.current_conventional = len(self.tree.conventional_systems) - 1
         self.conventional_order += 1
         self.current_trunk = None
         self.current_site = None
@@ -201,36 +316,15 @@ class FavoritesHPDParser:
         self.cfreq_order = 0
         self.rectangle_order = 0
 
-    def _parse_trunk(self, fields: list[str], favorites_list: FavoritesList) -> None:
+    def _parse_trunk(self, fields: list[str]) -> None:
         # Don't trim - keep field positions per spec
         if not fields:
             return
 
-        self.current_trunk = TrunkSystem.objects.using('favorites').create(
-            favorites_list=favorites_list,
-            my_id=fields[0] if len(fields) > 0 else '',
-            parent_id=fields[1] if len(fields) > 1 else '',
-            name_tag=fields[2] if len(fields) > 2 else '',
-            avoid=fields[3] if len(fields) > 3 else 'Off',
-            reserve=fields[4] if len(fields) > 4 else '',
-            system_type=fields[5] if len(fields) > 5 else '',
-            id_search=fields[6] if len(fields) > 6 else 'Off',
-            alert_tone=fields[7] if len(fields) > 7 else 'Off',
-            alert_volume=fields[8] if len(fields) > 8 else 'Auto',
-            status_bit=fields[9] if len(fields) > 9 else 'Ignore',
-            nac=fields[10] if len(fields) > 10 else 'Srch',
-            quick_key=fields[11] if len(fields) > 11 else 'Off',
-            number_tag=fields[12] if len(fields) > 12 else 'Off',
-            site_hold_time=int(fields[13]) if len(fields) > 13 and fields[13].isdigit() else 0,
-            analog_agc=fields[14] if len(fields) > 14 else 'Off',
-            digital_agc=fields[15] if len(fields) > 15 else 'Off',
-            end_code=fields[16] if len(fields) > 16 else 'Analog',
-            priority_id_scan=fields[17] if len(fields) > 17 else 'Off',
-            alert_color=fields[18] if len(fields) > 18 else 'Off',
-            alert_pattern=fields[19] if len(fields) > 19 else 'On',
-            tgid_format=fields[20] if len(fields) > 20 else '',
-            order=self.trunk_order,
-        )
+        system = _TRUNK.decode(fields)
+        system['order'] = self.trunk_order
+        self.tree.trunk_systems.append(system)
+        self.current_trunk = len(self.tree.trunk_systems) - 1
         self.trunk_order += 1
         self.current_conventional = None
         self.current_site = None
@@ -252,105 +346,59 @@ class FavoritesHPDParser:
         my_id = fields[0] if len(fields) > 0 else ''
         flags = fields[1:] if len(fields) > 1 else []
 
-        if self.current_conventional:
-            self.current_conventional.dqks_my_id = my_id
-            self.current_conventional.dqks_status = flags
-            self.current_conventional.save(update_fields=['dqks_my_id', 'dqks_status'])
+        if self.current_conventional is not None:
+            system = self.tree.conventional_systems[self.current_conventional]
+            system['dqks_my_id'] = my_id
+            system['dqks_status'] = flags
             return
 
-        if self.current_trunk:
-            self.current_trunk.dqks_my_id = my_id
-            self.current_trunk.dqks_status = flags
-            self.current_trunk.save(update_fields=['dqks_my_id', 'dqks_status'])
+        if self.current_trunk is not None:
+            system = self.tree.trunk_systems[self.current_trunk]
+            system['dqks_my_id'] = my_id
+            system['dqks_status'] = flags
 
     def _parse_cgroup(self, fields: list[str]) -> None:
-        if not self.current_conventional:
+        if self.current_conventional is None:
             return
         if not fields:
             return
 
-        self.current_cgroup = CGroup.objects.using('favorites').create(
-            conventional_system=self.current_conventional,
-            my_id=fields[0] if len(fields) > 0 else '',
-            parent_id=fields[1] if len(fields) > 1 else '',
-            name_tag=fields[2] if len(fields) > 2 else '',
-            avoid=fields[3] if len(fields) > 3 else 'Off',
-            latitude=self._to_decimal(fields[4]) if len(fields) > 4 else None,
-            longitude=self._to_decimal(fields[5]) if len(fields) > 5 else None,
-            range_miles=self._to_decimal(fields[6]) if len(fields) > 6 else None,
-            location_type=fields[7] if len(fields) > 7 else 'Circle',
-            quick_key=fields[8] if len(fields) > 8 else 'Off',
-            filter=fields[9] if len(fields) > 9 else '',
-            order=self.cgroup_order,
-        )
+        cgroup = _CGROUP.decode(fields)
+        cgroup['order'] = self.cgroup_order
+        self.tree.cgroups.append((self.current_conventional, cgroup))
+        self.current_cgroup = len(self.tree.cgroups) - 1
         self.cgroup_order += 1
         self.cfreq_order = 0
         self.rectangle_order = 0
 
     def _parse_cfreq(self, fields: list[str]) -> None:
-        if not self.current_cgroup:
+        if self.current_cgroup is None:
             return
         if not fields:
             return
 
-        CFreq.objects.using('favorites').create(
-            cgroup=self.current_cgroup,
-            my_id=fields[0] if len(fields) > 0 else '',
-            parent_id=fields[1] if len(fields) > 1 else '',
-            name_tag=fields[2] if len(fields) > 2 else '',
-            avoid=fields[3] if len(fields) > 3 else 'Off',
-            frequency=int(fields[4]) if len(fields) > 4 and fields[4].isdigit() else 0,
-            modulation=fields[5] if len(fields) > 5 else 'AUTO',
-            audio_option=fields[6] if len(fields) > 6 else '',
-            func_tag_id=int(fields[7]) if len(fields) > 7 and fields[7].isdigit() else 21,  # 21 = Other (valid default)
-            attenuator=fields[8] if len(fields) > 8 else 'Off',
-            delay=int(fields[9]) if len(fields) > 9 and self._is_int(fields[9]) else 2,
-            volume_offset=int(fields[10]) if len(fields) > 10 and self._is_int(fields[10]) else 0,
-            alert_tone=fields[11] if len(fields) > 11 else 'Off',
-            alert_volume=fields[12] if len(fields) > 12 else 'Auto',
-            alert_color=fields[13] if len(fields) > 13 else 'Off',
-            alert_pattern=fields[14] if len(fields) > 14 else 'On',
-            number_tag=fields[15] if len(fields) > 15 else 'Off',
-            priority_channel=fields[16] if len(fields) > 16 else 'Off',
-            order=self.cfreq_order,
-        )
+        cfreq = _CFREQ.decode(fields)
+        cfreq['order'] = self.cfreq_order
+        self.tree.cfreqs.append((self.current_cgroup, cfreq))
         self.cfreq_order += 1
 
     def _parse_site(self, fields: list[str]) -> None:
-        if not self.current_trunk:
+        if self.current_trunk is None:
             return
         if not fields:
             return
 
-        self.current_site = Site.objects.using('favorites').create(
-            trunk_system=self.current_trunk,
-            my_id=fields[0] if len(fields) > 0 else '',
-            parent_id=fields[1] if len(fields) > 1 else '',
-            name_tag=fields[2] if len(fields) > 2 else '',
-            avoid=fields[3] if len(fields) > 3 else 'Off',
-            latitude=self._to_decimal(fields[4]) if len(fields) > 4 else None,
-            longitude=self._to_decimal(fields[5]) if len(fields) > 5 else None,
-            range_miles=self._to_decimal(fields[6]) if len(fields) > 6 else None,
-            modulation=fields[7] if len(fields) > 7 else 'AUTO',
-            mot_band_type=fields[8] if len(fields) > 8 else 'Standard',
-            edacs_band_type=fields[9] if len(fields) > 9 else 'Wide',
-            location_type=fields[10] if len(fields) > 10 else 'Circle',
-            attenuator=fields[11] if len(fields) > 11 else 'Off',
-            digital_waiting_time=int(fields[12]) if len(fields) > 12 and fields[12].isdigit() else 400,
-            digital_threshold_mode=fields[13] if len(fields) > 13 else 'Manual',
-            digital_threshold_level=int(fields[14]) if len(fields) > 14 and fields[14].isdigit() else 8,
-            quick_key=fields[15] if len(fields) > 15 else 'Off',
-            nac=fields[16] if len(fields) > 16 else 'Srch',
-            filter=fields[17] if len(fields) > 17 else '',
-            order=self.site_order,
-        )
+        site = _SITE.decode(fields)
+        site['order'] = self.site_order
+        self.tree.sites.append((self.current_trunk, site))
+        self.current_site = len(self.tree.sites) - 1
         self.site_order += 1
         self.current_tgroup = None
         self.tfreq_order = 0
         self.rectangle_order = 0
 
     def _parse_bandplan_p25(self, fields: list[str]) -> None:
-        if not self.current_site:
+        if self.current_site is None:
             return
         if not fields:
             return
@@ -367,13 +415,11 @@ class FavoritesHPDParser:
                 'spacing': int(spacing) if spacing.isdigit() else 0,
             }
 
-        BandPlanP25.objects.using('favorites').update_or_create(
-            site=self.current_site,
-            defaults={'band_plan': band_plan}
-        )
+        # One band plan per site; a repeated record replaces the earlier one
+        self.tree.bandplans_p25[self.current_site] = {'band_plan': band_plan}
 
     def _parse_bandplan_mot(self, fields: list[str]) -> None:
-        if not self.current_site:
+        if self.current_site is None:
             return
         if not fields:
             return
@@ -394,156 +440,98 @@ class FavoritesHPDParser:
                 'offset': int(offset) if self._is_int(offset) else 0,
             }
 
-        BandPlanMot.objects.using('favorites').update_or_create(
-            site=self.current_site,
-            defaults={'band_plan': band_plan}
-        )
+        # One band plan per site; a repeated record replaces the earlier one
+        self.tree.bandplans_mot[self.current_site] = {'band_plan': band_plan}
 
     def _parse_tfreq(self, fields: list[str]) -> None:
-        if not self.current_site:
+        if self.current_site is None:
             return
         if not fields:
             return
 
-        TFreq.objects.using('favorites').create(
-            site=self.current_site,
-            reserve_my_id=fields[0] if len(fields) > 0 else '',
-            parent_id=fields[1] if len(fields) > 1 else '',
-            reserve1=fields[2] if len(fields) > 2 else '',
-            reserve_avoid=fields[3] if len(fields) > 3 else 'Off',
-            frequency=int(fields[4]) if len(fields) > 4 and fields[4].isdigit() else 0,
-            lcn=int(fields[5]) if len(fields) > 5 and fields[5].isdigit() else 0,
-            color_code_ran_area=fields[6] if len(fields) > 6 else '',
-            order=self.tfreq_order,
-        )
+        tfreq = _TFREQ.decode(fields)
+        tfreq['order'] = self.tfreq_order
+        self.tree.tfreqs.append((self.current_site, tfreq))
         self.tfreq_order += 1
 
     def _parse_tgroup(self, fields: list[str]) -> None:
-        if not self.current_trunk:
+        if self.current_trunk is None:
             return
         if not fields:
             return
 
-        self.current_tgroup = TGroup.objects.using('favorites').create(
-            trunk_system=self.current_trunk,
-            my_id=fields[0] if len(fields) > 0 else '',
-            parent_id=fields[1] if len(fields) > 1 else '',
-            name_tag=fields[2] if len(fields) > 2 else '',
-            avoid=fields[3] if len(fields) > 3 else 'Off',
-            latitude=self._to_decimal(fields[4]) if len(fields) > 4 else None,
-            longitude=self._to_decimal(fields[5]) if len(fields) > 5 else None,
-            range_miles=self._to_decimal(fields[6]) if len(fields) > 6 else None,
-            location_type=fields[7] if len(fields) > 7 else 'Circle',
-            quick_key=fields[8] if len(fields) > 8 else 'Off',
-            order=self.tgroup_order,
-        )
+        tgroup = _TGROUP.decode(fields)
+        tgroup['order'] = self.tgroup_order
+        self.tree.tgroups.append((self.current_trunk, tgroup))
+        self.current_tgroup = len(self.tree.tgroups) - 1
+        self.current_site = None
         self.tgroup_order += 1
         self.tgid_order = 0
         self.rectangle_order = 0
 
     def _parse_tgid(self, fields: list[str]) -> None:
-        if not self.current_tgroup:
+        if self.current_tgroup is None:
             return
         if not fields:
             return
 
-        TGID.objects.using('favorites').create(
-            tgroup=self.current_tgroup,
-            my_id=fields[0] if len(fields) > 0 else '',
-            parent_id=fields[1] if len(fields) > 1 else '',
-            name_tag=fields[2] if len(fields) > 2 else '',
-            avoid=fields[3] if len(fields) > 3 else 'Off',
-            tgid=fields[4] if len(fields) > 4 else '',
-            audio_type=fields[5] if len(fields) > 5 else 'ALL',
-            func_tag_id=int(fields[6]) if len(fields) > 6 and fields[6].isdigit() else 21,  # 21 = Other (valid default)
-            delay=int(fields[7]) if len(fields) > 7 and self._is_int(fields[7]) else 2,
-            volume_offset=int(fields[8]) if len(fields) > 8 and self._is_int(fields[8]) else 0,
-            alert_tone=fields[9] if len(fields) > 9 else 'Off',
-            alert_volume=fields[10] if len(fields) > 10 else 'Auto',
-            alert_color=fields[11] if len(fields) > 11 else 'Off',
-            alert_pattern=fields[12] if len(fields) > 12 else 'On',
-            number_tag=fields[13] if len(fields) > 13 else 'Off',
-            priority_channel=fields[14] if len(fields) > 14 else 'Off',
-            tdma_slot=fields[15] if len(fields) > 15 else 'Any',
-            order=self.tgid_order,
-        )
+        tgid = _TGID.decode(fields)
+        tgid['order'] = self.tgid_order
+        self.tree.tgids.append((self.current_tgroup, tgid))
         self.tgid_order += 1
 
     def _parse_rectangle(self, fields: list[str]) -> None:
         if len(fields) < 5:
             return
 
-        rectangle_data = {
-            'my_id': fields[0],
-            'latitude1': self._to_decimal(fields[1]),
-            'longitude1': self._to_decimal(fields[2]),
-            'latitude2': self._to_decimal(fields[3]),
-            'longitude2': self._to_decimal(fields[4]),
-            'order': self.rectangle_order,
-        }
-
-        if self.current_site:
-            Rectangle.objects.using('favorites').create(site=self.current_site, **rectangle_data)
-            return
+        rectangle_data = _RECTANGLE.decode(fields)
+        rectangle_data['order'] = self.rectangle_order
 
-        if self.current_tgroup:
-            Rectangle.objects.using('favorites').create(tgroup=self.current_tgroup, **rectangle_data)
+        if self.current_site is not None:
+            self.tree.rectangles.append(('site', self.current_site, rectangle_data))
+        elif self.current_tgroup is not None:
+            self.tree.rectangles.append(('tgroup', self.current_tgroup, rectangle_data))
+        elif self.current_cgroup is not None:
+            self.tree.rectangles.append(('cgroup', self.current_cgroup, rectangle_data))
+        else:
             return
-
-        if self.current_cgroup:
-            Rectangle.objects.using('favorites').create(cgroup=self.current_cgroup, **rectangle_data)
-            self.rectangle_order += 1
+        self.rectangle_order += 1
 
     def _parse_fleetmap(self, fields: list[str]) -> None:
-        if not self.current_trunk:
+        if self.current_trunk is None:
             return
         if not fields:
             return
 
-        my_id = fields[0] if len(fields) > 0 else ''
-        blocks = fields[1:9] if len(fields) > 1 else []
-        FleetMap.objects.using('favorites').create(
-            trunk_system=self.current_trunk,
-            my_id=my_id,
-            blocks=blocks,
-            order=self.fleetmap_order,
-        )
+        fleet_map = _FLEETMAP.decode(fields)
+        fleet_map['order'] = self.fleetmap_order
+        self.tree.fleet_maps.append((self.current_trunk, fleet_map))
         self.fleetmap_order += 1
 
     def _parse_unitids(self, fields: list[str]) -> None:
-        if not self.current_trunk:
+        if self.current_trunk is None:
             return
         if len(fields) < 4:
             return
 
-        UnitId.objects.using('favorites').create(
-            trunk_system=self.current_trunk,
-            reserve1=fields[0] if len(fields) > 0 else '',
-            reserve2=fields[1] if len(fields) > 1 else '',
-            name_tag=fields[2] if len(fields) > 2 else '',
-            unit_id=int(fields[3]) if len(fields) > 3 and fields[3].isdigit() else 0,
-            alert_tone=fields[4] if len(fields) > 4 else 'Off',
-            alert_volume=fields[5] if len(fields) > 5 else 'Auto',
-            alert_color=fields[6] if len(fields) > 6 else 'Off',
-            alert_pattern=fields[7] if len(fields) > 7 else 'On',
-            order=self.unitid_order,
-        )
+        unit_id = _UNITIDS.decode(fields)
+        unit_id['order'] = self.unitid_order
+        self.tree.unit_ids.append((self.current_trunk, unit_id))
         self.unitid_order += 1
 
     def _parse_avoid_tgids(self, fields: list[str]) -> None:
-        if not self.current_trunk:
+        if self.current_trunk is None:
             return
         if not fields:
             return
 
         my_id = fields[0] if len(fields) > 0 else ''
         tgids = fields[1:] if len(fields) > 1 else []
-        AvoidTgid.objects.using('favorites').create(
-            trunk_system=self.current_trunk,
-            my_id=my_id,
-            tgids=tgids,
-            order=self.avoid_tgid_order,
-        )
+        self.tree.avoid_tgids.append((self.current_trunk, {
+            'my_id': my_id,
+            'tgids': tgids,
+            'order': self.avoid_tgid_order,
+        }))
         self.avoid_tgid_order += 1
 
     @staticmethod
@@ -552,13 +540,6 @@ class FavoritesHPDParser:
             items = items[1:]
         return items
 
-    @staticmethod
-    def _to_decimal(value: str):
-        try:
-            return float(value) if value != '' else None
-        except (ValueError, TypeError):
-            return None
-
     @staticmethod
     def _is_int(value: str) -> bool:
         try:
@@ -566,3 +547,71 @@ class FavoritesHPDParser:
             return True
         except (ValueError, TypeError):
             return False
+
+
+def insert_rows(model, objs: list, batch_size: Optional[int] = None, using: str = 'favorites') -> list:
+    """bulk_create that leaves every object with its primary key set.
+
+    Falls back to per-row saves when the SQLite build cannot return primary
+    keys from a bulk insert, so children can always point at these rows.
+    """
+    if not objs:
+        return objs
+    if connections[using].features.can_return_rows_from_bulk_insert:
+        return model.objects.using(using).bulk_create(objs, batch_size=batch_size)
+    for obj in objs:
+        obj.save(using=using, force_insert=True)
+    return objs
+
+
+def _parse_tree(file_path: str) -> ParsedFavoritesFile:
+    return FavoritesHPDParser().parse_tree(file_path)
+
+
+def parse_trees(
+    file_paths: Iterable[str], jobs: int = 1
+) -> Iterator[Tuple[str, Optional[ParsedFavoritesFile], Optional[Exception]]]:
+    """Parse favorites files, yielding (file_path, tree, error) in input order.
+
+    With jobs > 1 each file is parsed in a worker process while the caller
+    writes earlier trees; jobs=0 uses one worker per CPU. Writing stays with
+    the caller because SQLite allows a single writer. At most 2 * jobs files
+    are in flight, so parsed trees waiting for the writer do not pile up.
+    """
+    file_paths = [str(path) for path in file_paths]
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(file_paths))
+
+    if jobs <= 1:
+        for path in file_paths:
+            try:
+                yield path, _parse_tree(path), None
+            except Exception as exc:
+                yield path, None, exc
+        return
+
+    # Spawned workers start clean instead of inheriting the server's threads and
+    # connections; django.setup must run before this module is imported there.
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    ) as executor:
+        remaining = iter(file_paths)
+        pending = deque((path, executor.submit(_parse_tree, path)) for path in islice(remaining, 2 * jobs))
+        try:
+            while pending:
+                path, future = pending.popleft()
+                try:
+                    result = (path, future.result(), None)
+                except Exception as exc:
+                    result = (path, None, exc)
+                # Keep the workers busy while the caller writes this tree
+                for next_path in islice(remaining, 1):
+                    pending.append((next_path, executor.submit(_parse_tree, next_path)))
+                yield result
+        finally:
+            # Don't keep parsing files nobody will write if the caller stops early
+            for _, future in pending:
+                future.cancel()
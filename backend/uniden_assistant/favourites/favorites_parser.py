@@ -1,28 +1,44 @@
 """Parser for Favorites List files from favorites_lists folder"""
 import os
 import logging
-from .models import ScannerFileRecord
-from .record_parser.spec_field_maps import build_spec_field_map
+
+from django.db.models import F
+
+from .export_cache import bump_export_generation
+from .models import ImportedFile, ScannerFileRecord, ScannerRecordSource
+from .record_parser.decoders import DECODERS
+from .record_schemas import build_records, create_source
 
 logger = logging.getLogger(__name__)
 
+_F_LIST = DECODERS['F-List']
+
 
 class FavoritesListParser:
     """Parser for f_list.cfg file"""
     
     @staticmethod
     def parse_favorites_list(file_path: str):
-        """Parse f_list.cfg file"""
+        """Parse f_list.cfg file
+
+        Lists are matched to existing ones by filename and updated in place,
+        so lists whose entry did not change keep their imported systems.
+        Lists no longer named in the file are deleted.
+        """
         from .models import FavoritesList
-        import json
         
         logger.info(f"Parsing favorites list: {file_path}")
         
-        FavoritesList.objects.all().delete()  # Clear existing
+        existing = {}
+        for favorites_list in FavoritesList.objects.using('favorites').order_by('order', 'id'):
+            existing.setdefault(favorites_list.filename, favorites_list)
+        kept = set()
+        ScannerRecordSource.objects.using('favorites').filter(file_path='favorites_lists/f_list.cfg').delete()
 
         target_model = 'BCDx36HP'
         format_version = '1.00'
 
+        source = None
         records_buffer = []
         order = 0
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
@@ -33,21 +49,17 @@ class FavoritesListParser:
                     parts_all = raw_line.split('\t')
                     record_type = parts_all[0] if parts_all else ''
                     fields = parts_all[1:] if len(parts_all) > 1 else []
-                    spec_field_order, spec_field_map = build_spec_field_map(record_type, fields)
-
-                    records_buffer.append(ScannerFileRecord(
-                        file_name=os.path.basename(file_path),
-                        file_path='favorites_lists/f_list.cfg',
-                        record_type=record_type,
-                        fields=fields,
-                        spec_field_order=spec_field_order,
-                        spec_field_map=spec_field_map,
-                        trailing_empty_fields=trailing_empty,
-                        line_number=line_number,
-                    ))
+
+                    records_buffer.append({
+                        'record_type': record_type,
+                        'fields': fields,
+                        'trailing_empty_fields': trailing_empty,
+                        'line_number': line_number,
+                    })
 
                     if len(records_buffer) >= 2000:
-                        ScannerFileRecord.objects.bulk_create(records_buffer)
+                        source = source or create_source(os.path.basename(file_path), 'favorites_lists/f_list.cfg')
+                        ScannerFileRecord.objects.bulk_create(build_records(source, records_buffer))
                         records_buffer.clear()
 
                 line = raw_line.strip()
@@ -73,41 +85,41 @@ class FavoritesListParser:
                     continue
                 
                 try:
-                    user_name = parts[1].strip() if len(parts) > 1 else ''
-                    filename = parts[2].strip() if len(parts) > 2 else ''
-                    location_control = parts[3].strip() if len(parts) > 3 else 'Off'
-                    monitor = parts[4].strip() if len(parts) > 4 else 'Off'
-                    quick_key = parts[5].strip() if len(parts) > 5 else 'Off'
-                    number_tag = parts[6].strip() if len(parts) > 6 else 'Off'
-                    
-                    # StartupKey0-9 (10 fields at parts[7:17])
-                    startup_keys = [parts[i].strip() if len(parts) > i else 'Off' for i in range(7, 17)]
-                    
-                    # S-Qkey_00 to S-Qkey_99 (100 fields at parts[17:117])
-                    s_qkeys = [parts[i].strip() if len(parts) > i else 'Off' for i in range(17, 117)]
-                    
-                    FavoritesList.objects.using('favorites').create(
-                        user_name=user_name,
-                        filename=filename,
+                    # UserName .. NumberTag, StartupKey0-9 and S-Qkey_00-99
+                    f_list = _F_LIST.decode(parts[1:])
+                    values = dict(
                         scanner_model=target_model,
                         format_version=format_version,
-                        location_control=location_control,
-                        monitor=monitor,
-                        quick_key=quick_key,
-                        number_tag=number_tag,
                         order=order,
-                        startup_keys=startup_keys,
-                        s_qkeys=s_qkeys,
-                        raw_data=line
+                        raw_data=line,
+                        **f_list
                     )
                     
+                    favorites_list = existing.pop(f_list['filename'], None)
+                    if favorites_list is None:
+                        favorites_list = FavoritesList.objects.using('favorites').create(**values)
+                    else:
+                        changed = [name for name, value in values.items() if getattr(favorites_list, name) != value]
+                        if changed:
+                            for name in changed:
+                                setattr(favorites_list, name, values[name])
+                            favorites_list.save(update_fields=changed + ['updated_at'])
+                            bump_export_generation(favorites_list.pk)
+                            # The list's systems are untouched, so its f_*.hpd import still holds
+                            ImportedFile.objects.using('favorites').filter(
+                                favorites_list=favorites_list, export_generation=favorites_list.export_generation,
+                            ).update(export_generation=F('export_generation') + 1)
+                    kept.add(favorites_list.pk)
+                    
                     order += 1
-                    logger.debug(f"Created favorites list: {user_name} ({filename})")
+                    logger.debug(f"Created favorites list: {f_list['user_name']} ({f_list['filename']})")
                 
                 except (IndexError, ValueError) as e:
                     logger.warning(f"Error parsing favorites list: {parts} - {e}")
         
         if records_buffer:
-            ScannerFileRecord.objects.bulk_create(records_buffer)
+            source = source or create_source(os.path.basename(file_path), 'favorites_lists/f_list.cfg')
+            ScannerFileRecord.objects.bulk_create(build_records(source, records_buffer))
 
+        FavoritesList.objects.using('favorites').exclude(pk__in=kept).delete()
         logger.info(f"Parsed {order} favorites lists")
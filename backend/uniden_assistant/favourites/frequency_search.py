@@ -0,0 +1,106 @@
+"""Frequency lookups across every favourites list.
+
+C-Freq and T-Freq rows are indexed on (frequency, parent), so a range
+query is one index range scan per table and a nearest-neighbour query walks
+the index up and down from the target frequency; neither reads more rows
+than it returns. Each hit carries its list/system/group path.
+"""
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
+
+from .models import CFreq, TFreq
+
+KINDS = ('cfreq', 'tfreq')
+
+_CFREQ_FIELDS = {
+    'id': 'id',
+    'name_tag': 'name_tag',
+    'frequency': 'frequency',
+    'modulation': 'modulation',
+    'group_id': 'cgroup_id',
+    'group_name': 'cgroup__name_tag',
+    'system_id': 'cgroup__conventional_system_id',
+    'system_name': 'cgroup__conventional_system__name_tag',
+    'favorites_list_id': 'cgroup__conventional_system__favorites_list_id',
+    'favorites_list_name': 'cgroup__conventional_system__favorites_list__user_name',
+}
+
+_TFREQ_FIELDS = {
+    'id': 'id',
+    'frequency': 'frequency',
+    'lcn': 'lcn',
+    'site_id': 'site_id',
+    'site_name': 'site__name_tag',
+    'system_id': 'site__trunk_system_id',
+    'system_name': 'site__trunk_system__name_tag',
+    'favorites_list_id': 'site__trunk_system__favorites_list_id',
+    'favorites_list_name': 'site__trunk_system__favorites_list__user_name',
+}
+
+_SOURCES = {
+    'cfreq': (CFreq, _CFREQ_FIELDS),
+    'tfreq': (TFreq, _TFREQ_FIELDS),
+}
+
+
+# Parsed values stay far enough inside SQLite's 64-bit integers that frequency +/- tolerance still fits
+_MAX_HZ = 2 ** 62
+
+
+def _to_hz(value: str, scale: int, what: str) -> int:
+    try:
+        number = Decimal(str(value))
+        if not number.is_finite():
+            raise ValueError(f'Invalid {what}: {value}')
+        hz = int(number * scale)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f'Invalid {what}: {value}')
+    if abs(hz) >= _MAX_HZ:
+        raise ValueError(f'Invalid {what}: {value}')
+    return hz
+
+
+def mhz_to_hz(value: str) -> int:
+    """Parse a frequency in MHz (e.g. '460.125') to whole Hz; raises ValueError."""
+    return _to_hz(value, 1000000, 'frequency')
+
+
+def khz_to_hz(value: str) -> int:
+    """Parse an offset in kHz (e.g. '12.5') to whole Hz; raises ValueError."""
+    return _to_hz(value, 1000, 'tolerance')
+
+
+def _rows(kind: str, queryset) -> List[dict]:
+    _, fields = _SOURCES[kind]
+    return [
+        dict({'kind': kind}, **{name: row[path] for name, path in fields.items()})
+        for row in queryset.values(*fields.values())
+    ]
+
+
+def _queryset(kind: str, using: str):
+    model, _ = _SOURCES[kind]
+    return model.objects.using(using).order_by()
+
+
+def frequency_range(low: int, high: int, kinds=KINDS, limit: Optional[int] = None, using: str = 'favorites') -> List[dict]:
+    """Channels with low <= frequency <= high (Hz), lowest first."""
+    hits = []
+    for kind in kinds:
+        queryset = _queryset(kind, using).filter(frequency__gte=low, frequency__lte=high).order_by('frequency', 'id')
+        hits.extend(_rows(kind, queryset if limit is None else queryset[:limit]))
+    hits.sort(key=lambda hit: (hit['frequency'], hit['kind'], hit['id']))
+    return hits if limit is None else hits[:limit]
+
+
+def nearest_frequencies(frequency: int, count: int, kinds=KINDS, using: str = 'favorites') -> List[dict]:
+    """The `count` channels closest to `frequency` (Hz), closest first."""
+    hits = []
+    for kind in kinds:
+        queryset = _queryset(kind, using)
+        hits.extend(_rows(kind, queryset.filter(frequency__gte=frequency).order_by('frequency', 'id')[:count]))
+        hits.extend(_rows(kind, queryset.filter(frequency__lt=frequency).order_by('-frequency', 'id')[:count]))
+    for hit in hits:
+        hit['offset'] = hit['frequency'] - frequency
+    hits.sort(key=lambda hit: (abs(hit['offset']), hit['frequency'], hit['kind'], hit['id']))
+    return hits[:count]
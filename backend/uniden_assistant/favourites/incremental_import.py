@@ -0,0 +1,193 @@
+"""Incremental re-import of scanner files by content hash.
+
+Every imported file is recorded in ImportedFile with its size and SHA-256.
+On the next import a file whose size and digest match is skipped without
+being parsed, so a resync costs time in proportion to what changed rather
+than to the size of the SD card. A size mismatch is detected from stat()
+alone; files are only hashed when their size still matches or they are new.
+A changed f_*.hpd is applied to its list as a delta (see tree_diff.py).
+"""
+import hashlib
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from django.db import transaction
+
+from . import bulk_clear, shadow_db
+from .export_cache import ExportCache
+from .models import ConventionalSystem, FavoritesList, ImportedFile, ScannerRecordSource, TrunkSystem
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+FAVORITES_PREFIX = 'favorites_lists/'
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImportedFiles:
+    """Recorded hashes of the files imported under one SD card folder (e.g. 'HPDB/')."""
+
+    def __init__(self, prefix: str, using: str = 'favorites') -> None:
+        self.prefix = prefix
+        self.using = using
+        self._rows = {
+            row.file_path: row
+            for row in ImportedFile.objects.using(using).filter(file_path__startswith=prefix)
+        }
+        self._digests = {}
+
+    def get(self, name: str) -> Optional[ImportedFile]:
+        return self._rows.get(self.prefix + name)
+
+    def unchanged(self, name: str, path: Path) -> bool:
+        """True if `path` has the same size and digest as when `name` was last imported."""
+        row = self.get(name)
+        if row is None or row.file_size != path.stat().st_size:
+            return False
+        return row.digest == self._digest(path)
+
+    def mark(self, name: str, path: Path, **links) -> ImportedFile:
+        """Record `path` as imported; links are the favorites_list/raw_file it went into."""
+        row, _ = ImportedFile.objects.using(self.using).update_or_create(
+            file_path=self.prefix + name,
+            defaults={'file_size': path.stat().st_size, 'digest': self._digest(path), **links},
+        )
+        self._rows[row.file_path] = row
+        return row
+
+    def _digest(self, path: Path) -> str:
+        key = str(path)
+        if key not in self._digests:
+            self._digests[key] = file_digest(path)
+        return self._digests[key]
+
+
+def _clear_favorites_tree(favorites_list: FavoritesList, using: str = 'favorites') -> None:
+    """Remove what an earlier import of the list's f_*.hpd created."""
+    ConventionalSystem.objects.using(using).filter(favorites_list=favorites_list).delete()
+    TrunkSystem.objects.using(using).filter(favorites_list=favorites_list).delete()
+    ScannerRecordSource.objects.using(using).filter(file_path=FAVORITES_PREFIX + favorites_list.filename).delete()
+
+
+def _write_favorites_tree(parser, tree, favorites_list: FavoritesList, row: Optional[ImportedFile]) -> None:
+    """Apply a changed file as a delta while the list still holds exactly what was imported."""
+    from .tree_diff import TreeMismatch, apply_file_delta
+
+    if (
+        row is not None
+        and row.favorites_list_id == favorites_list.pk
+        and row.export_generation == favorites_list.export_generation
+    ):
+        try:
+            counts = apply_file_delta(favorites_list, tree)
+            logger.info(f"Applied {favorites_list.filename} as a delta: {counts}")
+            return
+        except TreeMismatch as exc:
+            logger.warning(f"Stored records of {favorites_list.filename} do not match its rows ({exc}); re-creating")
+    _clear_favorites_tree(favorites_list)
+    parser.write_tree(tree, favorites_list)
+
+
+def import_favorites_folder(
+    paths: Dict[str, Path],
+    replace: bool = False,
+    jobs: int = 1,
+    on_progress: Optional[Callable[[int, int, str], None]] = None,
+) -> dict:
+    """Import f_list.cfg and f_*.hpd files, skipping those already imported unchanged.
+
+    `paths` maps lower-case file names to uploaded files. With replace=True
+    every list is re-imported into a shadow database that is swapped in
+    once the import finishes (see shadow_db.py), so readers see the old
+    lists until then and they are kept if the import is stopped.
+    on_progress(processed, total, message) is called between files and may
+    raise to stop the import.
+    """
+    from .favorites_hpd_parser import FavoritesHPDParser, parse_trees
+    from .favorites_parser import FavoritesListParser
+
+    if replace:
+        with shadow_db.replacing(bulk_clear.kept_rows(bulk_clear.FAVORITES_LISTS_PLAN)):
+            result = import_favorites_folder(paths, jobs=jobs, on_progress=on_progress)
+        ExportCache().clear()
+        return result
+
+    on_progress = on_progress or (lambda processed, total, message: None)
+    imported_files = ImportedFiles(FAVORITES_PREFIX)
+    favorites_lists = FavoritesList.objects.using('favorites')
+
+    hpd_paths = {name: path for name, path in paths.items() if name.endswith('.hpd')}
+    lists_by_name = {favorites_list.filename.lower(): favorites_list for favorites_list in favorites_lists.all()}
+
+    # f_list.cfg is re-read when it changed, or when a list it names has been deleted since
+    flist_path = paths['f_list.cfg']
+    flist_parsed = False
+    if not imported_files.unchanged('f_list.cfg', flist_path) or not hpd_paths.keys() <= lists_by_name.keys():
+        on_progress(0, len(hpd_paths), 'Parsing f_list.cfg...')
+        FavoritesListParser.parse_favorites_list(str(flist_path))
+        imported_files.mark('f_list.cfg', flist_path)
+        flist_parsed = True
+        lists_by_name = {favorites_list.filename.lower(): favorites_list for favorites_list in favorites_lists.all()}
+
+    errors = []
+    skipped = []
+    changed = {}
+    for name, path in hpd_paths.items():
+        favorites_list = lists_by_name.get(name)
+        if favorites_list is None:
+            errors.append({'file': path.name, 'error': 'No matching F-List entry found'})
+            continue
+        row = imported_files.get(path.name)
+        if (
+            row is not None
+            and row.favorites_list_id == favorites_list.pk
+            and row.export_generation == favorites_list.export_generation
+            and imported_files.unchanged(path.name, path)
+        ):
+            skipped.append(path.name)
+            continue
+        changed[str(path)] = favorites_list
+
+    on_progress(len(skipped), len(hpd_paths), f'{len(skipped)} unchanged file(s) skipped, {len(changed)} to import')
+
+    # Changed files parse in worker processes; trees are written here one at a time
+    parser = FavoritesHPDParser()
+    imported = 0
+    for hpd_path, tree, error in parse_trees(changed, jobs=jobs):
+        hpd_path = Path(hpd_path)
+        favorites_list = changed[str(hpd_path)]
+        try:
+            if error is not None:
+                raise error
+            with transaction.atomic(using='favorites'):
+                _write_favorites_tree(parser, tree, favorites_list, imported_files.get(hpd_path.name))
+                favorites_list.refresh_from_db(fields=['export_generation'])
+                imported_files.mark(
+                    hpd_path.name, hpd_path,
+                    favorites_list=favorites_list, export_generation=favorites_list.export_generation,
+                )
+            imported += 1
+            message = f'✓ {hpd_path.name} imported'
+            logger.info(f"Successfully imported {hpd_path.name}")
+        except Exception as exc:
+            logger.exception(f"Error parsing {hpd_path.name}", exc_info=exc)
+            errors.append({'file': hpd_path.name, 'error': str(exc)})
+            message = f'✗ {hpd_path.name} failed: {exc}'
+        on_progress(len(skipped) + imported + len(errors), len(hpd_paths), message)
+
+    return {
+        'imported': imported,
+        'skipped': skipped,
+        'errors': errors,
+        'f_list_parsed': flist_parsed,
+        'total_favorites_lists': favorites_lists.count(),
+    }
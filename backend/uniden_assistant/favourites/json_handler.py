@@ -3,354 +3,274 @@ JSON export/import handler for Favourite Lists
 Supports exporting and importing complete Favourite Lists with Systems, Departments, and Channels
 Allows multiple lists to be exported/imported together
 """
+import io
 import json
 import re
-from typing import List, Dict, Any, Tuple
+from types import GeneratorType
+from typing import List, Dict, Any, Iterable, Iterator, TextIO, Tuple, Union
+from django.db import transaction
+from .export_cache import bump_export_generation
+from .export_data import FavoritesExportData
+from .favorites_hpd_parser import insert_rows
 from .models import (
     FavoritesList, ConventionalSystem, TrunkSystem, CGroup, CFreq, TGroup, TGID
 )
 
 
+class _StreamEncoder:
+    """json.dumps for documents whose arrays may be generators, encoded as they are consumed"""
+
+    def __init__(self, compact: bool = False):
+        self.indent = None if compact else 2
+        self.separators = (',', ':') if compact else (',', ': ')
+
+    def _newline(self, level: int) -> str:
+        return '' if self.indent is None else '\n' + ' ' * (self.indent * level)
+
+    def iter_encode(self, value, level: int = 0) -> Iterator[str]:
+        if isinstance(value, GeneratorType):
+            yield from self._iter_container('[', ']', (('', item) for item in value), level)
+        elif isinstance(value, dict) and any(isinstance(item, GeneratorType) for item in value.values()):
+            entries = ((json.dumps(key) + self.separators[1], item) for key, item in value.items())
+            yield from self._iter_container('{', '}', entries, level)
+        else:
+            text = json.dumps(value, indent=self.indent, separators=self.separators)
+            yield text.replace('\n', self._newline(level)) if self.indent else text
+
+    def _iter_container(self, opening: str, closing: str, entries, level: int) -> Iterator[str]:
+        empty = True
+        for prefix, item in entries:
+            yield (opening if empty else self.separators[0]) + self._newline(level + 1) + prefix
+            empty = False
+            yield from self.iter_encode(item, level + 1)
+        yield opening + closing if empty else self._newline(level) + closing
+
+
 class FavoritesListJSONHandler:
     """Handle JSON export and import for Favourite Lists"""
 
-    @staticmethod
-    def export_to_json(favorites_lists: List[FavoritesList]) -> str:
+    # Lists whose hierarchy is loaded together while streaming
+    STREAM_BATCH_SIZE = 25
+    # Text gathered before each chunk is yielded
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    @classmethod
+    def export_to_json(cls, favorites_lists: List[FavoritesList], compact: bool = False) -> str:
         """
         Export one or more Favourite Lists to JSON format
         Returns a JSON string with complete data structure
         """
-        data = {
+        return ''.join(cls.iter_json(favorites_lists, compact=compact))
+
+    @classmethod
+    def iter_json(cls, favorites_lists: Iterable[FavoritesList], compact: bool = False) -> Iterator[str]:
+        """
+        Yield the JSON export of the lists as text chunks of about STREAM_CHUNK_SIZE
+        Each list's systems and groups are encoded as they are reached, and the
+        hierarchy is loaded STREAM_BATCH_SIZE lists at a time, so memory holds
+        one batch rather than the whole document. The text is what
+        json.dumps(document, indent=2) would give; compact=True drops the whitespace.
+        """
+        document = {
             'version': '1.0',
             'format': 'uniden_favorites',
-            'favorites_lists': []
+            'favorites_lists': cls._iter_lists(list(favorites_lists)),
         }
+        pending = []
+        size = 0
+        for text in _StreamEncoder(compact).iter_encode(document):
+            pending.append(text)
+            size += len(text)
+            if size >= cls.STREAM_CHUNK_SIZE:
+                yield ''.join(pending)
+                pending = []
+                size = 0
+        if pending:
+            yield ''.join(pending)
+
+    @classmethod
+    def _iter_lists(cls, favorites_lists: List[FavoritesList]) -> Iterator[Dict[str, Any]]:
+        for start in range(0, len(favorites_lists), cls.STREAM_BATCH_SIZE):
+            batch = favorites_lists[start:start + cls.STREAM_BATCH_SIZE]
+            data = FavoritesExportData(batch)
+            for fav_list in batch:
+                yield {
+                    'id': str(fav_list.id),
+                    'user_name': fav_list.user_name,
+                    'filename': '',
+                    'scanner_model': fav_list.scanner_model,
+                    'format_version': fav_list.format_version,
+                    'location_control': fav_list.location_control,
+                    'monitor': fav_list.monitor,
+                    'quick_key': fav_list.quick_key,
+                    'number_tag': fav_list.number_tag,
+                    'conventional_systems': (
+                        cls._conventional_data(system, data) for system in data.conventional_systems_for(fav_list)
+                    ),
+                    'trunk_systems': (
+                        cls._trunk_data(system, data) for system in data.trunk_systems_for(fav_list)
+                    ),
+                }
 
-        for fav_list in favorites_lists:
-            fav_data = {
-                'id': str(fav_list.id),
-                'user_name': fav_list.user_name,
-                'filename': '',
-                'scanner_model': fav_list.scanner_model,
-                'format_version': fav_list.format_version,
-                'location_control': fav_list.location_control,
-                'monitor': fav_list.monitor,
-                'quick_key': fav_list.quick_key,
-                'number_tag': fav_list.number_tag,
-                'conventional_systems': [],
-                'trunk_systems': []
-            }
+    @staticmethod
+    def _location(group) -> Dict[str, Any]:
+        return {
+            'latitude': str(group.latitude) if group.latitude else None,
+            'longitude': str(group.longitude) if group.longitude else None,
+            'range_miles': str(group.range_miles) if group.range_miles else None,
+            'location_type': group.location_type,
+        }
 
-            # Export Conventional Systems
-            conventional = ConventionalSystem.objects.using('favorites').filter(
-                favorites_list=fav_list
-            ).order_by('order')
-
-            for conv_system in conventional:
-                conv_data = {
-                    'order': conv_system.order,
-                    'name_tag': conv_system.name_tag,
-                    'avoid': conv_system.avoid,
-                    'system_type': conv_system.system_type,
-                    'quick_key': conv_system.quick_key,
-                    'number_tag': conv_system.number_tag,
-                    'system_hold_time': conv_system.system_hold_time,
-                    'analog_agc': conv_system.analog_agc,
-                    'digital_agc': conv_system.digital_agc,
-                    'digital_waiting_time': conv_system.digital_waiting_time,
-                    'digital_threshold_mode': conv_system.digital_threshold_mode,
-                    'digital_threshold_level': conv_system.digital_threshold_level,
-                    'dqks_status': conv_system.dqks_status,
-                    'groups': []
-                }
+    @classmethod
+    def _conventional_data(cls, conv_system: ConventionalSystem, data: FavoritesExportData) -> Dict[str, Any]:
+        return {
+            'order': conv_system.order,
+            'name_tag': conv_system.name_tag,
+            'avoid': conv_system.avoid,
+            'system_type': conv_system.system_type,
+            'quick_key': conv_system.quick_key,
+            'number_tag': conv_system.number_tag,
+            'system_hold_time': conv_system.system_hold_time,
+            'analog_agc': conv_system.analog_agc,
+            'digital_agc': conv_system.digital_agc,
+            'digital_waiting_time': conv_system.digital_waiting_time,
+            'digital_threshold_mode': conv_system.digital_threshold_mode,
+            'digital_threshold_level': conv_system.digital_threshold_level,
+            'dqks_status': conv_system.dqks_status,
+            'groups': (cls._cgroup_data(group, data) for group in data.cgroups_for(conv_system)),
+        }
 
-                # Export groups (channels) for this conventional system
-                groups = CGroup.objects.using('favorites').filter(
-                    conventional_system=conv_system
-                ).order_by('order')
-
-                for group in groups:
-                    group_data = {
-                        'order': group.order,
-                        'name_tag': group.name_tag,
-                        'avoid': group.avoid,
-                        'latitude': str(group.latitude) if group.latitude else None,
-                        'longitude': str(group.longitude) if group.longitude else None,
-                        'range_miles': str(group.range_miles) if group.range_miles else None,
-                        'location_type': group.location_type,
-                        'quick_key': group.quick_key,
-                        'filter': group.filter,
-                        'channels': []
-                    }
-
-                    # Export channels
-                    channels = CFreq.objects.using('favorites').filter(
-                        cgroup=group
-                    ).order_by('order')
-
-                    for channel in channels:
-                        channel_data = {
-                            'order': channel.order,
-                            'name_tag': channel.name_tag,
-                            'avoid': channel.avoid,
-                            'frequency': channel.frequency,
-                            'modulation': channel.modulation,
-                            'audio_option': channel.audio_option,
-                            'func_tag_id': channel.func_tag_id,
-                            'attenuator': channel.attenuator,
-                            'delay': channel.delay,
-                            'volume_offset': channel.volume_offset,
-                            'alert_tone': channel.alert_tone,
-                            'alert_volume': channel.alert_volume,
-                            'alert_color': channel.alert_color,
-                            'alert_pattern': channel.alert_pattern,
-                            'number_tag': channel.number_tag,
-                            'priority_channel': channel.priority_channel,
-                        }
-                        group_data['channels'].append(channel_data)
-
-                    conv_data['groups'].append(group_data)
-
-                fav_data['conventional_systems'].append(conv_data)
-
-            # Export Trunk Systems
-            trunked = TrunkSystem.objects.using('favorites').filter(
-                favorites_list=fav_list
-            ).order_by('order')
-
-            for trunk_system in trunked:
-                trunk_data = {
-                    'order': trunk_system.order,
-                    'name_tag': trunk_system.name_tag,
-                    'system_type': trunk_system.system_type,
-                    'avoid': trunk_system.avoid,
-                    'reserve': trunk_system.reserve,
-                    'system_id_search': trunk_system.system_id_search,
-                    'quick_key': trunk_system.quick_key,
-                    'number_tag': trunk_system.number_tag,
-                    'dqks_status': trunk_system.dqks_status,
-                    'departments': []
+    @classmethod
+    def _cgroup_data(cls, group: CGroup, data: FavoritesExportData) -> Dict[str, Any]:
+        return {
+            'order': group.order,
+            'name_tag': group.name_tag,
+            'avoid': group.avoid,
+            **cls._location(group),
+            'quick_key': group.quick_key,
+            'filter': group.filter,
+            'channels': [
+                {
+                    'order': channel.order,
+                    'name_tag': channel.name_tag,
+                    'avoid': channel.avoid,
+                    'frequency': channel.frequency,
+                    'modulation': channel.modulation,
+                    'audio_option': channel.audio_option,
+                    'func_tag_id': channel.func_tag_id,
+                    'attenuator': channel.attenuator,
+                    'delay': channel.delay,
+                    'volume_offset': channel.volume_offset,
+                    'alert_tone': channel.alert_tone,
+                    'alert_volume': channel.alert_volume,
+                    'alert_color': channel.alert_color,
+                    'alert_pattern': channel.alert_pattern,
+                    'number_tag': channel.number_tag,
+                    'priority_channel': channel.priority_channel,
                 }
+                for channel in data.cfreqs_for(group)
+            ],
+        }
 
-                # Export departments for this trunk system
-                departments = CGroup.objects.using('favorites').filter(
-                    trunk_system=trunk_system
-                ).order_by('order')
-
-                for dept in departments:
-                    dept_data = {
-                        'order': dept.order,
-                        'name_tag': dept.name_tag,
-                        'avoid': dept.avoid,
-                        'latitude': str(dept.latitude) if dept.latitude else None,
-                        'longitude': str(dept.longitude) if dept.longitude else None,
-                        'range_miles': str(dept.range_miles) if dept.range_miles else None,
-                        'location_type': dept.location_type,
-                        'quick_key': dept.quick_key,
-                        'filter': dept.filter,
-                        'tgroups': []
-                    }
-
-                    # Export talk groups
-                    tgroups = TGroup.objects.using('favorites').filter(
-                        cgroup=dept
-                    ).order_by('order')
-
-                    for tgroup in tgroups:
-                        tgroup_data = {
-                            'order': tgroup.order,
-                            'name_tag': tgroup.name_tag,
-                            'avoid': tgroup.avoid,
-                            'quick_key': tgroup.quick_key,
-                            'tgids': []
-                        }
-
-                        # Export TGIDs
-                        tgids = TGID.objects.using('favorites').filter(
-                            tgroup=tgroup
-                        ).order_by('order')
-
-                        for tgid in tgids:
-                            tgid_data = {
-                                'order': tgid.order,
-                                'name_tag': tgid.name_tag,
-                                'avoid': tgid.avoid,
-                                'tgid': tgid.tgid,
-                                'quick_key': tgid.quick_key,
-                                'priority': tgid.priority,
-                            }
-                            tgroup_data['tgids'].append(tgid_data)
-
-                        dept_data['tgroups'].append(tgroup_data)
-
-                    trunk_data['departments'].append(dept_data)
-
-                fav_data['trunk_systems'].append(trunk_data)
-
-            data['favorites_lists'].append(fav_data)
-
-        return json.dumps(data, indent=2)
+    @classmethod
+    def _trunk_data(cls, trunk_system: TrunkSystem, data: FavoritesExportData) -> Dict[str, Any]:
+        return {
+            'order': trunk_system.order,
+            'name_tag': trunk_system.name_tag,
+            'system_type': trunk_system.system_type,
+            'avoid': trunk_system.avoid,
+            'reserve': trunk_system.reserve,
+            'id_search': trunk_system.id_search,
+            'alert_tone': trunk_system.alert_tone,
+            'alert_volume': trunk_system.alert_volume,
+            'status_bit': trunk_system.status_bit,
+            'nac': trunk_system.nac,
+            'quick_key': trunk_system.quick_key,
+            'number_tag': trunk_system.number_tag,
+            'site_hold_time': trunk_system.site_hold_time,
+            'analog_agc': trunk_system.analog_agc,
+            'digital_agc': trunk_system.digital_agc,
+            'end_code': trunk_system.end_code,
+            'priority_id_scan': trunk_system.priority_id_scan,
+            'alert_color': trunk_system.alert_color,
+            'alert_pattern': trunk_system.alert_pattern,
+            'tgid_format': trunk_system.tgid_format,
+            'dqks_status': trunk_system.dqks_status,
+            'tgroups': (cls._tgroup_data(tgroup, data) for tgroup in data.tgroups_for(trunk_system)),
+        }
 
-    @staticmethod
-    def import_from_json(json_content: str) -> Tuple[int, List[str]]:
+    @classmethod
+    def _tgroup_data(cls, tgroup: TGroup, data: FavoritesExportData) -> Dict[str, Any]:
+        return {
+            'order': tgroup.order,
+            'name_tag': tgroup.name_tag,
+            'avoid': tgroup.avoid,
+            **cls._location(tgroup),
+            'quick_key': tgroup.quick_key,
+            'tgids': [
+                {
+                    'order': tgid.order,
+                    'name_tag': tgid.name_tag,
+                    'avoid': tgid.avoid,
+                    'tgid': tgid.tgid,
+                    'audio_type': tgid.audio_type,
+                    'func_tag_id': tgid.func_tag_id,
+                    'delay': tgid.delay,
+                    'volume_offset': tgid.volume_offset,
+                    'alert_tone': tgid.alert_tone,
+                    'alert_volume': tgid.alert_volume,
+                    'alert_color': tgid.alert_color,
+                    'alert_pattern': tgid.alert_pattern,
+                    'number_tag': tgid.number_tag,
+                    'priority_channel': tgid.priority_channel,
+                    'tdma_slot': tgid.tdma_slot,
+                }
+                for tgid in data.tgids_for(tgroup)
+            ],
+        }
+
+    @classmethod
+    def import_from_json(cls, json_content: Union[str, TextIO]) -> Tuple[int, List[str]]:
         """
-        Import one or more Favourite Lists from JSON content
+        Import one or more Favourite Lists from JSON content (a string or a text stream)
+        Lists are decoded from the stream one at a time and their rows are written
+        level by level with bulk_create, all in one transaction: a list with bad
+        values is skipped and reported, any other error imports nothing.
         Returns: (count of imported lists, list of errors)
         """
         errors = []
         imported_count = 0
+        touched_list_ids = []
+        stream = io.StringIO(json_content) if isinstance(json_content, str) else json_content
 
         try:
-            data = json.loads(json_content)
+            with transaction.atomic(using='favorites'):
+                reader = _IncrementalReader(stream)
+                next_filename = cls._filename_generator()
+                found = False
+                if reader.peek() != '{':
+                    reader.value()
+                else:
+                    for key in reader.iter_keys():
+                        if key != 'favorites_lists':
+                            reader.value()
+                            continue
+                        found = True
+                        for fav_list_data in reader.iter_values():
+                            try:
+                                with transaction.atomic(using='favorites'):
+                                    fav_list = cls._import_list(fav_list_data, next_filename)
+                                touched_list_ids.append(fav_list.pk)
+                                imported_count += 1
+                            except (ValueError, KeyError) as e:
+                                errors.append(
+                                    f"Error importing '{fav_list_data.get('user_name', 'Unknown')}': {str(e)}"
+                                )
+                reader.end()
 
-            if not isinstance(data, dict) or 'favorites_lists' not in data:
+            if not found:
                 errors.append('Invalid JSON format: missing favorites_lists key')
                 return 0, errors
-
-            filename_pattern = re.compile(r'^f_(\d{6})\.hpd$', re.IGNORECASE)
-            existing_filenames = FavoritesList.objects.using('favorites').values_list('filename', flat=True)
-            used_numbers = set()
-            for filename in existing_filenames:
-                match = filename_pattern.match(filename or '')
-                if match:
-                    used_numbers.add(int(match.group(1)))
-            next_number = max(used_numbers or {0}) + 1
-
-            for fav_list_data in data.get('favorites_lists', []):
-                try:
-                    while next_number in used_numbers:
-                        next_number += 1
-                    generated_filename = f"f_{next_number:06d}.hpd"
-                    used_numbers.add(next_number)
-                    next_number += 1
-
-                    # Create or update the favorites list
-                    fav_list, _ = FavoritesList.objects.using('favorites').get_or_create(
-                        user_name=fav_list_data.get('user_name', 'Imported List'),
-                        defaults={
-                            'filename': generated_filename,
-                            'scanner_model': fav_list_data.get('scanner_model', 'BCDx36HP'),
-                            'format_version': fav_list_data.get('format_version', '1.00'),
-                            'location_control': fav_list_data.get('location_control', 'Off'),
-                            'monitor': fav_list_data.get('monitor', 'On'),
-                            'quick_key': fav_list_data.get('quick_key', 'Off'),
-                            'number_tag': fav_list_data.get('number_tag', 'Off'),
-                        }
-                    )
-
-                    # Import conventional systems
-                    for conv_idx, conv_data in enumerate(fav_list_data.get('conventional_systems', [])):
-                        conv_system = ConventionalSystem.objects.using('favorites').create(
-                            favorites_list=fav_list,
-                            order=conv_data.get('order', conv_idx),
-                            name_tag=conv_data.get('name_tag', ''),
-                            avoid=conv_data.get('avoid', 'Off'),
-                            system_type=conv_data.get('system_type', ''),
-                            quick_key=conv_data.get('quick_key', 'Off'),
-                            number_tag=conv_data.get('number_tag', 'Off'),
-                            system_hold_time=conv_data.get('system_hold_time', 0),
-                            analog_agc=conv_data.get('analog_agc', 'Off'),
-                            digital_agc=conv_data.get('digital_agc', 'Off'),
-                            digital_waiting_time=conv_data.get('digital_waiting_time', 400),
-                            digital_threshold_mode=conv_data.get('digital_threshold_mode', 'Manual'),
-                            digital_threshold_level=conv_data.get('digital_threshold_level', 8),
-                            dqks_status=conv_data.get('dqks_status', []),
-                        )
-
-                        # Import groups and channels
-                        for group_idx, group_data in enumerate(conv_data.get('groups', [])):
-                            group = CGroup.objects.using('favorites').create(
-                                conventional_system=conv_system,
-                                order=group_data.get('order', group_idx),
-                                name_tag=group_data.get('name_tag', ''),
-                                avoid=group_data.get('avoid', 'Off'),
-                                latitude=group_data.get('latitude'),
-                                longitude=group_data.get('longitude'),
-                                range_miles=group_data.get('range_miles'),
-                                location_type=group_data.get('location_type', 'Circle'),
-                                quick_key=group_data.get('quick_key', 'Off'),
-                                filter=group_data.get('filter', ''),
-                            )
-
-                            # Import channels
-                            for channel_idx, channel_data in enumerate(group_data.get('channels', [])):
-                                CFreq.objects.using('favorites').create(
-                                    cgroup=group,
-                                    order=channel_data.get('order', channel_idx),
-                                    name_tag=channel_data.get('name_tag', ''),
-                                    avoid=channel_data.get('avoid', 'Off'),
-                                    frequency=channel_data.get('frequency', 0),
-                                    modulation=channel_data.get('modulation', 'AUTO'),
-                                    audio_option=channel_data.get('audio_option', ''),
-                                    func_tag_id=channel_data.get('func_tag_id', 0),
-                                    attenuator=channel_data.get('attenuator', 'Off'),
-                                    delay=channel_data.get('delay', 2),
-                                    volume_offset=channel_data.get('volume_offset', 0),
-                                    alert_tone=channel_data.get('alert_tone', 'Off'),
-                                    alert_volume=channel_data.get('alert_volume', 'Auto'),
-                                    alert_color=channel_data.get('alert_color', 'Off'),
-                                    alert_pattern=channel_data.get('alert_pattern', 'On'),
-                                    number_tag=channel_data.get('number_tag', 'Off'),
-                                    priority_channel=channel_data.get('priority_channel', 'Off'),
-                                )
-
-                    # Import trunk systems
-                    for trunk_idx, trunk_data in enumerate(fav_list_data.get('trunk_systems', [])):
-                        trunk_system = TrunkSystem.objects.using('favorites').create(
-                            favorites_list=fav_list,
-                            order=trunk_data.get('order', trunk_idx),
-                            name_tag=trunk_data.get('name_tag', ''),
-                            system_type=trunk_data.get('system_type', 'P25Standard'),
-                            avoid=trunk_data.get('avoid', 'Off'),
-                            reserve=trunk_data.get('reserve', ''),
-                            system_id_search=trunk_data.get('system_id_search', 'Srch'),
-                            quick_key=trunk_data.get('quick_key', 'Off'),
-                            number_tag=trunk_data.get('number_tag', 'Off'),
-                            dqks_status=trunk_data.get('dqks_status', []),
-                        )
-
-                        # Import departments
-                        for dept_idx, dept_data in enumerate(trunk_data.get('departments', [])):
-                            dept = CGroup.objects.using('favorites').create(
-                                trunk_system=trunk_system,
-                                order=dept_data.get('order', dept_idx),
-                                name_tag=dept_data.get('name_tag', ''),
-                                avoid=dept_data.get('avoid', 'Off'),
-                                latitude=dept_data.get('latitude'),
-                                longitude=dept_data.get('longitude'),
-                                range_miles=dept_data.get('range_miles'),
-                                location_type=dept_data.get('location_type', 'Circle'),
-                                quick_key=dept_data.get('quick_key', 'Off'),
-                                filter=dept_data.get('filter', ''),
-                            )
-
-                            # Import talk groups
-                            for tgroup_idx, tgroup_data in enumerate(dept_data.get('tgroups', [])):
-                                tgroup = TGroup.objects.using('favorites').create(
-                                    cgroup=dept,
-                                    order=tgroup_data.get('order', tgroup_idx),
-                                    name_tag=tgroup_data.get('name_tag', ''),
-                                    avoid=tgroup_data.get('avoid', 'Off'),
-                                    quick_key=tgroup_data.get('quick_key', 'Off'),
-                                )
-
-                                # Import TGIDs
-                                for tgid_idx, tgid_data in enumerate(tgroup_data.get('tgids', [])):
-                                    TGID.objects.using('favorites').create(
-                                        tgroup=tgroup,
-                                        order=tgid_data.get('order', tgid_idx),
-                                        name_tag=tgid_data.get('name_tag', ''),
-                                        avoid=tgid_data.get('avoid', 'Off'),
-                                        tgid=tgid_data.get('tgid', 0),
-                                        quick_key=tgid_data.get('quick_key', 'Off'),
-                                        priority=tgid_data.get('priority', 'Any'),
-                                    )
-
-                    imported_count += 1
-
-                except (ValueError, KeyError) as e:
-                    errors.append(f"Error importing '{fav_list_data.get('user_name', 'Unknown')}': {str(e)}")
-
             return imported_count, errors
 
         except json.JSONDecodeError as e:
@@ -359,3 +279,263 @@ class FavoritesListJSONHandler:
         except Exception as e:
             errors.append(f"Import error: {str(e)}")
             return 0, errors
+        finally:
+            # Lists imported into, even partially, must not be served from the export cache
+            for favorites_list_id in touched_list_ids:
+                bump_export_generation(favorites_list_id)
+
+    @staticmethod
+    def _filename_generator() -> Iterator[str]:
+        """Unused f_NNNNNN.hpd names, in order"""
+        filename_pattern = re.compile(r'^f_(\d{6})\.hpd$', re.IGNORECASE)
+        existing_filenames = FavoritesList.objects.using('favorites').values_list('filename', flat=True)
+        used_numbers = set()
+        for filename in existing_filenames:
+            match = filename_pattern.match(filename or '')
+            if match:
+                used_numbers.add(int(match.group(1)))
+        next_number = max(used_numbers or {0}) + 1
+        while True:
+            while next_number in used_numbers:
+                next_number += 1
+            yield f"f_{next_number:06d}.hpd"
+            next_number += 1
+
+    @classmethod
+    def _import_list(cls, fav_list_data: Dict[str, Any], next_filename: Iterator[str]) -> FavoritesList:
+        """Create or extend one list; each level is one bulk_create whose returned ids the next level uses"""
+        fav_list, _ = FavoritesList.objects.using('favorites').get_or_create(
+            user_name=fav_list_data.get('user_name', 'Imported List'),
+            defaults={
+                'filename': next(next_filename),
+                'scanner_model': fav_list_data.get('scanner_model', 'BCDx36HP'),
+                'format_version': fav_list_data.get('format_version', '1.00'),
+                'location_control': fav_list_data.get('location_control', 'Off'),
+                'monitor': fav_list_data.get('monitor', 'On'),
+                'quick_key': fav_list_data.get('quick_key', 'Off'),
+                'number_tag': fav_list_data.get('number_tag', 'Off'),
+            }
+        )
+
+        lists = [(fav_list, fav_list_data)]
+        conv_systems = cls._create(
+            ConventionalSystem, CONVENTIONAL_DEFAULTS, lists, 'favorites_list', 'conventional_systems',
+        )
+        groups = cls._create(CGroup, CGROUP_DEFAULTS, conv_systems, 'conventional_system', 'groups')
+        cls._create(CFreq, CFREQ_DEFAULTS, groups, 'cgroup', 'channels')
+
+        trunk_systems = cls._create(TrunkSystem, TRUNK_DEFAULTS, lists, 'favorites_list', 'trunk_systems')
+        tgroups = cls._create(TGroup, TGROUP_DEFAULTS, trunk_systems, 'trunk_system', 'tgroups')
+        cls._create(TGID, TGID_DEFAULTS, tgroups, 'tgroup', 'tgids')
+        return fav_list
+
+    @staticmethod
+    def _create(model, defaults: Dict[str, Any], parents, parent_field: str, children_key: str):
+        """
+        bulk_create the children listed under children_key of every (parent, parent data)
+        Returns the new (object, data) pairs, with ids set, as the parents of the next level
+        """
+        objects = []
+        for parent_obj, parent_data in parents:
+            for idx, item in enumerate(parent_data.get(children_key) or []):
+                fields = {name: item.get(name, default) for name, default in defaults.items()}
+                obj = model(**{parent_field: parent_obj}, order=item.get('order', idx), **fields)
+                objects.append((obj, item))
+        insert_rows(model, [obj for obj, _ in objects])
+        return objects
+
+
+_NUMBER_START = '-0123456789'
+_NUMBER = re.compile(r'[-+0-9.eE]*')
+
+
+class _IncrementalReader:
+    """Decode a JSON document from a text stream one value at a time
+
+    Values are decoded with JSONDecoder.raw_decode from a buffer that holds
+    the unread part of the stream, so memory is bounded by the largest value
+    read with value() rather than by the document. Arrays and objects can be
+    walked with iter_values()/iter_keys() without decoding them whole.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        """Drop the consumed text and read up to size more characters; False at the end of the stream"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self) -> str:
+        """The next non-whitespace character, or '' at the end of the stream"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\n\r':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill(self.CHUNK_SIZE):
+                return ''
+
+    def _expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self._error(f'Expecting {char!r}')
+        self.pos += 1
+
+    def value(self) -> Any:
+        if self.peek() in _NUMBER_START:
+            # A number is only complete once the character after it has been read
+            while _NUMBER.match(self.buffer, self.pos).end() == len(self.buffer) and self._fill(self.CHUNK_SIZE):
+                pass
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Incomplete value: read as much again as is buffered, so a large value is re-scanned O(log n) times
+                if self._fill(max(self.CHUNK_SIZE, len(self.buffer))):
+                    continue
+                raise
+            self.pos = end
+            return value
+
+    def iter_values(self) -> Iterator[Any]:
+        """Decode the elements of an array one by one"""
+        self._expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() != ',':
+                break
+            self.pos += 1
+        self._expect(']')
+
+    def iter_keys(self) -> Iterator[str]:
+        """Yield the keys of an object; the caller reads each key's value before asking for the next"""
+        self._expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error('Expecting property name enclosed in double quotes')
+            key = self.value()
+            self._expect(':')
+            yield key
+            if self.peek() != ',':
+                break
+            self.pos += 1
+        self._expect('}')
+
+    def end(self) -> None:
+        if self.peek() != '':
+            raise self._error('Extra data')
+
+
+CONVENTIONAL_DEFAULTS = {
+    'name_tag': '',
+    'avoid': 'Off',
+    'system_type': '',
+    'quick_key': 'Off',
+    'number_tag': 'Off',
+    'system_hold_time': 0,
+    'analog_agc': 'Off',
+    'digital_agc': 'Off',
+    'digital_waiting_time': 400,
+    'digital_threshold_mode': 'Manual',
+    'digital_threshold_level': 8,
+    'dqks_status': [],
+}
+
+CGROUP_DEFAULTS = {
+    'name_tag': '',
+    'avoid': 'Off',
+    'latitude': None,
+    'longitude': None,
+    'range_miles': None,
+    'location_type': 'Circle',
+    'quick_key': 'Off',
+    'filter': '',
+}
+
+CFREQ_DEFAULTS = {
+    'name_tag': '',
+    'avoid': 'Off',
+    'frequency': 0,
+    'modulation': 'AUTO',
+    'audio_option': '',
+    'func_tag_id': 0,
+    'attenuator': 'Off',
+    'delay': 2,
+    'volume_offset': 0,
+    'alert_tone': 'Off',
+    'alert_volume': 'Auto',
+    'alert_color': 'Off',
+    'alert_pattern': 'On',
+    'number_tag': 'Off',
+    'priority_channel': 'Off',
+}
+
+TRUNK_DEFAULTS = {
+    'name_tag': '',
+    'system_type': 'P25Standard',
+    'avoid': 'Off',
+    'reserve': '',
+    'id_search': 'Off',
+    'alert_tone': 'Off',
+    'alert_volume': 'Auto',
+    'status_bit': 'Ignore',
+    'nac': 'Srch',
+    'quick_key': 'Off',
+    'number_tag': 'Off',
+    'site_hold_time': 0,
+    'analog_agc': 'Off',
+    'digital_agc': 'Off',
+    'end_code': 'Analog',
+    'priority_id_scan': 'Off',
+    'alert_color': 'Off',
+    'alert_pattern': 'On',
+    'tgid_format': '',
+    'dqks_status': [],
+}
+
+TGROUP_DEFAULTS = {
+    'name_tag': '',
+    'avoid': 'Off',
+    'latitude': None,
+    'longitude': None,
+    'range_miles': None,
+    'location_type': 'Circle',
+    'quick_key': 'Off',
+}
+
+TGID_DEFAULTS = {
+    'name_tag': '',
+    'avoid': 'Off',
+    'tgid': '0',
+    'audio_type': 'ALL',
+    'func_tag_id': 0,
+    'delay': 2,
+    'volume_offset': 0,
+    'alert_tone': 'Off',
+    'alert_volume': 'Auto',
+    'alert_color': 'Off',
+    'alert_pattern': 'On',
+    'number_tag': 'Off',
+    'priority_channel': 'Off',
+    'tdma_slot': 'Any',
+}
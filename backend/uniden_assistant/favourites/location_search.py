@@ -0,0 +1,121 @@
+"""Which location-controlled groups and sites cover a GPS position.
+
+The favourites_location_index R-tree holds the bounding box of every
+C-Group, T-Group and Site range circle plus every Rectangle; SQLite
+triggers keep it in step with inserts, edits and deletes (see migration
+0008). A lookup reads the boxes containing the point from the R-tree, then
+checks only those candidates exactly: the great-circle distance for
+`Circle` entries and the rectangle bounds for `Rectangles` entries, as the
+scanner's location control does.
+"""
+import math
+from collections import defaultdict
+from typing import List
+
+from django.db import connections
+
+from .models import CGroup, Rectangle, Site, TGroup
+
+LOCATION_INDEX = 'favourites_location_index'
+EARTH_RADIUS_MILES = 3958.8
+KINDS = ('cgroup', 'tgroup', 'site')
+RECTANGLE_CODE = 3
+
+_FIELDS = ['id', 'name_tag', 'avoid', 'latitude', 'longitude', 'range_miles', 'location_type']
+_SYSTEM_FIELDS = {
+    'cgroup': ('conventional_system', 'conventional_system__favorites_list'),
+    'tgroup': ('trunk_system', 'trunk_system__favorites_list'),
+    'site': ('trunk_system', 'trunk_system__favorites_list'),
+}
+_SOURCES = {
+    'cgroup': (0, CGroup),
+    'tgroup': (1, TGroup),
+    'site': (2, Site),
+}
+_KIND_BY_CODE = {code: kind for kind, (code, _) in _SOURCES.items()}
+
+
+def distance_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance between two points in miles."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _candidates(latitude: float, longitude: float, using: str) -> List[int]:
+    # Circle boxes are not wrapped at +/-180, so also probe the point one turn either side
+    box = f'SELECT id FROM {LOCATION_INDEX} WHERE min_lat <= %s AND max_lat >= %s AND min_lon <= %s AND max_lon >= %s'
+    params = []
+    for turn in (0, 360, -360):
+        params += [latitude, latitude, longitude + turn, longitude + turn]
+    with connections[using].cursor() as cursor:
+        cursor.execute(' UNION '.join([box] * 3), params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _inside(rectangle: dict, latitude: float, longitude: float) -> bool:
+    lat1, lat2 = sorted((float(rectangle['latitude1']), float(rectangle['latitude2'])))
+    lon1, lon2 = sorted((float(rectangle['longitude1']), float(rectangle['longitude2'])))
+    return lat1 <= latitude <= lat2 and lon1 <= longitude <= lon2
+
+
+def _rows(kind: str, pks, using: str) -> List[dict]:
+    _, model = _SOURCES[kind]
+    system, favorites_list = _SYSTEM_FIELDS[kind]
+    fields = _FIELDS + [f'{system}_id', f'{system}__name_tag', f'{favorites_list}_id', f'{favorites_list}__user_name']
+    rows = []
+    for row in model.objects.using(using).filter(pk__in=pks).values(*fields):
+        rows.append({
+            'kind': kind,
+            'id': row['id'],
+            'name_tag': row['name_tag'],
+            'avoid': row['avoid'],
+            'location_type': row['location_type'],
+            'latitude': row['latitude'],
+            'longitude': row['longitude'],
+            'range_miles': row['range_miles'],
+            'system_id': row[f'{system}_id'],
+            'system_name': row[f'{system}__name_tag'],
+            'favorites_list_id': row[f'{favorites_list}_id'],
+            'favorites_list_name': row[f'{favorites_list}__user_name'],
+        })
+    return rows
+
+
+def active_at(latitude: float, longitude: float, kinds=KINDS, using: str = 'favorites') -> List[dict]:
+    """Groups and sites whose location covers (latitude, longitude), nearest centre first."""
+    circles, rectangles = defaultdict(set), []
+    for index_id in _candidates(latitude, longitude, using):
+        pk, code = divmod(index_id, 4)
+        if code == RECTANGLE_CODE:
+            rectangles.append(pk)
+        elif _KIND_BY_CODE[code] in kinds:
+            circles[_KIND_BY_CODE[code]].add(pk)
+
+    by_rectangle = defaultdict(set)
+    if rectangles:
+        values = Rectangle.objects.using(using).filter(pk__in=rectangles).values(
+            'cgroup_id', 'tgroup_id', 'site_id', 'latitude1', 'longitude1', 'latitude2', 'longitude2',
+        )
+        for rectangle in values:
+            if not _inside(rectangle, latitude, longitude):
+                continue
+            for kind in kinds:
+                if rectangle[f'{kind}_id'] is not None:
+                    by_rectangle[kind].add(rectangle[f'{kind}_id'])
+
+    hits = []
+    for kind in kinds:
+        for row in _rows(kind, circles[kind] | by_rectangle[kind], using):
+            distance = None
+            if row['latitude'] is not None and row['longitude'] is not None:
+                distance = distance_miles(latitude, longitude, float(row['latitude']), float(row['longitude']))
+            if row['location_type'] == 'Rectangles':
+                covered = row['id'] in by_rectangle[kind]
+            else:
+                covered = row['id'] in circles[kind] and distance <= float(row['range_miles'])
+            if covered:
+                row['distance_miles'] = None if distance is None else round(distance, 3)
+                hits.append(row)
+    hits.sort(key=lambda hit: (hit['distance_miles'] is None, hit['distance_miles'] or 0, hit['kind'], hit['id']))
+    return hits
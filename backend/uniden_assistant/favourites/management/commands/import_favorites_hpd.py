@@ -6,7 +6,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 
 from uniden_assistant.favourites.models import FavoritesList
-from uniden_assistant.favourites.favorites_hpd_parser import FavoritesHPDParser
+from uniden_assistant.favourites.favorites_hpd_parser import FavoritesHPDParser, parse_trees
 
 
 class Command(BaseCommand):
@@ -18,6 +18,12 @@ class Command(BaseCommand):
             default=settings.UNIDEN_DATA_DIR,
             help="Path to data directory",
         )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=settings.FAVORITES_IMPORT_JOBS,
+            help="Worker processes used to parse files (0 = one per CPU)",
+        )
 
     def handle(self, *args, **options):
         data_dir = Path(options["data_dir"]).expanduser().resolve()
@@ -33,11 +39,11 @@ class Command(BaseCommand):
             return
 
         parser = FavoritesHPDParser()
-        imported = 0
+        favorites_lists = {}
 
         for hpd_file in hpd_files:
             filename = hpd_file.name
-            favorites_list, _ = FavoritesList.objects.get_or_create(
+            favorites_lists[str(hpd_file)], _ = FavoritesList.objects.get_or_create(
                 filename=filename,
                 defaults={
                     "user_name": filename,
@@ -50,10 +56,14 @@ class Command(BaseCommand):
                 },
             )
 
+        imported = 0
+        for hpd_path, tree, error in parse_trees(hpd_files, jobs=options["jobs"]):
             try:
-                parser.parse_file(str(hpd_file), favorites_list)
+                if error is not None:
+                    raise error
+                parser.write_tree(tree, favorites_lists[hpd_path])
                 imported += 1
             except Exception as exc:
-                self.stderr.write(self.style.WARNING(f"Failed to import {hpd_file}: {exc}"))
+                self.stderr.write(self.style.WARNING(f"Failed to import {hpd_path}: {exc}"))
 
         self.stdout.write(self.style.SUCCESS(f"Imported {imported} favorites file(s)."))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favourites', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favoriteslist',
+            name='export_generation',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
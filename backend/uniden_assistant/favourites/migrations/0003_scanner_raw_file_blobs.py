@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-18 12:42
+
+from django.db import migrations, models
+
+from uniden_assistant.favourites import raw_storage
+
+
+def pack_raw_lines(apps, schema_editor):
+    """Fold the per-line rows of each raw file into its compressed blob."""
+    ScannerRawFile = apps.get_model('favourites', 'ScannerRawFile')
+    ScannerRawLine = apps.get_model('favourites', 'ScannerRawLine')
+    alias = schema_editor.connection.alias
+    for raw_file in ScannerRawFile.objects.using(alias).iterator():
+        lines = ScannerRawLine.objects.using(alias).filter(raw_file_id=raw_file.pk).order_by('line_number')
+        data = ''.join(lines.values_list('content', flat=True).iterator()).encode('utf-8')
+        ScannerRawFile.objects.using(alias).filter(pk=raw_file.pk).update(**raw_storage.pack(data))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favourites', '0002_favoriteslist_export_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scannerrawfile',
+            name='block_index',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='scannerrawfile',
+            name='content',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='scannerrawfile',
+            name='line_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scannerrawfile',
+            name='line_index',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(pack_raw_lines, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='ScannerRawLine',
+        ),
+    ]
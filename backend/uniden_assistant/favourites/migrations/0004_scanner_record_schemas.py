@@ -0,0 +1,147 @@
+# Generated by Django 4.2 on 2026-10-18 12:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def intern_record_schemas(apps, schema_editor):
+    """Move file and spec field names off every record onto shared sources and schemas."""
+    ScannerFileRecord = apps.get_model('favourites', 'ScannerFileRecord')
+    ScannerRecordSchema = apps.get_model('favourites', 'ScannerRecordSchema')
+    ScannerRecordSource = apps.get_model('favourites', 'ScannerRecordSource')
+    alias = schema_editor.connection.alias
+    source_ids = {}
+    schema_ids = {}
+    batch = []
+    records = ScannerFileRecord.objects.using(alias).order_by('id').only(
+        'id', 'file_name', 'file_path', 'record_type', 'fields', 'spec_field_order', 'created_at'
+    )
+    for record in records.iterator(chunk_size=2000):
+        source_key = (record.file_name, record.file_path)
+        if source_key not in source_ids:
+            source = ScannerRecordSource.objects.using(alias).create(file_name=record.file_name, file_path=record.file_path)
+            ScannerRecordSource.objects.using(alias).filter(pk=source.pk).update(created_at=record.created_at)
+            source_ids[source_key] = source.pk
+
+        fields = record.fields or []
+        schema_key = (record.record_type, len(fields), '\t'.join(record.spec_field_order or []))
+        if schema_key not in schema_ids:
+            schema_ids[schema_key] = ScannerRecordSchema.objects.using(alias).get_or_create(
+                record_type=schema_key[0], field_count=schema_key[1], field_names=schema_key[2]
+            )[0].pk
+
+        record.source_id = source_ids[source_key]
+        record.schema_id = schema_ids[schema_key]
+        record.values = '\t'.join(fields)
+        batch.append(record)
+        if len(batch) >= 2000:
+            ScannerFileRecord.objects.using(alias).bulk_update(batch, ['source', 'schema', 'values'])
+            batch.clear()
+    if batch:
+        ScannerFileRecord.objects.using(alias).bulk_update(batch, ['source', 'schema', 'values'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favourites', '0003_scanner_raw_file_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScannerRecordSchema',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_type', models.CharField(max_length=100)),
+                ('field_count', models.IntegerField()),
+                ('field_names', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='scannerrecordschema',
+            constraint=models.UniqueConstraint(fields=('record_type', 'field_count', 'field_names'), name='unique_scanner_record_schema'),
+        ),
+        migrations.CreateModel(
+            name='ScannerRecordSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255)),
+                ('file_path', models.CharField(max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['file_path', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='scannerfilerecord',
+            name='values',
+            field=models.TextField(blank=True, default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='scannerfilerecord',
+            name='schema',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='records', to='favourites.scannerrecordschema'),
+        ),
+        migrations.AddField(
+            model_name='scannerfilerecord',
+            name='source',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='records', to='favourites.scannerrecordsource'),
+        ),
+        migrations.RunPython(intern_record_schemas, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='scannerfilerecord',
+            name='schema',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='records', to='favourites.scannerrecordschema'),
+        ),
+        migrations.AlterField(
+            model_name='scannerfilerecord',
+            name='source',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='records', to='favourites.scannerrecordsource'),
+        ),
+        migrations.RemoveIndex(
+            model_name='scannerfilerecord',
+            name='favourites__file_pa_ef1a78_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='scannerfilerecord',
+            name='favourites__record__071faa_idx',
+        ),
+        migrations.RemoveField(
+            model_name='scannerfilerecord',
+            name='created_at',
+        ),
+        migrations.RemoveField(
+            model_name='scannerfilerecord',
+            name='fields',
+        ),
+        migrations.RemoveField(
+            model_name='scannerfilerecord',
+            name='file_name',
+        ),
+        migrations.RemoveField(
+            model_name='scannerfilerecord',
+            name='file_path',
+        ),
+        migrations.RemoveField(
+            model_name='scannerfilerecord',
+            name='record_type',
+        ),
+        migrations.RemoveField(
+            model_name='scannerfilerecord',
+            name='spec_field_map',
+        ),
+        migrations.RemoveField(
+            model_name='scannerfilerecord',
+            name='spec_field_order',
+        ),
+        migrations.AlterModelOptions(
+            name='scannerfilerecord',
+            options={'ordering': ['source', 'line_number']},
+        ),
+        migrations.AddIndex(
+            model_name='scannerfilerecord',
+            index=models.Index(fields=['source', 'line_number'], name='favourites__source__0f53c8_idx'),
+        ),
+    ]
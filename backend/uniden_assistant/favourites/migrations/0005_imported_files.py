@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-18 12:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favourites', '0004_scanner_record_schemas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=500, unique=True)),
+                ('file_size', models.BigIntegerField()),
+                ('digest', models.CharField(max_length=64)),
+                ('export_generation', models.PositiveIntegerField(blank=True, null=True)),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+                ('favorites_list', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='imported_files', to='favourites.favoriteslist')),
+                ('raw_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='imported_files', to='favourites.scannerrawfile')),
+            ],
+            options={
+                'ordering': ['file_path'],
+            },
+        ),
+    ]
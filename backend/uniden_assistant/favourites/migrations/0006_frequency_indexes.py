@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favourites', '0005_imported_files'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cfreq',
+            index=models.Index(fields=['frequency', 'cgroup'], name='cfreq_frequency_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tfreq',
+            index=models.Index(fields=['frequency', 'site'], name='tfreq_frequency_idx'),
+        ),
+    ]
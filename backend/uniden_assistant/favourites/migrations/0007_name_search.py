@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# (kind code, table, name column); the index rowid is row id * 8 + kind code
+NAME_SOURCES = [
+    (0, 'favourites_favoriteslist', 'user_name'),
+    (1, 'favourites_conventionalsystem', 'name_tag'),
+    (2, 'favourites_trunksystem', 'name_tag'),
+    (3, 'favourites_cgroup', 'name_tag'),
+    (4, 'favourites_tgroup', 'name_tag'),
+    (5, 'favourites_site', 'name_tag'),
+    (6, 'favourites_cfreq', 'name_tag'),
+    (7, 'favourites_tgid', 'name_tag'),
+]
+
+
+def forward_sql():
+    statements = [
+        "CREATE VIRTUAL TABLE favourites_name_search USING fts5("
+        "name, tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')"
+    ]
+    for code, table, column in NAME_SOURCES:
+        statements += [
+            f"CREATE TRIGGER {table}_name_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO favourites_name_search(rowid, name) VALUES (new.id * 8 + {code}, new.{column}); END",
+            f"CREATE TRIGGER {table}_name_au AFTER UPDATE OF {column} ON {table} BEGIN "
+            f"UPDATE favourites_name_search SET name = new.{column} WHERE rowid = old.id * 8 + {code}; END",
+            f"CREATE TRIGGER {table}_name_ad AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM favourites_name_search WHERE rowid = old.id * 8 + {code}; END",
+            f"INSERT INTO favourites_name_search(rowid, name) SELECT id * 8 + {code}, {column} FROM {table}",
+        ]
+    return statements
+
+
+def reverse_sql():
+    statements = []
+    for _, table, _ in NAME_SOURCES:
+        statements += [f"DROP TRIGGER {table}_name_{suffix}" for suffix in ('ai', 'au', 'ad')]
+    return statements + ["DROP TABLE favourites_name_search"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favourites', '0006_frequency_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(forward_sql(), reverse_sql()),
+    ]
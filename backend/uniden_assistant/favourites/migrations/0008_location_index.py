@@ -0,0 +1,83 @@
+from django.db import migrations
+
+# (kind code, table); the index id is row id * 4 + kind code
+CIRCLE_SOURCES = [
+    (0, 'favourites_cgroup'),
+    (1, 'favourites_tgroup'),
+    (2, 'favourites_site'),
+]
+RECTANGLE_CODE = 3
+
+# Bounding box of a circle of `range_miles` around (latitude, longitude).
+# Both half-widths over-estimate: a degree of latitude is at least 68.7
+# miles, cos(lat) >= 1 - lat^2/2, and asin(y) <= 1.1y for the widths kept;
+# wider circles (or ones near a pole) span every longitude.
+MILES_PER_DEGREE = 68.7
+_RANGE = 'CAST(new.range_miles AS REAL)'
+_LATITUDE = 'CAST(new.latitude AS REAL)'
+_LONGITUDE = 'CAST(new.longitude AS REAL)'
+_COS_BOUND = f'(1 - ({_LATITUDE} * 0.017453292519943295) * ({_LATITUDE} * 0.017453292519943295) / 2)'
+_LON_HALF = f'({_RANGE} / ({MILES_PER_DEGREE} * {_COS_BOUND}))'
+_LON_HALF_BOUNDED = f'(CASE WHEN {_COS_BOUND} > 0.01 AND {_LON_HALF} < 39 THEN {_LON_HALF} * 1.1 ELSE 360 END)'
+_LAT_HALF = f'({_RANGE} / {MILES_PER_DEGREE})'
+
+
+def _insert_circle(code):
+    return (
+        f"INSERT INTO favourites_location_index SELECT new.id * 4 + {code}, "
+        f"{_LATITUDE} - {_LAT_HALF}, {_LATITUDE} + {_LAT_HALF}, "
+        f"{_LONGITUDE} - {_LON_HALF_BOUNDED}, {_LONGITUDE} + {_LON_HALF_BOUNDED} "
+        f"WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL AND {_RANGE} > 0;"
+    )
+
+
+_INSERT_RECTANGLE = (
+    f"INSERT INTO favourites_location_index VALUES (new.id * 4 + {RECTANGLE_CODE}, "
+    "min(new.latitude1, new.latitude2), max(new.latitude1, new.latitude2), "
+    "min(new.longitude1, new.longitude2), max(new.longitude1, new.longitude2));"
+)
+
+
+def _triggers(table, code, columns, insert):
+    delete = f"DELETE FROM favourites_location_index WHERE id = old.id * 4 + {code};"
+    return [
+        f"CREATE TRIGGER {table}_location_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER {table}_location_au AFTER UPDATE OF {', '.join(columns)} ON {table} "
+        f"BEGIN {delete} {insert} END",
+        f"CREATE TRIGGER {table}_location_ad AFTER DELETE ON {table} BEGIN {delete} END",
+    ]
+
+
+def forward_sql():
+    statements = [
+        "CREATE VIRTUAL TABLE favourites_location_index USING rtree(id, min_lat, max_lat, min_lon, max_lon)"
+    ]
+    for code, table in CIRCLE_SOURCES:
+        statements += _triggers(table, code, ('latitude', 'longitude', 'range_miles'), _insert_circle(code))
+    statements += _triggers(
+        'favourites_rectangle', RECTANGLE_CODE,
+        ('latitude1', 'longitude1', 'latitude2', 'longitude2'), _INSERT_RECTANGLE,
+    )
+    # Index existing rows by firing the update triggers
+    for _, table in CIRCLE_SOURCES:
+        statements.append(f"UPDATE {table} SET latitude = latitude")
+    statements.append("UPDATE favourites_rectangle SET latitude1 = latitude1")
+    return statements
+
+
+def reverse_sql():
+    statements = []
+    for table in [table for _, table in CIRCLE_SOURCES] + ['favourites_rectangle']:
+        statements += [f"DROP TRIGGER {table}_location_{suffix}" for suffix in ('ai', 'au', 'ad')]
+    return statements + ["DROP TABLE favourites_location_index"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favourites', '0007_name_search'),
+    ]
+
+    operations = [
+        migrations.RunSQL(forward_sql(), reverse_sql()),
+    ]
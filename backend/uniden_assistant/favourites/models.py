@@ -4,6 +4,8 @@ Supports full import/export of f_list.cfg and f_*.hpd files with ALL record type
 """
 from django.db import models
 
+from . import raw_storage
+
 
 SCANNER_MODEL_CHOICES = [
     ('BCDx36HP', 'BCDx36HP'),
@@ -48,6 +50,7 @@ class FavoritesList(models.Model):
     # Metadata
     user_id = models.IntegerField(null=True, blank=True, db_index=True)
     order = models.IntegerField(default=0)  # Preserve order from f_list.cfg
+    export_generation = models.PositiveIntegerField(default=0)  # Bumped on every edit; keys cached exports
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -180,6 +183,9 @@ class CFreq(models.Model):
         ordering = ['cgroup', 'order']
         app_label = 'favourites'
         verbose_name = "Conventional Frequency"
+        indexes = [
+            models.Index(fields=['frequency', 'cgroup'], name='cfreq_frequency_idx'),  # frequency_search.py
+        ]
 
 
 # ============================================================================
@@ -411,6 +417,9 @@ class TFreq(models.Model):
         ordering = ['site', 'order']
         app_label = 'favourites'
         verbose_name = "Trunk Frequency"
+        indexes = [
+            models.Index(fields=['frequency', 'site'], name='tfreq_frequency_idx'),  # frequency_search.py
+        ]
 
 
 class TGroup(models.Model):
@@ -626,53 +635,156 @@ class Agency(models.Model):
 # RAW FILE STORAGE
 # ============================================================================
 
-class ScannerFileRecord(models.Model):
-    """Structured record storage for scanner files"""
+class ScannerRecordSchema(models.Model):
+    """Spec field names shared by every ScannerFileRecord of one record type and shape"""
+    record_type = models.CharField(max_length=100)
+    field_count = models.IntegerField()
+    field_names = models.TextField(blank=True)  # Tab-separated spec field names
+
+    @property
+    def names(self) -> tuple:
+        return tuple(self.field_names.split('\t')) if self.field_names else ()
+
+    class Meta:
+        app_label = 'favourites'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['record_type', 'field_count', 'field_names'], name='unique_scanner_record_schema'
+            ),
+        ]
+
+
+class ScannerRecordSource(models.Model):
+    """One imported scanner file whose lines are stored as ScannerFileRecords"""
     file_name = models.CharField(max_length=255)
     file_path = models.CharField(max_length=500)
-    record_type = models.CharField(max_length=100)
-    fields = models.JSONField(default=list)
-    spec_field_order = models.JSONField(default=list)
-    spec_field_map = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.file_path
+
+    class Meta:
+        ordering = ['file_path', 'id']
+        app_label = 'favourites'
+
+
+class ScannerFileRecord(models.Model):
+    """Structured record storage for scanner files
+
+    A row holds only its position and tab-separated field values. The file
+    comes from its source and the record type and spec field names from its
+    shared schema (see record_schemas.py), so select_related('source',
+    'schema') when reading many records.
+    """
+    source = models.ForeignKey(ScannerRecordSource, on_delete=models.CASCADE, related_name='records', db_index=False)
+    schema = models.ForeignKey(ScannerRecordSchema, on_delete=models.PROTECT, related_name='records')
+    values = models.TextField(blank=True)
     trailing_empty_fields = models.IntegerField(default=0)
     line_number = models.IntegerField()
-    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def file_name(self) -> str:
+        return self.source.file_name
+
+    @property
+    def file_path(self) -> str:
+        return self.source.file_path
+
+    @property
+    def record_type(self) -> str:
+        return self.schema.record_type
+
+    @property
+    def fields(self) -> list:
+        return self.values.split('\t') if self.schema.field_count else []
+
+    @property
+    def spec_field_order(self) -> tuple:
+        return self.schema.names
+
+    @property
+    def spec_field_map(self) -> dict:
+        return dict(zip(self.schema.names, self.fields))
+
+    @property
+    def raw_line(self) -> str:
+        """The original line, without its line ending"""
+        if not self.schema.field_count:
+            return self.record_type
+        return f"{self.record_type}\t{self.values}"
 
     class Meta:
-        ordering = ['file_path', 'line_number']
+        ordering = ['source', 'line_number']
         app_label = 'favourites'
         indexes = [
-            models.Index(fields=['file_path', 'line_number']),
-            models.Index(fields=['record_type']),
+            models.Index(fields=['source', 'line_number']),
         ]
 
 
 class ScannerRawFile(models.Model):
-    """Raw scanner file data for reconstruction and archiving"""
+    """Raw scanner file data for reconstruction and archiving
+
+    The file is stored compressed in one row with a line offset index
+    (see raw_storage.py); use read_bytes() or read_lines() to get it back.
+    """
     file_name = models.CharField(max_length=255)
     file_path = models.CharField(max_length=500, blank=True)
     file_type = models.CharField(max_length=50)
     file_size = models.IntegerField()
+    line_count = models.IntegerField(default=0)
+    content = models.BinaryField(default=b'')
+    block_index = models.BinaryField(default=b'')
+    line_index = models.BinaryField(default=b'')
     upload_time = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.file_name
 
+    def read_bytes(self) -> bytes:
+        """The original file, byte for byte"""
+        return raw_storage.read_range(self.content, self.block_index, 0, self.file_size)
+
+    def read_lines(self, start: int = 1, end: int = None) -> list:
+        """Lines start..end (1-based, inclusive), with their line endings"""
+        starts = raw_storage.unpack_line_index(self.line_index)
+        end = len(starts) if end is None else min(end, len(starts))
+        start = max(start, 1)
+        if start > end:
+            return []
+        bounds = list(starts[start - 1:end]) + [starts[end] if end < len(starts) else self.file_size]
+        data = raw_storage.read_range(self.content, self.block_index, bounds[0], bounds[-1])
+        return [
+            data[lo - bounds[0]:hi - bounds[0]].decode('utf-8', errors='ignore')
+            for lo, hi in zip(bounds, bounds[1:])
+        ]
+
     class Meta:
         ordering = ['-upload_time']
         app_label = 'favourites'
 
 
-class ScannerRawLine(models.Model):
-    """Individual raw lines from scanner files"""
-    raw_file = models.ForeignKey(ScannerRawFile, on_delete=models.CASCADE, related_name='lines')
-    line_number = models.IntegerField()
-    content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+class ImportedFile(models.Model):
+    """Size and SHA-256 of an imported scanner file, used to skip it when re-imported unchanged
+
+    Rows are keyed by the file's path on the SD card (e.g.
+    'favorites_lists/f_000001.hpd' or 'HPDB/s_000001.hpd') and go away with
+    the favourites list or raw file they were imported into.
+    """
+    file_path = models.CharField(max_length=500, unique=True)
+    file_size = models.BigIntegerField()
+    digest = models.CharField(max_length=64)
+    favorites_list = models.ForeignKey(
+        FavoritesList, on_delete=models.CASCADE, null=True, blank=True, related_name='imported_files'
+    )
+    raw_file = models.ForeignKey(
+        ScannerRawFile, on_delete=models.CASCADE, null=True, blank=True, related_name='imported_files'
+    )
+    export_generation = models.PositiveIntegerField(null=True, blank=True)  # List generation after import
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.file_path
 
     class Meta:
-        ordering = ['raw_file', 'line_number']
+        ordering = ['file_path']
         app_label = 'favourites'
-        indexes = [
-            models.Index(fields=['raw_file', 'line_number']),
-        ]
@@ -0,0 +1,96 @@
+"""Full-text search over the names of lists, systems, groups, sites and channels.
+
+Names live in the favourites_name_search FTS5 table, which SQLite triggers
+keep in step with every insert, rename and delete (including bulk imports
+and cascades; see migration 0007). The rowid of an entry is the row id * 8
+plus the kind code below, so a hit maps straight back to its row. Each
+word of the query is matched as a prefix, and hits are ranked by bm25.
+"""
+import re
+from collections import defaultdict
+from typing import List
+
+from django.db import connections
+
+from .models import CFreq, CGroup, ConventionalSystem, FavoritesList, Site, TGID, TGroup, TrunkSystem
+
+FTS_TABLE = 'favourites_name_search'
+
+_LIST = ('favorites_list', 'favorites_list_id', 'favorites_list__user_name')
+_CONVENTIONAL = ('conventional_system', 'conventional_system_id', 'conventional_system__name_tag')
+_TRUNK = ('trunk_system', 'trunk_system_id', 'trunk_system__name_tag')
+
+
+def _under(prefix: str, path: list) -> list:
+    return [(kind, f'{prefix}__{pk}', f'{prefix}__{name}') for kind, pk, name in path]
+
+
+# kind -> (code, model, name field, path from the list down to the parent, extra fields)
+NAME_SOURCES = {
+    'favorites_list': (0, FavoritesList, 'user_name', [], []),
+    'conventional_system': (1, ConventionalSystem, 'name_tag', [_LIST], []),
+    'trunk_system': (2, TrunkSystem, 'name_tag', [_LIST], []),
+    'cgroup': (3, CGroup, 'name_tag', _under('conventional_system', [_LIST]) + [_CONVENTIONAL], []),
+    'tgroup': (4, TGroup, 'name_tag', _under('trunk_system', [_LIST]) + [_TRUNK], []),
+    'site': (5, Site, 'name_tag', _under('trunk_system', [_LIST]) + [_TRUNK], []),
+    'cfreq': (
+        6, CFreq, 'name_tag',
+        _under('cgroup', _under('conventional_system', [_LIST]) + [_CONVENTIONAL])
+        + [('cgroup', 'cgroup_id', 'cgroup__name_tag')],
+        ['frequency', 'modulation'],
+    ),
+    'tgid': (
+        7, TGID, 'name_tag',
+        _under('tgroup', _under('trunk_system', [_LIST]) + [_TRUNK]) + [('tgroup', 'tgroup_id', 'tgroup__name_tag')],
+        ['tgid'],
+    ),
+}
+KINDS = tuple(NAME_SOURCES)
+_KIND_BY_CODE = {code: kind for kind, (code, *_) in NAME_SOURCES.items()}
+
+
+def match_query(text: str) -> str:
+    """FTS5 query matching every word of `text` as a prefix ('' if it has no words)."""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def search_names(text: str, kinds=KINDS, limit: int = 50, using: str = 'favorites') -> List[dict]:
+    """Best-ranked names matching `text`, each with its list/system/group path."""
+    query = match_query(text)
+    if not query:
+        return []
+    codes = sorted(NAME_SOURCES[kind][0] for kind in kinds)
+    sql = f'SELECT rowid, name, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    params = [query]
+    if len(codes) < len(NAME_SOURCES):
+        sql += f" AND rowid % 8 IN ({', '.join(['%s'] * len(codes))})"
+        params += codes
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(limit)
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        matches = cursor.fetchall()
+
+    ids = defaultdict(list)
+    for rowid, _, _ in matches:
+        ids[_KIND_BY_CODE[rowid % 8]].append(rowid // 8)
+    details = {}
+    for kind, pks in ids.items():
+        _, model, _, path, extra = NAME_SOURCES[kind]
+        lookups = ['pk'] + [field for _, pk, name in path for field in (pk, name)] + extra
+        for row in model.objects.using(using).filter(pk__in=pks).values(*lookups):
+            details[kind, row['pk']] = row
+
+    hits = []
+    for rowid, name, rank in matches:
+        kind, pk = _KIND_BY_CODE[rowid % 8], rowid // 8
+        row = details.get((kind, pk))
+        if row is None:
+            continue
+        _, _, _, path, extra = NAME_SOURCES[kind]
+        hits.append(dict(
+            {'kind': kind, 'id': pk, 'name': name, 'rank': rank},
+            path=[{'kind': step, 'id': row[pk_field], 'name': row[name_field]} for step, pk_field, name_field in path],
+            **{field: row[field] for field in extra}
+        ))
+    return hits
@@ -4,7 +4,11 @@ Parser for Uniden scanner configuration files
 import os
 import re
 from .models import Frequency, ChannelGroup, Agency, ScannerFileRecord
-from .record_parser.spec_field_maps import build_spec_field_map
+from .record_parser.decoders import DECODERS
+from .record_schemas import build_records, create_source
+
+_CGROUP = DECODERS['C-Group']
+_CFREQ = DECODERS['C-Freq']
 
 
 class UnidenFileParser:
@@ -63,6 +67,7 @@ class UnidenFileParser:
         return file_name
 
     def _store_records(self, lines, file_name: str, file_path: str) -> None:
+        source = None
         records_buffer = []
         for idx, raw_line in enumerate(lines, start=1):
             raw_line = raw_line.rstrip('\r')
@@ -73,25 +78,22 @@ class UnidenFileParser:
             parts = raw_line.split('\t')
             record_type = parts[0] if parts else ''
             fields = parts[1:] if len(parts) > 1 else []
-            spec_field_order, spec_field_map = build_spec_field_map(record_type, fields)
-
-            records_buffer.append(ScannerFileRecord(
-                file_name=file_name,
-                file_path=self._infer_file_path(file_path, file_name),
-                record_type=record_type,
-                fields=fields,
-                spec_field_order=spec_field_order,
-                spec_field_map=spec_field_map,
-                trailing_empty_fields=trailing_empty,
-                line_number=idx,
-            ))
+
+            records_buffer.append({
+                'record_type': record_type,
+                'fields': fields,
+                'trailing_empty_fields': trailing_empty,
+                'line_number': idx,
+            })
 
             if len(records_buffer) >= 2000:
-                ScannerFileRecord.objects.bulk_create(records_buffer)
+                source = source or create_source(file_name, self._infer_file_path(file_path, file_name))
+                ScannerFileRecord.objects.bulk_create(build_records(source, records_buffer))
                 records_buffer.clear()
 
         if records_buffer:
-            ScannerFileRecord.objects.bulk_create(records_buffer)
+            source = source or create_source(file_name, self._infer_file_path(file_path, file_name))
+            ScannerFileRecord.objects.bulk_create(build_records(source, records_buffer))
 
     def store_records_only(self, file):
         """Store structured records for a file without parsing into models."""
@@ -110,14 +112,13 @@ class UnidenFileParser:
         while items and items[0] == '':
             items.pop(0)
 
-        name_tag = items[0] if len(items) > 0 else 'Unknown'
-        enabled = items[1].lower() == 'on' if len(items) > 1 else True
-        try:
-            frequency = int(items[2]) if len(items) > 2 else 0
-        except (ValueError, TypeError):
-            frequency = 0
-        modulation = items[3] if len(items) > 3 else 'AUTO'
-        audio_option = items[4] if len(items) > 4 else ''
+        # Legacy layout: after trimming, the first item is the spec NameTag column
+        record = _CFREQ.decode(['', ''] + items)
+        name_tag = record['name_tag'] or 'Unknown'
+        enabled = record['avoid'].lower() == 'on' if len(items) > 1 else True
+        frequency = record['frequency']
+        modulation = record['modulation']
+        audio_option = record['audio_option']
 
         if frequency > 0 and group is not None:
             freq_obj, created = Frequency.objects.get_or_create(
@@ -140,7 +141,8 @@ class UnidenFileParser:
         while items and items[0] == '':
             items.pop(0)
 
-        name_tag = items[0] if len(items) > 0 else 'Unknown'
+        # Legacy layout: after trimming, the first item is the spec NameTag column
+        name_tag = _CGROUP.decode(['', ''] + items)['name_tag'] or 'Unknown'
         
         group, created = ChannelGroup.objects.get_or_create(
             profile=profile,
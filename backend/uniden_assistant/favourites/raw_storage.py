@@ -0,0 +1,83 @@
+"""Compressed storage for raw scanner files.
+
+Each raw file is a single ScannerRawFile row instead of one row per line:
+
+    content      independently zlib-compressed blocks of BLOCK_SIZE bytes
+    block_index  end offset of each compressed block within content (uint32)
+    line_index   zlib-compressed byte offset of each line start (uint32)
+
+Reading a line range decompresses only the blocks that cover it, so large
+HPDB files can be paged without inflating the whole file.
+"""
+import sys
+import zlib
+from array import array
+
+BLOCK_SIZE = 64 * 1024
+COMPRESSION_LEVEL = 6
+
+
+def _pack_offsets(values) -> bytes:
+    offsets = array('I', values)
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def _unpack_offsets(data) -> array:
+    offsets = array('I')
+    offsets.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets
+
+
+def line_starts(data: bytes) -> list:
+    """Byte offset of the start of every line (line endings stay with their line)."""
+    starts = [0] if data else []
+    pos = data.find(b'\n')
+    while pos != -1 and pos + 1 < len(data):
+        starts.append(pos + 1)
+        pos = data.find(b'\n', pos + 1)
+    return starts
+
+
+def pack(data: bytes) -> dict:
+    """ScannerRawFile field values for the raw bytes of one file."""
+    blocks = []
+    block_ends = []
+    compressed_size = 0
+    for offset in range(0, len(data), BLOCK_SIZE):
+        block = zlib.compress(data[offset:offset + BLOCK_SIZE], COMPRESSION_LEVEL)
+        compressed_size += len(block)
+        blocks.append(block)
+        block_ends.append(compressed_size)
+
+    starts = line_starts(data)
+    return {
+        'file_size': len(data),
+        'line_count': len(starts),
+        'content': b''.join(blocks),
+        'block_index': _pack_offsets(block_ends),
+        'line_index': zlib.compress(_pack_offsets(starts), COMPRESSION_LEVEL),
+    }
+
+
+def read_range(content, block_index, start: int, end: int) -> bytes:
+    """Uncompressed bytes [start, end) read from only the blocks that hold them."""
+    if end <= start:
+        return b''
+    content = memoryview(content)
+    block_ends = _unpack_offsets(block_index)
+    first, last = start // BLOCK_SIZE, (end - 1) // BLOCK_SIZE
+    chunks = []
+    for block in range(first, last + 1):
+        block_start = block_ends[block - 1] if block else 0
+        chunks.append(zlib.decompress(content[block_start:block_ends[block]]))
+    data = b''.join(chunks)
+    offset = first * BLOCK_SIZE
+    return data[start - offset:end - offset]
+
+
+def unpack_line_index(line_index) -> array:
+    return _unpack_offsets(zlib.decompress(bytes(line_index)))
@@ -1,4 +1,5 @@
 """Shared record parser for HPDB and other HomePatrol data files"""
 from .record_handler import RecordHandler, BaseRecordParser
+from .decoders import RecordDecoder, DECODERS, get_decoder, decode_record
 
-__all__ = ['RecordHandler', 'BaseRecordParser']
+__all__ = ['RecordHandler', 'BaseRecordParser', 'RecordDecoder', 'DECODERS', 'get_decoder', 'decode_record']
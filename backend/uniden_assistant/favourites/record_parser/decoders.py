@@ -0,0 +1,287 @@
+"""Typed record decoders compiled from the spec field maps.
+
+Each decoder is built once at import time from FIXED_FIELD_MAPS into a small
+generated function that maps a record's fields onto model attribute names,
+with typed defaults and int/decimal coercion. Parsers call it instead of
+writing `fields[n] if len(fields) > n else default` chains by hand.
+"""
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .spec_field_maps import FIXED_FIELD_MAPS
+
+
+def _to_uint(value: str, default):
+    return int(value) if value.isdigit() else default
+
+
+def _to_int(value: str, default):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def _to_decimal(value: str, default=None):
+    if value == '':
+        return default
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+class Column:
+    """A typed column: coercion function plus the default for missing or invalid values."""
+    __slots__ = ('coerce', 'default')
+
+    def __init__(self, coerce: Callable, default) -> None:
+        self.coerce = coerce
+        self.default = default
+
+
+def uint(default: int = 0) -> Column:
+    """Non-negative integer column (digits only, otherwise the default)."""
+    return Column(_to_uint, default)
+
+
+def sint(default: int = 0) -> Column:
+    """Signed integer column."""
+    return Column(_to_int, default)
+
+
+def decimal(default=None) -> Column:
+    """Float column; empty or invalid values become the default."""
+    return Column(_to_decimal, default)
+
+
+# Spec names whose snake_case form does not match the model attribute.
+ATTRIBUTE_OVERRIDES: Dict[str, str] = {
+    'Range': 'range_miles',
+    'Reserve(MyId)': 'reserve_my_id',
+    'Reserve(Avoid)': 'reserve_avoid',
+    'ColorCode/RAN/Area': 'color_code_ran_area',
+}
+
+
+def spec_to_attribute(name: str) -> str:
+    """Convert a spec field name (e.g. 'PriorityIDScan') to snake_case ('priority_id_scan')."""
+    if name in ATTRIBUTE_OVERRIDES:
+        return ATTRIBUTE_OVERRIDES[name]
+    name = re.sub(r'([A-Z]+)([A-Z][a-z])', r'\1_\2', name)
+    name = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', name)
+    return name.replace('-', '_').lower()
+
+
+class RecordDecoder:
+    """Decode the fields of one record type into an attribute dict.
+
+    The decode function is generated once from the spec column list: short
+    records are padded with the column defaults in one slice, string columns
+    become plain subscripts and numeric columns an inline coercion, so a record
+    costs a single dict display with no per-field length checks.
+
+    Args:
+        record_type: Record type name as it appears in column 0.
+        columns: Spec name -> default string or Column. Spec columns not listed
+            default to ''.
+        attributes: Spec name -> attribute overrides for this record type only.
+        lists: Attribute -> (first spec name, last spec name, pad value). The
+            span is returned as a list; pad value None leaves it unpadded.
+        strip: Strip whitespace from every field before decoding.
+    """
+
+    def __init__(
+        self,
+        record_type: str,
+        columns: Optional[Dict[str, object]] = None,
+        attributes: Optional[Dict[str, str]] = None,
+        lists: Optional[Dict[str, Tuple[str, str, Optional[str]]]] = None,
+        strip: bool = False,
+    ) -> None:
+        columns = columns or {}
+        attributes = attributes or {}
+        names: List[str] = FIXED_FIELD_MAPS[record_type]
+
+        spans = []
+        for attr, (first, last, pad) in (lists or {}).items():
+            spans.append((attr, names.index(first), names.index(last) + 1, pad))
+
+        # Scalar columns are the spec columns before the first list span.
+        scalars = min([start for _, start, _, _ in spans] or [len(names)])
+        self.record_type = record_type
+        self.spec_names = tuple(names[:scalars])
+        self.attributes = tuple(attributes.get(name) or spec_to_attribute(name) for name in self.spec_names)
+
+        padding = []
+        items = []
+        namespace = {}
+        for idx, (name, attr) in enumerate(zip(self.spec_names, self.attributes)):
+            column = columns.get(name, '')
+            if not isinstance(column, Column):
+                padding.append(column)
+                items.append(f'{attr!r}: f[{idx}]')
+                continue
+            # Typed columns pad with '' so the coercion yields their default.
+            padding.append('')
+            if column.coerce is _to_uint:
+                items.append(f'{attr!r}: int(f[{idx}]) if f[{idx}].isdigit() else {column.default!r}')
+            else:
+                namespace[f'_c{idx}'] = column.coerce
+                items.append(f'{attr!r}: _c{idx}(f[{idx}], {column.default!r})')
+
+        width = scalars
+        for attr, start, stop, pad in spans:
+            if pad is None:
+                items.append(f'{attr!r}: fields[{start}:{stop}]')
+                continue
+            # Padded spans read from the padded row, so it must reach their end.
+            padding.extend([''] * (start - len(padding)))
+            padding.extend([pad] * (stop - start))
+            width = max(width, stop)
+            items.append(f'{attr!r}: f[{start}:{stop}]')
+
+        self.width = width
+        self.padding = padding[:width]
+        namespace['_padding'] = self.padding
+        source = (
+            'def decode(fields):\n'
+            + ('    fields = [value.strip() for value in fields]\n' if strip else '')
+            + f'    f = fields if len(fields) >= {width} else fields + _padding[len(fields):]\n'
+            + '    return {' + ', '.join(items) + '}\n'
+        )
+        exec(compile(source, f'<decoder {record_type}>', 'exec'), namespace)
+        self.source = source
+        self.decode: Callable[[List[str]], Dict[str, object]] = namespace['decode']
+
+
+_FREQ_ALERTS = {
+    'AlertTone': 'Off',
+    'AlertVolume': 'Auto',
+    'AlertColor': 'Off',
+    'AlertPattern': 'On',
+}
+
+DECODERS: Dict[str, RecordDecoder] = {
+    'Conventional': RecordDecoder('Conventional', {
+        'Avoid': 'Off',
+        'QuickKey': 'Off',
+        'NumberTag': 'Off',
+        'SystemHoldTime': uint(0),
+        'AnalogAGC': 'Off',
+        'DigitalAGC': 'Off',
+        'DigitalWaitingTime': uint(400),
+        'DigitalThresholdMode': 'Manual',
+        'DigitalThresholdLevel': uint(8),
+    }),
+    'Trunk': RecordDecoder('Trunk', {
+        'Avoid': 'Off',
+        'IDSearch': 'Off',
+        'AlertTone': 'Off',
+        'AlertVolume': 'Auto',
+        'StatusBit': 'Ignore',
+        'NAC': 'Srch',
+        'QuickKey': 'Off',
+        'NumberTag': 'Off',
+        'SiteHoldTime': uint(0),
+        'AnalogAGC': 'Off',
+        'DigitalAGC': 'Off',
+        'EndCode': 'Analog',
+        'PriorityIDScan': 'Off',
+        'AlertColor': 'Off',
+        'AlertPattern': 'On',
+    }),
+    'C-Group': RecordDecoder('C-Group', {
+        'Avoid': 'Off',
+        'Latitude': decimal(),
+        'Longitude': decimal(),
+        'Range': decimal(),
+        'LocationType': 'Circle',
+        'QuickKey': 'Off',
+    }),
+    'C-Freq': RecordDecoder('C-Freq', {
+        'Avoid': 'Off',
+        'Frequency': uint(0),
+        'Modulation': 'AUTO',
+        'FuncTagId': uint(21),  # 21 = Other (valid default)
+        'Attenuator': 'Off',
+        'Delay': sint(2),
+        'VolumeOffset': sint(0),
+        **_FREQ_ALERTS,
+        'NumberTag': 'Off',
+        'PriorityChannel': 'Off',
+    }),
+    'Site': RecordDecoder('Site', {
+        'Avoid': 'Off',
+        'Latitude': decimal(),
+        'Longitude': decimal(),
+        'Range': decimal(),
+        'Modulation': 'AUTO',
+        'MotBandType': 'Standard',
+        'EdacsBandType': 'Wide',
+        'LocationType': 'Circle',
+        'Attenuator': 'Off',
+        'DigitalWaitingTime': uint(400),
+        'DigitalThresholdMode': 'Manual',
+        'DigitalThresholdLevel': uint(8),
+        'QuickKey': 'Off',
+        'NAC': 'Srch',
+    }),
+    'T-Freq': RecordDecoder('T-Freq', {
+        'Reserve(Avoid)': 'Off',
+        'Frequency': uint(0),
+        'LCN': uint(0),
+    }, attributes={'Reserve': 'reserve1'}),
+    'T-Group': RecordDecoder('T-Group', {
+        'Avoid': 'Off',
+        'Latitude': decimal(),
+        'Longitude': decimal(),
+        'Range': decimal(),
+        'LocationType': 'Circle',
+        'QuickKey': 'Off',
+    }),
+    'TGID': RecordDecoder('TGID', {
+        'Avoid': 'Off',
+        'AudioType': 'ALL',
+        'FuncTagId': uint(21),  # 21 = Other (valid default)
+        'Delay': sint(2),
+        'VolumeOffset': sint(0),
+        **_FREQ_ALERTS,
+        'NumberTag': 'Off',
+        'PriorityChannel': 'Off',
+        'TDMASlot': 'Any',
+    }),
+    'Rectangle': RecordDecoder('Rectangle', {
+        'Latitude1': decimal(),
+        'Longitude1': decimal(),
+        'Latitude2': decimal(),
+        'Longitude2': decimal(),
+    }),
+    'FleetMap': RecordDecoder('FleetMap', lists={'blocks': ('B0', 'B7', None)}),
+    'UnitIds': RecordDecoder('UnitIds', {
+        'UnitId': uint(0),
+        **_FREQ_ALERTS,
+    }),
+    'F-List': RecordDecoder('F-List', {
+        'LocationControl': 'Off',
+        'Monitor': 'Off',
+        'QuickKey': 'Off',
+        'NumberTag': 'Off',
+    }, lists={
+        'startup_keys': ('StartupKey0', 'StartupKey9', 'Off'),
+        's_qkeys': ('S-Qkey_00', 'S-Qkey_99', 'Off'),
+    }, strip=True),
+}
+
+
+def get_decoder(record_type: str) -> Optional[RecordDecoder]:
+    """Return the compiled decoder for a record type, or None if there is none."""
+    return DECODERS.get(record_type)
+
+
+def decode_record(record_type: str, fields: List[str]) -> Optional[Dict[str, object]]:
+    """Decode fields for a record type, or return None for types without a decoder."""
+    decoder = DECODERS.get(record_type)
+    if decoder is None:
+        return None
+    return decoder.decode(fields)
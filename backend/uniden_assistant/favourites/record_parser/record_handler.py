@@ -2,6 +2,8 @@
 import logging
 from typing import Dict, List, Optional, Callable, Any
 
+from .decoders import DECODERS
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,6 +17,7 @@ class RecordHandler:
     Usage:
         handler = RecordHandler(using_db='hpdb')
         handler.register_handler('Conventional', callback_fn)
+        handler.register_handler('C-Freq', record_fn, decoded=True)
         handler.parse_line(line_content, line_number=123)
     """
     
@@ -55,14 +58,25 @@ class RecordHandler:
         self.unrecognized_types: Dict[str, List[tuple]] = {}  # type -> [(line_num, content)]
         self.stats: Dict[str, int] = {}  # Record type -> count
     
-    def register_handler(self, record_type: str, callback: Callable[[List[str], int, str], None]):
+    def register_handler(self, record_type: str, callback: Callable[[Any, int, str], None], decoded: bool = False):
         """
         Register a handler callback for a record type.
         
         Args:
             record_type: Record type name (e.g., 'Conventional', 'C-Freq')
             callback: Function(parts, line_number, raw_source) to handle this record type
-        """
+            decoded: Pass the record as a typed attribute dict from the spec decoder
+                instead of the raw parts list
+        """
+        if decoded:
+            decoder = DECODERS.get(record_type)
+            if decoder is None:
+                raise ValueError(f"No spec decoder for record type '{record_type}'")
+            decode = decoder.decode
+            self.handlers[record_type] = lambda parts, line_number, raw_source: callback(
+                decode(parts[1:]), line_number, raw_source
+            )
+            return
         self.handlers[record_type] = callback
     
     def parse_line(self, line: str, line_number: int = 0) -> bool:
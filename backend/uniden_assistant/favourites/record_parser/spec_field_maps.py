@@ -2,7 +2,12 @@
 
 Field names are taken directly from docs/Input_File_Specification/*.md.
 When a record contains reserved fields, names are assigned as Reserve, Reserve1..N.
+
+Resolved name lists are shared, immutable tuples: fixed records map straight
+to FIXED_FIELD_NAMES, and variable-width records are cached by record type,
+field count and (for Avoid) the one field that changes the layout.
 """
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
 
@@ -189,7 +194,7 @@ def _custom_service_type_fields() -> List[str]:
     return [f"Id{str(i).zfill(2)}_state" for i in range(1, 11)]
 
 
-def _dynamic_field_names(record_type: str, field_count: int, fields: List[str]) -> List[str]:
+def _dynamic_field_names(record_type: str, field_count: int, variant: str = "") -> List[str]:
     if record_type == "AvoidTgids":
         return ["MyId", *[f"TGID{idx}" for idx in range(1, field_count)]]
 
@@ -241,7 +246,7 @@ def _dynamic_field_names(record_type: str, field_count: int, fields: List[str])
         if field_count >= 4:
             return ["StateId", "SystemId", "DeptId", "ChannelId"]
         if field_count == 3:
-            if fields and fields[2].startswith("SiteId="):
+            if variant == "SiteId":
                 return ["StateId", "SystemId", "SiteId"]
             return ["StateId", "SystemId", "DeptId"]
         if field_count == 2:
@@ -257,20 +262,31 @@ def _dynamic_field_names(record_type: str, field_count: int, fields: List[str])
     return []
 
 
-def get_spec_field_names(record_type: str, fields: List[str]) -> List[str]:
-    if record_type in {"ServiceType", "CustomServiceType"}:
-        return _dynamic_field_names(record_type, len(fields), fields)
+# Fixed-layout records: the name list does not depend on the record's width
+FIXED_FIELD_NAMES: Dict[str, Tuple[str, ...]] = {
+    record_type: tuple(names) for record_type, names in FIXED_FIELD_MAPS.items()
+}
+_SIZED_RECORD_TYPES = {"DispOptItems", "DispColors", "F-List"}
+
+
+def _layout_variant(record_type: str, fields: List[str]) -> str:
+    """The part of a record's content that changes its field names."""
+    if record_type == "Avoid" and len(fields) == 3 and fields[2].startswith("SiteId="):
+        return "SiteId"
+    return ""
+
+
+@lru_cache(maxsize=1024)
+def _sized_field_names(record_type: str, field_count: int, variant: str) -> Tuple[str, ...]:
+    return tuple(_dynamic_field_names(record_type, field_count, variant))
 
-    if record_type in FIXED_FIELD_MAPS:
-        names = FIXED_FIELD_MAPS[record_type]
-        if record_type in {"DispOptItems", "DispColors", "F-List"}:
-            return _dynamic_field_names(record_type, len(fields), fields)
-        return names
 
-    return _dynamic_field_names(record_type, len(fields), fields)
+def get_spec_field_names(record_type: str, fields: List[str]) -> Tuple[str, ...]:
+    if record_type in FIXED_FIELD_NAMES and record_type not in _SIZED_RECORD_TYPES:
+        return FIXED_FIELD_NAMES[record_type]
+    return _sized_field_names(record_type, len(fields), _layout_variant(record_type, fields))
 
 
-def build_spec_field_map(record_type: str, fields: List[str]) -> Tuple[List[str], Dict[str, str]]:
+def build_spec_field_map(record_type: str, fields: List[str]) -> Tuple[Tuple[str, ...], Dict[str, str]]:
     names = get_spec_field_names(record_type, fields)
-    field_map = {names[idx]: fields[idx] for idx in range(min(len(names), len(fields)))}
-    return names, field_map
+    return names, dict(zip(names, fields))
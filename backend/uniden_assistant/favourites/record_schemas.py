@@ -0,0 +1,67 @@
+"""Interned field schemas for ScannerFileRecord rows.
+
+Records of the same type and shape share their spec field names, so the
+type and names are stored once per (record_type, field_count, field_names)
+in ScannerRecordSchema. The file name and path are stored once per
+imported file in ScannerRecordSource. Each record row keeps only its line
+number and tab-separated values.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+from .models import ScannerFileRecord, ScannerRecordSchema, ScannerRecordSource
+from .record_parser.spec_field_maps import get_spec_field_names
+
+SchemaKey = Tuple[str, int, str]
+
+
+def schema_key(record_type: str, fields: List[str]) -> SchemaKey:
+    return record_type, len(fields), '\t'.join(get_spec_field_names(record_type, fields))
+
+
+def intern_schemas(keys: Iterable[SchemaKey], using: str = 'favorites') -> Dict[SchemaKey, int]:
+    """Schema ids for the given keys, creating any that do not exist yet."""
+    keys = set(keys)
+    if not keys:
+        return {}
+    schemas = ScannerRecordSchema.objects.using(using)
+
+    def lookup(record_types):
+        return {
+            (record_type, field_count, field_names): pk
+            for pk, record_type, field_count, field_names in schemas.filter(
+                record_type__in=record_types
+            ).values_list('pk', 'record_type', 'field_count', 'field_names')
+        }
+
+    ids = lookup({key[0] for key in keys})
+    missing = keys - ids.keys()
+    if missing:
+        schemas.bulk_create(
+            [ScannerRecordSchema(record_type=key[0], field_count=key[1], field_names=key[2]) for key in missing],
+            ignore_conflicts=True,
+        )
+        ids.update(lookup({key[0] for key in missing}))
+    return ids
+
+
+def create_source(file_name: str, file_path: str, using: str = 'favorites') -> ScannerRecordSource:
+    return ScannerRecordSource.objects.using(using).create(file_name=file_name, file_path=file_path)
+
+
+def build_records(source: ScannerRecordSource, rows: List[dict], using: str = 'favorites') -> List[ScannerFileRecord]:
+    """Unsaved ScannerFileRecord objects for rows parsed from one source file.
+
+    Each row has record_type, fields, trailing_empty_fields and line_number.
+    """
+    keys = [schema_key(row['record_type'], row['fields']) for row in rows]
+    schema_ids = intern_schemas(keys, using=using)
+    return [
+        ScannerFileRecord(
+            source=source,
+            schema_id=schema_ids[key],
+            values='\t'.join(row['fields']),
+            trailing_empty_fields=row['trailing_empty_fields'],
+            line_number=row['line_number'],
+        )
+        for row, key in zip(rows, keys)
+    ]
@@ -0,0 +1,165 @@
+"""Rebuild the favourites database in a shadow file and swap it in.
+
+A shadow is a new SQLite file next to the live database with the live
+schema (tables, virtual tables, triggers, indexes and django_migrations)
+and the rows of only the tables asked for. swap_in() copies it over the
+live database with SQLite's online backup API. That is a single write
+transaction, so WAL readers keep their snapshot of the old data until it
+commits and then see the new data; nothing is renamed under open
+connections, and the live file shrinks to the shadow's size.
+
+replacing() runs an import against a shadow: for the duration of the
+block this thread's connection points at the shadow, which is loaded
+without its non-unique indexes and without journal syncs, and the result
+is swapped in at the end. Other threads keep reading the live database.
+Anything written to the live database while the block runs is lost.
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+KeptRows = Iterable[Tuple[str, Optional[str]]]
+
+
+def _live_path(using: str) -> str:
+    return str(connections[using].settings_dict['NAME'])
+
+
+def live_schema(conn: sqlite3.Connection, schema: str = 'main') -> List[Tuple[str, str, str]]:
+    """(type, name, sql) of the schema objects to recreate, in creation order.
+
+    SQLite's own tables and the shadow tables behind FTS5 and R-tree virtual
+    tables are skipped; creating the virtual table creates those.
+    """
+    rows = conn.execute(
+        f"SELECT type, name, sql FROM {schema}.sqlite_master WHERE sql IS NOT NULL ORDER BY rowid"
+    ).fetchall()
+    virtual = [name for kind, name, sql in rows if kind == 'table' and sql.upper().startswith('CREATE VIRTUAL TABLE')]
+    return [
+        (kind, name, sql) for kind, name, sql in rows
+        if not name.startswith('sqlite_')
+        and not (kind == 'table' and any(name.startswith(f'{table}_') for table in virtual))
+    ]
+
+
+def _deferrable(sql: str) -> bool:
+    # Unique indexes stay: inserts with ignore_conflicts rely on them
+    return not sql.upper().startswith('CREATE UNIQUE')
+
+
+@contextmanager
+def _attached(path: str, using: str):
+    """Connection to the shadow at `path` with the live database attached as 'live'."""
+    conn = sqlite3.connect(f'file:{path}', uri=True, isolation_level=None)
+    try:
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('ATTACH DATABASE ? AS live', [_live_path(using)])
+        yield conn
+        conn.execute('DETACH DATABASE live')
+    finally:
+        conn.close()
+
+
+def build_shadow(keep: KeptRows, using: str = 'favorites', defer_indexes: bool = False) -> str:
+    """Path of a new database with the live schema and only the kept rows.
+
+    `keep` holds (table, where) pairs; where=None keeps every row. Rows are
+    copied with triggers in place (so FTS and R-tree entries follow them)
+    and indexes are created after the copy, or left for create_indexes()
+    with defer_indexes=True. Id sequences carry on from the live database,
+    so new rows never reuse the id of a row that was dropped.
+    """
+    live = _live_path(using)
+    fd, path = tempfile.mkstemp(prefix='.shadow-', suffix='.sqlite3', dir=os.path.dirname(live) or None)
+    os.close(fd)
+    try:
+        with _attached(path, using) as conn:
+            conn.execute(f"PRAGMA main.page_size={conn.execute('PRAGMA live.page_size').fetchone()[0]}")
+            schema = live_schema(conn, 'live')
+            conn.execute('BEGIN')
+            for kind in ('table', 'trigger'):
+                for object_kind, _, sql in schema:
+                    if object_kind == kind:
+                        conn.execute(sql)
+            conn.execute('INSERT INTO main.sqlite_sequence SELECT * FROM live.sqlite_sequence')
+            for table, where in [('django_migrations', None), *keep]:
+                sql = f'INSERT INTO main."{table}" SELECT * FROM live."{table}"'
+                conn.execute(f'{sql} WHERE {where}' if where else sql)
+            for kind, _, sql in schema:
+                if kind == 'index' and not (defer_indexes and _deferrable(sql)):
+                    conn.execute(sql)
+            conn.execute('COMMIT')
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+
+def create_indexes(path: str, using: str = 'favorites') -> None:
+    """Create the indexes build_shadow(defer_indexes=True) left out."""
+    with _attached(path, using) as conn:
+        conn.execute('BEGIN')
+        for kind, _, sql in live_schema(conn, 'live'):
+            if kind == 'index' and _deferrable(sql):
+                conn.execute(sql)
+        conn.execute('COMMIT')
+
+
+def swap_in(shadow_path: str, using: str = 'favorites') -> None:
+    """Replace the live database's contents with the shadow file, then delete it."""
+    connection = connections[using]
+    # The backup is not part of any transaction and could not be rolled back
+    connection.validate_no_atomic_block()
+    connection.ensure_connection()
+    source = sqlite3.connect(shadow_path)
+    try:
+        source.backup(connection.connection)
+    finally:
+        source.close()
+        os.unlink(shadow_path)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        if cursor.fetchone()[0] == 'wal':
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    logger.info("Swapped shadow database into %s", _live_path(using))
+
+
+@contextmanager
+def replacing(keep: KeptRows, using: str = 'favorites'):
+    """Point this thread's `using` connection at a shadow holding `keep`; swap it in after the block.
+
+    If the block raises, the shadow is discarded and the live database is
+    left as it was.
+    """
+    live = connections[using]
+    live.validate_no_atomic_block()
+    path = build_shadow(keep, using=using, defer_indexes=True)
+    shadow = live.__class__(dict(live.settings_dict, NAME=path, CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False), using)
+    connections[using] = shadow
+    try:
+        with shadow.cursor() as cursor:
+            # The shadow is thrown away on failure, so it needs no durability
+            cursor.execute('PRAGMA journal_mode=MEMORY')
+            cursor.execute('PRAGMA synchronous=OFF')
+        yield
+    except BaseException:
+        shadow.close()
+        connections[using] = live
+        os.unlink(path)
+        raise
+    shadow.close()
+    connections[using] = live
+    try:
+        create_indexes(path, using=using)
+    except Exception:
+        os.unlink(path)
+        raise
+    swap_in(path, using=using)
@@ -0,0 +1,75 @@
+"""SQLite performance profile for the favourites database.
+
+Applied to every new connection on the 'favorites' alias when
+FAVOURITES_SQLITE_PROFILE is 'performance':
+
+- journal_mode=WAL: readers keep working while an import holds the write lock
+- synchronous=NORMAL: fsync at checkpoints only (safe with WAL)
+- mmap_size / cache_size: larger read cache for export and detail queries
+- temp_store=MEMORY: sorts and temporary indexes stay off disk
+- busy_timeout: writers wait for each other instead of failing
+
+The 'default' profile leaves connections at stock settings. The journal
+mode is stored in the database file, though, so the first connection to a
+file in each process switches a file left in WAL mode back to the rollback
+journal. That needs exclusive access; if another connection has the file
+open the file stays in WAL mode until a later start.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import OperationalError
+
+logger = logging.getLogger(__name__)
+
+FAVORITES_ALIAS = 'favorites'
+
+# Database files whose journal mode this process has already checked
+_journal_checked = set()
+_journal_lock = threading.Lock()
+
+
+def profile_pragmas():
+    """PRAGMA statements for the configured profile (empty for 'default')."""
+    if settings.FAVOURITES_SQLITE_PROFILE != 'performance':
+        return []
+    return [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA mmap_size={int(settings.FAVOURITES_SQLITE_MMAP_SIZE)}',
+        f'PRAGMA cache_size={int(settings.FAVOURITES_SQLITE_CACHE_SIZE)}',
+        'PRAGMA temp_store=MEMORY',
+        f'PRAGMA busy_timeout={int(settings.FAVOURITES_SQLITE_BUSY_TIMEOUT)}',
+    ]
+
+
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """connection_created receiver for the favourites database."""
+    if connection.alias != FAVORITES_ALIAS or connection.vendor != 'sqlite':
+        return
+    pragmas = profile_pragmas()
+    if not pragmas:
+        _leave_wal_once(connection)
+        return
+    with connection.cursor() as cursor:
+        for pragma in pragmas:
+            cursor.execute(pragma)
+    logger.debug("Applied SQLite performance profile to %s", connection.settings_dict['NAME'])
+
+
+def _leave_wal_once(connection) -> None:
+    """Switch a file the performance profile left in WAL mode back to the rollback journal."""
+    name = str(connection.settings_dict['NAME'])
+    with _journal_lock:
+        if name in _journal_checked:
+            return
+        _journal_checked.add(name)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        if cursor.fetchone()[0] != 'wal':
+            return
+        try:
+            cursor.execute('PRAGMA journal_mode=DELETE')
+        except OperationalError as exc:
+            logger.warning("%s stays in WAL mode while other connections have it open: %s", name, exc)
@@ -0,0 +1,1138 @@
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.http import FileResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from . import name_search, raw_storage
+from .csv_handler import FavoritesListCSVHandler
+from .export_cache import ExportCache, bump_export_generation
+from .favorites_hpd_parser import FavoritesHPDParser, parse_trees
+from .incremental_import import import_favorites_folder
+from .json_handler import FavoritesListJSONHandler, _IncrementalReader
+from .models import (
+    AvoidTgid, BandPlanMot, BandPlanP25, CFreq, CGroup, ConventionalSystem, FavoritesList, FleetMap, ImportedFile,
+    Rectangle, ScannerFileRecord, ScannerRawFile, ScannerRecordSchema, ScannerRecordSource, Site, TFreq, TGID, TGroup,
+    TrunkSystem, UnitId,
+)
+from .record_parser.decoders import DECODERS, decode_record, spec_to_attribute
+from .record_parser.spec_field_maps import FIXED_FIELD_MAPS, build_spec_field_map, get_spec_field_names
+from .sqlite_profile import profile_pragmas
+from .views import (
+    CFreqViewSet, ClearScannerRawDataView, ClearUserSettingsDataView, ExportFavoritesFolderView,
+    FavoritesImportViewSet, FavoritesListViewSet, FrequencySearchView, LocationSearchView, NameSearchView,
+)
+
+
+def without_bulk_insert_ids():
+    """Act like a SQLite build that cannot return primary keys from bulk inserts."""
+    return mock.patch.object(
+        type(connections['favorites'].features), 'can_return_rows_from_bulk_insert',
+        new_callable=mock.PropertyMock, return_value=False,
+    )
+
+
+def build_hpd(groups: int) -> str:
+    """f_*.hpd body with every record type the exporter writes, scaled by group count."""
+    lines = [
+        'TargetModel\tBCDx36HP',
+        'FormatVersion\t1.00',
+        'Conventional\t\t\tConventional\tOff\t\tConventional\tOff\tOff\t0\tOff\tOff\t400\tManual\t8',
+        'DQKs_Status\t\tOn\tOff',
+    ]
+    for group in range(groups):
+        lines.append(f'C-Group\t\t\tGroup {group}\tOff\t35.100000\t-80.200000\t5.0\tCircle\tOff\t')
+        lines.append('Rectangle\t\t35.000000\t-80.000000\t36.000000\t-81.000000')
+        for channel in range(3):
+            lines.append(
+                f'C-Freq\t\t\tChannel {channel}\tOff\t{154000000 + channel * 12500}\tNFM\t\t3'
+                '\tOff\t2\t0\tOff\tAuto\tOff\tOn\tOff\tOff'
+            )
+    lines.extend([
+        'Trunk\t\t\tTrunk\tOff\t\tP25Standard\tOff\tOff\tAuto\tIgnore\tSrch\tOff\tOff\t0\tOff\tOff\tAnalog\tOff\tOff\tOn\t',
+        'FleetMap\t\t1\t1\t1\t1\t1\t1\t1\t1',
+        'UnitIds\t\t\tUnit\t1234\tOff\tAuto\tOff\tOn',
+        'AvoidTgids\t\t100\t200',
+    ])
+    for site in range(groups):
+        lines.append(
+            f'Site\t\t\tSite {site}\tOff\t35.100000\t-80.200000\t5.0\tAUTO\tStandard\tWide\tCircle\tOff'
+            '\t400\tManual\t8\tOff\tSrch\t'
+        )
+        lines.append('BandPlan_P25\t\t851006250\t6250')
+        lines.append('BandPlan_Mot\t\t851000000\t869000000\t25\t380')
+        lines.append(f'T-Freq\t\t\t\tOff\t{851000000 + site * 25000}\t0\t')
+        lines.append('Rectangle\t\t35.000000\t-80.000000\t36.000000\t-81.000000')
+    for tgroup in range(groups):
+        lines.append(f'T-Group\t\t\tDepartment {tgroup}\tOff\t35.100000\t-80.200000\t5.0\tCircle\tOff')
+        lines.append(f'TGID\t\t\tTalkgroup {tgroup}\tOff\t{1000 + tgroup}\tALL\t3\t2\t0\tOff\tAuto\tOff\tOn\tOff\tOff\tAny')
+        lines.append('Rectangle\t\t35.000000\t-80.000000\t36.000000\t-81.000000')
+    return '\r\n'.join(lines) + '\r\n'
+
+
+class FavoritesFixtureMixin:
+    databases = {'default', 'favorites'}
+
+    def setUp(self):
+        super().setUp()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(EXPORT_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_favorites_list(self, filename: str, groups: int, order: int = 0) -> FavoritesList:
+        favorites_list = FavoritesList.objects.using('favorites').create(
+            user_name=filename, filename=filename, order=order,
+        )
+        fd, path = tempfile.mkstemp(suffix='.hpd')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as fh:
+                fh.write(build_hpd(groups))
+            FavoritesHPDParser().parse_file(path, favorites_list)
+        finally:
+            os.unlink(path)
+        return favorites_list
+
+
+class ExportFavoritesQueryBudgetTests(FavoritesFixtureMixin, TestCase):
+    # One query per table in FavoritesExportData
+    HPD_QUERY_BUDGET = 16
+
+    def test_hpd_export_query_count_is_constant(self):
+        small = self.make_favorites_list('f_000001.hpd', groups=1)
+        large = self.make_favorites_list('f_000002.hpd', groups=40, order=1)
+        view = ExportFavoritesFolderView()
+
+        with self.assertNumQueries(self.HPD_QUERY_BUDGET, using='favorites'):
+            small_content = view._build_favorites_hpd(small)
+        with self.assertNumQueries(self.HPD_QUERY_BUDGET, using='favorites'):
+            large_content = view._build_favorites_hpd(large)
+
+        self.assertEqual(small_content.count('\r\nC-Freq\t'), 3)
+        self.assertEqual(large_content.count('\r\nC-Freq\t'), 120)
+        self.assertEqual(large_content.count('\r\nTGID\t'), 40)
+        self.assertEqual(large_content.count('\r\nBandPlan_P25\t'), 40)
+        self.assertEqual(large_content.count('\r\nRectangle\t'), 120)
+
+    def test_folder_export_query_count_does_not_grow_with_lists(self):
+        for idx in range(5):
+            self.make_favorites_list(f'f_00000{idx + 1}.hpd', groups=10, order=idx)
+
+        # The list query, then one query per table for every list together
+        with CaptureQueriesContext(connections['favorites']) as queries:
+            response = ExportFavoritesFolderView.as_view()(RequestFactory().get('/export-favorites/'))
+            content = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), self.HPD_QUERY_BUDGET + 1)
+
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(len(archive.namelist()), 6)
+            hpd = archive.read('favorites_lists/f_000003.hpd').decode('utf-8')
+        self.assertEqual(hpd, ExportFavoritesFolderView()._build_favorites_hpd(
+            FavoritesList.objects.using('favorites').get(filename='f_000003.hpd')))
+
+    def test_folder_export_streams_lists_in_batches(self):
+        favorites_lists = [
+            self.make_favorites_list(f'f_00000{idx + 1}.hpd', groups=2, order=idx) for idx in range(3)
+        ]
+        view = ExportFavoritesFolderView()
+        view.STREAM_BATCH_SIZE = 2
+
+        # Two batches: each costs one query per table
+        with CaptureQueriesContext(connections['favorites']) as queries:
+            chunks = list(view._iter_zip(favorites_lists, ExportCache()))
+
+        self.assertEqual(len(queries), 2 * self.HPD_QUERY_BUDGET)
+        self.assertGreater(len(chunks), 1)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(
+                archive.namelist(),
+                ['favorites_lists/f_list.cfg'] + [f'favorites_lists/f_00000{idx + 1}.hpd' for idx in range(3)],
+            )
+
+
+class ExportCacheTests(FavoritesFixtureMixin, TestCase):
+    def export_folder(self):
+        response = ExportFavoritesFolderView.as_view()(RequestFactory().get('/export-favorites/'))
+        return b''.join(response.streaming_content)
+
+    def test_folder_export_is_served_from_cache_until_a_list_changes(self):
+        self.make_favorites_list('f_000001.hpd', groups=2)
+        self.make_favorites_list('f_000002.hpd', groups=2, order=1)
+        first = self.export_folder()
+
+        # Only the list query is needed to find the cached archive
+        with self.assertNumQueries(1, using='favorites'):
+            self.assertEqual(self.export_folder(), first)
+
+        cfreq = CFreq.objects.using('favorites').filter(
+            cgroup__conventional_system__favorites_list__filename='f_000002.hpd').first()
+        request = APIRequestFactory().patch(f'/cfreqs/{cfreq.pk}/', {'name_tag': 'Renamed'}, format='json')
+        response = CFreqViewSet.as_view({'patch': 'partial_update'})(request, pk=cfreq.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FavoritesList.objects.using('favorites').get(filename='f_000002.hpd').export_generation, 2)
+
+        with zipfile.ZipFile(io.BytesIO(self.export_folder())) as archive:
+            self.assertIn('\tRenamed\t', archive.read('favorites_lists/f_000002.hpd').decode('utf-8'))
+            self.assertNotIn('\tRenamed\t', archive.read('favorites_lists/f_000001.hpd').decode('utf-8'))
+
+    def test_list_invalidated_while_the_archive_streams_is_exported_in_full(self):
+        self.make_favorites_list('f_000001.hpd', groups=2)
+        second = self.make_favorites_list('f_000002.hpd', groups=3, order=1)
+        with zipfile.ZipFile(io.BytesIO(self.export_folder())) as archive:
+            expected = {name: archive.read(name) for name in archive.namelist()}
+        cache = ExportCache()
+        for favorites_list in FavoritesList.objects.using('favorites').all():
+            cache.invalidate(favorites_list.pk)
+        real_get = ExportCache.get
+
+        # The second .hpd looks cached when the batch is loaded, but is gone when it is read
+        def stale_get(path):
+            return path if path.name.startswith(f'{second.pk}-') else real_get(path)
+
+        with mock.patch.object(ExportCache, 'get', side_effect=stale_get):
+            with zipfile.ZipFile(io.BytesIO(self.export_folder())) as archive:
+                self.assertEqual({name: archive.read(name) for name in archive.namelist()}, expected)
+
+    def test_json_export_is_regenerated_after_list_update(self):
+        favorites_list = self.make_favorites_list('f_000001.hpd', groups=2)
+        view = FavoritesListViewSet.as_view({'get': 'export_json'})
+
+        def export():
+            response = view(APIRequestFactory().get('/'), pk=favorites_list.pk)
+            return b''.join(response.streaming_content)
+
+        first = export()
+        self.assertEqual(export(), first)
+
+        request = APIRequestFactory().patch('/', {'user_name': 'Renamed list'}, format='json')
+        response = FavoritesListViewSet.as_view({'patch': 'partial_update'})(request, pk=favorites_list.pk)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertIn(b'"user_name": "Renamed list"', export())
+
+    def test_json_export_streams_every_list_and_has_a_compact_form(self):
+        for idx in range(3):
+            self.make_favorites_list(f'f_00000{idx + 1}.hpd', groups=2, order=idx)
+        ids = list(FavoritesList.objects.using('favorites').values_list('pk', flat=True))
+        view = FavoritesListViewSet.as_view({'post': 'export_json_multiple'})
+
+        def export(**data):
+            response = view(APIRequestFactory().post('/', {'ids': ids, **data}, format='json'))
+            return response, b''.join(response.streaming_content)
+
+        with mock.patch.object(FavoritesListJSONHandler, 'STREAM_BATCH_SIZE', 2):
+            response, indented = export()
+        self.assertIsInstance(response, StreamingHttpResponse)
+        document = json.loads(indented)
+        self.assertEqual(indented.decode('utf-8'), json.dumps(document, indent=2))
+        self.assertEqual([fl['user_name'] for fl in document['favorites_lists']], ['f_000001.hpd', 'f_000002.hpd', 'f_000003.hpd'])
+        trunk = document['favorites_lists'][0]['trunk_systems'][0]
+        self.assertEqual(len(trunk['tgroups']), 2)
+        self.assertEqual(len(trunk['tgroups'][0]['tgids']), 1)
+        self.assertEqual(len(document['favorites_lists'][0]['conventional_systems'][0]['groups'][0]['channels']), 3)
+
+        response, compact = export(compact=True)
+        self.assertNotIn(b'\n', compact)
+        self.assertEqual(json.loads(compact), document)
+        # Both forms are cached separately
+        self.assertIsInstance(export()[0], FileResponse)
+        self.assertEqual(export(compact='true')[1], compact)
+
+        response = view(APIRequestFactory().post('/', {'ids': ids, 'compact': 'maybe'}, format='json'))
+        self.assertEqual(response.status_code, 400)
+
+
+class JSONImportTests(FavoritesFixtureMixin, TestCase):
+    def import_json(self, content: bytes):
+        upload = SimpleUploadedFile('favorites.json', content, content_type='application/json')
+        request = APIRequestFactory().post('/', {'file': upload}, format='multipart')
+        return FavoritesListViewSet.as_view({'post': 'import_json'})(request, pk=0)
+
+    def test_exported_lists_import_back_unchanged(self):
+        for idx in range(2):
+            self.make_favorites_list(f'f_00000{idx + 1}.hpd', groups=3, order=idx)
+        exported = json.loads(FavoritesListJSONHandler.export_to_json(FavoritesList.objects.using('favorites').all()))
+        for fav_list in exported['favorites_lists']:
+            fav_list['user_name'] += ' copy'
+
+        with mock.patch.object(_IncrementalReader, 'CHUNK_SIZE', 100):
+            response = self.import_json(json.dumps(exported).encode('utf-8'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['imported'], 2)
+        copies = FavoritesList.objects.using('favorites').filter(user_name__endswith=' copy').order_by('pk')
+        self.assertEqual([fl.filename for fl in copies], ['f_000003.hpd', 'f_000004.hpd'])
+        reexported = json.loads(FavoritesListJSONHandler.export_to_json(copies))
+        for original, copy in zip(exported['favorites_lists'], reexported['favorites_lists']):
+            for key in ('conventional_systems', 'trunk_systems'):
+                self.assertEqual(copy[key], original[key])
+
+    def test_import_links_children_when_bulk_insert_cannot_return_ids(self):
+        document = {'favorites_lists': [{
+            'user_name': 'List',
+            'conventional_systems': [{'groups': [{'name_tag': f'G{g}', 'channels': [{'frequency': 154000000 + g}]}
+                                                 for g in range(2)]}],
+            'trunk_systems': [{'tgroups': [{'name_tag': 'TG', 'tgids': [{'tgid': '100'}]}]}],
+        }]}
+        with without_bulk_insert_ids():
+            response = self.import_json(json.dumps(document).encode('utf-8'))
+
+        self.assertEqual(response.status_code, 200, response.data)
+        channels = CFreq.objects.using('favorites').order_by('frequency')
+        self.assertEqual([(c.cgroup.name_tag, c.frequency) for c in channels], [('G0', 154000000), ('G1', 154000001)])
+        self.assertEqual(TGID.objects.using('favorites').get().tgroup.trunk_system.favorites_list.user_name, 'List')
+
+    def test_syntax_error_after_the_first_list_imports_nothing(self):
+        content = b'{"favorites_lists": [{"user_name": "One", "conventional_systems": [{"name_tag": "S"}]}, {"user'
+
+        response = self.import_json(content)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['imported'], 0)
+        self.assertIn('JSON parsing error', response.data['errors'][0])
+        self.assertFalse(FavoritesList.objects.using('favorites').exists())
+        self.assertFalse(ConventionalSystem.objects.using('favorites').exists())
+
+    def test_list_with_bad_values_is_skipped(self):
+        document = {'favorites_lists': [
+            {'user_name': 'Good', 'conventional_systems': [{'groups': [{'channels': [{'frequency': 154000000}]}]}]},
+            {'user_name': 'Bad', 'conventional_systems': [{'groups': [{'channels': [{'frequency': 'abc'}]}]}]},
+        ]}
+
+        response = self.import_json(json.dumps(document).encode('utf-8'))
+
+        self.assertEqual(response.data['imported'], 1)
+        self.assertIn("Error importing 'Bad'", response.data['errors'][0])
+        self.assertEqual(list(FavoritesList.objects.using('favorites').values_list('user_name', flat=True)), ['Good'])
+        self.assertEqual(CFreq.objects.using('favorites').get().frequency, 154000000)
+
+
+class CSVTests(FavoritesFixtureMixin, TestCase):
+    def export_csv(self, favorites_list: FavoritesList) -> bytes:
+        response = FavoritesListViewSet.as_view({'get': 'export_csv'})(APIRequestFactory().get('/'), pk=favorites_list.pk)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content)
+
+    def import_csv(self, favorites_list: FavoritesList, content: bytes):
+        upload = SimpleUploadedFile('channels.csv', content, content_type='text/csv')
+        request = APIRequestFactory().post('/', {'file': upload}, format='multipart')
+        return FavoritesListViewSet.as_view({'post': 'import_csv'})(request, pk=favorites_list.pk)
+
+    def test_export_query_count_does_not_grow_with_channels(self):
+        small = self.make_favorites_list('f_000001.hpd', groups=1)
+        large = self.make_favorites_list('f_000002.hpd', groups=50, order=1)
+
+        # get_object, then one query per record type
+        with self.assertNumQueries(3, using='favorites'):
+            self.export_csv(small)
+        with self.assertNumQueries(3, using='favorites'):
+            content = self.export_csv(large).decode('utf-8')
+
+        lines = content.splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['record', 'system', 'system_type', 'group'])
+        self.assertEqual(len(lines), 1 + 150 + 50)
+        self.assertTrue(lines[1].startswith('C-Freq,Conventional,Conventional,Group 0,0,Channel 0,Off,154000000,NFM'))
+
+    def test_exported_channels_import_into_an_empty_list(self):
+        source = self.make_favorites_list('f_000001.hpd', groups=5)
+        target = FavoritesList.objects.using('favorites').create(user_name='Copy', filename='f_000002.hpd', order=1)
+        exported = self.export_csv(source)
+
+        with mock.patch.object(FavoritesListCSVHandler, 'IMPORT_BATCH_SIZE', 7):
+            response = self.import_csv(target, b'\xef\xbb\xbf' + exported)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['imported'], 15 + 5)
+        self.assertEqual(self.export_csv(target), exported)
+        self.assertEqual(CGroup.objects.using('favorites').filter(conventional_system__favorites_list=target).count(), 5)
+        target.refresh_from_db()
+        self.assertEqual(target.export_generation, 1)
+
+    def test_import_links_rows_when_bulk_insert_cannot_return_ids(self):
+        source = self.make_favorites_list('f_000001.hpd', groups=3)
+        target = FavoritesList.objects.using('favorites').create(user_name='Copy', filename='f_000002.hpd', order=1)
+        exported = self.export_csv(source)
+
+        with without_bulk_insert_ids(), mock.patch.object(FavoritesListCSVHandler, 'IMPORT_BATCH_SIZE', 4):
+            response = self.import_csv(target, exported)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.export_csv(target), exported)
+        self.assertEqual(CGroup.objects.using('favorites').filter(conventional_system__favorites_list=target).count(), 3)
+
+    def test_rows_with_bad_values_are_reported(self):
+        favorites_list = self.make_favorites_list('f_000001.hpd', groups=1)
+        content = (
+            'record,system,group,name_tag,frequency,tgid\r\n'
+            'C-Freq,Conventional,Group 0,Added,155000000,\r\n'
+            'C-Freq,Conventional,Group 0,Bad,155.5 MHz,\r\n'
+            'Site,Conventional,Group 0,Unknown,1,\r\n'
+            'TGID,New trunk,New group,Talkgroup,,1234\r\n'
+        ).encode('utf-8')
+
+        response = self.import_csv(favorites_list, content)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(len(response.data['errors']), 2)
+        self.assertIn('Row 3: frequency', response.data['errors'][0])
+        added = CFreq.objects.using('favorites').get(name_tag='Added')
+        # Appended after the group's existing channels
+        self.assertEqual((added.cgroup.name_tag, added.order), ('Group 0', 3))
+        tgid = TGID.objects.using('favorites').get(tgid='1234')
+        self.assertEqual(tgid.tgroup.trunk_system.name_tag, 'New trunk')
+        self.assertEqual(tgid.tgroup.trunk_system.system_type, 'P25Standard')
+
+
+class FavoriteDetailQueryTests(FavoritesFixtureMixin, TestCase):
+    # get_object, then systems and annotated groups for each system type
+    DETAIL_QUERIES = 5
+    SYSTEMS_QUERIES = 3
+
+    def test_detail_query_count_does_not_grow_with_groups(self):
+        favorites_list = self.make_favorites_list('f_000001.hpd', groups=1000)
+        ConventionalSystem.objects.using('favorites').create(favorites_list=favorites_list, name_tag='Empty', order=1)
+        request = APIRequestFactory().get('/')
+
+        with self.assertNumQueries(self.DETAIL_QUERIES, using='favorites'):
+            response = FavoritesListViewSet.as_view({'get': 'favorite_detail'})(request, pk=favorites_list.pk)
+
+        self.assertEqual(response.status_code, 200)
+        # 1,000 CGroups, 1,000 TGroups and the empty system's placeholder
+        self.assertEqual(response.data['total_groups'], 2001)
+        self.assertEqual(response.data['total_frequencies'], 3000 + 1000)
+        self.assertEqual(response.data['conventional_systems'], 2)
+        self.assertTrue(response.data['groups'][1000]['is_system_placeholder'])
+
+        with self.assertNumQueries(self.SYSTEMS_QUERIES, using='favorites'):
+            response = FavoritesListViewSet.as_view({'get': 'get_systems'})(request, pk=favorites_list.pk)
+        self.assertEqual(response.data['conventional_count'], 2)
+
+
+class SQLiteProfileTests(TestCase):
+    databases = {'default', 'favorites'}
+
+    def test_performance_profile_is_applied_to_favourites_connections(self):
+        with connections['favorites'].cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+        with connections['default'].cursor() as cursor:
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    @override_settings(FAVOURITES_SQLITE_PROFILE='default')
+    def test_default_profile_leaves_connections_untouched(self):
+        self.assertEqual(profile_pragmas(), [])
+
+    def journal_mode_after_connecting(self, path: str) -> str:
+        connection = connections.create_connection('favorites')
+        connection.settings_dict = dict(connection.settings_dict, NAME=path, OPTIONS={'timeout': 0.1})
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                return cursor.fetchone()[0]
+        finally:
+            connection.close()
+
+    def wal_database(self) -> str:
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        path = os.path.join(folder.name, 'favourites.sqlite3')
+        self.assertEqual(self.journal_mode_after_connecting(path), 'wal')
+        return path
+
+    def test_default_profile_turns_a_persisted_wal_journal_off_once(self):
+        path = self.wal_database()
+        with override_settings(FAVOURITES_SQLITE_PROFILE='default'):
+            self.assertEqual(self.journal_mode_after_connecting(path), 'delete')
+        self.assertEqual(self.journal_mode_after_connecting(path), 'wal')
+        # Already checked in this process; later connections are left alone
+        with override_settings(FAVOURITES_SQLITE_PROFILE='default'):
+            self.assertEqual(self.journal_mode_after_connecting(path), 'wal')
+
+    def test_default_profile_connects_while_another_connection_holds_the_wal_file(self):
+        path = self.wal_database()
+        other = sqlite3.connect(path)
+        self.addCleanup(other.close)
+        other.execute('CREATE TABLE t (x)')
+
+        with override_settings(FAVOURITES_SQLITE_PROFILE='default'), self.assertLogs(
+            'uniden_assistant.favourites.sqlite_profile', 'WARNING',
+        ):
+            self.assertEqual(self.journal_mode_after_connecting(path), 'wal')
+
+
+class ScannerRawFileTests(TestCase):
+    databases = {'default', 'favorites'}
+
+    def store(self, data: bytes) -> ScannerRawFile:
+        return ScannerRawFile.objects.using('favorites').create(
+            file_name='s_000001.hpd', file_type='.hpd', **raw_storage.pack(data)
+        )
+
+    def test_file_is_stored_in_one_row_and_reconstructed_exactly(self):
+        data = build_hpd(groups=200).encode('utf-8') + b'Last line without newline \xc3\xa9'
+        with mock.patch.object(raw_storage, 'BLOCK_SIZE', 4096):
+            with CaptureQueriesContext(connections['favorites']) as queries:
+                raw_file = self.store(data)
+        self.assertEqual(len(queries), 1)
+
+        raw_file = ScannerRawFile.objects.using('favorites').get(pk=raw_file.pk)
+        with mock.patch.object(raw_storage, 'BLOCK_SIZE', 4096):
+            self.assertEqual(raw_file.read_bytes(), data)
+            lines = data.decode('utf-8').splitlines(keepends=True)
+            self.assertEqual(raw_file.line_count, len(lines))
+            self.assertEqual(raw_file.read_lines(), lines)
+            self.assertEqual(raw_file.read_lines(500, 520), lines[499:520])
+            self.assertEqual(raw_file.read_lines(len(lines)), lines[-1:])
+            self.assertEqual(raw_file.read_lines(len(lines) + 1), [])
+        self.assertLess(len(raw_file.content) + len(raw_file.line_index), len(data) / 10)
+
+    def test_only_blocks_covering_the_range_are_decompressed(self):
+        data = b''.join(b'C-Freq\t%06d\n' % idx for idx in range(20000))
+        with mock.patch.object(raw_storage, 'BLOCK_SIZE', 1024):
+            raw_file = self.store(data)
+            with mock.patch.object(raw_storage.zlib, 'decompress', wraps=raw_storage.zlib.decompress) as decompress:
+                self.assertEqual(raw_file.read_lines(10001, 10001), ['C-Freq\t010000\n'])
+        # The line index, plus the one block holding line 10001
+        self.assertEqual(decompress.call_count, 2)
+
+    def test_empty_file(self):
+        raw_file = self.store(b'')
+        self.assertEqual((raw_file.read_bytes(), raw_file.read_lines(), raw_file.line_count), (b'', [], 0))
+
+
+class ScannerFileRecordTests(FavoritesFixtureMixin, TestCase):
+
+    def test_records_round_trip_through_shared_schemas(self):
+        self.make_favorites_list('f_000001.hpd', groups=20)
+        lines = [line for line in build_hpd(groups=20).split('\r\n') if line]
+
+        records = list(
+            ScannerFileRecord.objects.using('favorites')
+            .select_related('source', 'schema')
+            .order_by('line_number')
+        )
+
+        self.assertEqual([record.raw_line for record in records], lines)
+        for record, line in zip(records, lines):
+            record_type, *fields = line.split('\t')
+            self.assertEqual(record.record_type, record_type)
+            self.assertEqual(record.fields, fields)
+            self.assertEqual((record.spec_field_order, record.spec_field_map), build_spec_field_map(record_type, fields))
+            self.assertEqual(record.file_path, 'favorites_lists/' + record.file_name)
+        # One schema per record type and shape, shared by every import
+        schema_count = ScannerRecordSchema.objects.using('favorites').count()
+        self.assertEqual(schema_count, len({record.schema_id for record in records}))
+        self.make_favorites_list('f_000002.hpd', groups=5)
+        self.assertEqual(ScannerRecordSchema.objects.using('favorites').count(), schema_count)
+
+
+class HPDWriteTests(FavoritesFixtureMixin, TestCase):
+    # (model, path to the list, parents whose order and name stand in for the foreign key)
+    HIERARCHY = [
+        (ConventionalSystem, 'favorites_list', []),
+        (CGroup, 'conventional_system__favorites_list', ['conventional_system']),
+        (CFreq, 'cgroup__conventional_system__favorites_list', ['cgroup__conventional_system', 'cgroup']),
+        (TrunkSystem, 'favorites_list', []),
+        (FleetMap, 'trunk_system__favorites_list', ['trunk_system']),
+        (UnitId, 'trunk_system__favorites_list', ['trunk_system']),
+        (AvoidTgid, 'trunk_system__favorites_list', ['trunk_system']),
+        (Site, 'trunk_system__favorites_list', ['trunk_system']),
+        (BandPlanP25, 'site__trunk_system__favorites_list', ['site__trunk_system', 'site']),
+        (BandPlanMot, 'site__trunk_system__favorites_list', ['site__trunk_system', 'site']),
+        (TFreq, 'site__trunk_system__favorites_list', ['site__trunk_system', 'site']),
+        (TGroup, 'trunk_system__favorites_list', ['trunk_system']),
+        (TGID, 'tgroup__trunk_system__favorites_list', ['tgroup__trunk_system', 'tgroup']),
+        (Rectangle, 'cgroup__conventional_system__favorites_list', ['cgroup__conventional_system', 'cgroup']),
+        (Rectangle, 'site__trunk_system__favorites_list', ['site__trunk_system', 'site']),
+        (Rectangle, 'tgroup__trunk_system__favorites_list', ['tgroup__trunk_system', 'tgroup']),
+    ]
+
+    # build_hpd plus a second system of each kind: a Rectangles group, DQKs after a group, repeated band plans
+    EXTRA_LINES = [
+        'Conventional\t\t\tSecond\tOff\t\tConventional\tOff\tOff\t0\tOff\tOff\t400\tManual\t8',
+        'C-Group\t\t\tLate\tOff\t35.1\t-80.2\t5.0\tRectangles\tOff\t',
+        'Rectangle\t\t1.0\t2.0\t3.0\t4.0',
+        'Rectangle\t\t5.0\t6.0\t7.0\t8.0',
+        'DQKs_Status\t\tOn\tOn',
+        'C-Freq\t\t\tLate channel\tOff\t155000000\tFM\t\t3\tOff\t2\t0\tOff\tAuto\tOff\tOn\tOff\tOff',
+        'Trunk\t\t\tSecond trunk\tOff\t\tMotorola\tOff\tOff\tAuto\tIgnore\tSrch\tOff\tOff\t0\tOff\tOff\tAnalog\tOff\tOff\tOn\t',
+        'Site\t\t\tLate site\tOff\t35.1\t-80.2\t5.0\tAUTO\tStandard\tWide\tCircle\tOff\t400\tManual\t8\tOff\tSrch\t',
+        'BandPlan_Mot\t\t851000000\t869000000\t25\t380',
+        'BandPlan_Mot\t\t852000000\t870000000\t25\t380',
+    ]
+
+    def write_list(self, filename: str) -> FavoritesList:
+        favorites_list = FavoritesList.objects.using('favorites').create(user_name=filename, filename=filename)
+        lines = enumerate((build_hpd(2) + '\r\n'.join(self.EXTRA_LINES)).split('\r\n'), start=1)
+        parser = FavoritesHPDParser()
+        parser.write_tree(parser.parse_lines(lines, filename), favorites_list)
+        return favorites_list
+
+    def hierarchy(self, favorites_list: FavoritesList) -> list:
+        """Every row of the list in export order, with its parents' order and name instead of their keys."""
+        rows = []
+        for model, list_path, parents in self.HIERARCHY:
+            own = [field.attname for field in model._meta.concrete_fields
+                   if not field.is_relation and field.name not in ('id', 'created_at', 'updated_at')]
+            parent_fields = [f'{parent}__{name}' for parent in parents for name in ('order', 'name_tag')]
+            order_by = [f'{parent}__order' for parent in parents] + (['order'] if 'order' in own else []) + ['pk']
+            values = model.objects.using('favorites').filter(**{list_path: favorites_list}).order_by(*order_by)
+            rows.append((model.__name__, list(values.values_list(*parent_fields, *own))))
+        return rows
+
+    def test_bulk_write_matches_per_row_saves(self):
+        bulk = self.hierarchy(self.write_list('f_000001.hpd'))
+        with without_bulk_insert_ids():
+            per_row = self.hierarchy(self.write_list('f_000002.hpd'))
+
+        self.assertEqual(bulk, per_row)
+
+    def test_rows_keep_their_parents_and_file_order(self):
+        favorites_list = self.write_list('f_000001.hpd')
+
+        groups = CGroup.objects.using('favorites').filter(conventional_system__favorites_list=favorites_list)
+        self.assertEqual(
+            list(groups.order_by('conventional_system__order', 'order').values_list(
+                'conventional_system__name_tag', 'order', 'name_tag',
+            )),
+            [('Conventional', 0, 'Group 0'), ('Conventional', 1, 'Group 1'), ('Second', 0, 'Late')],
+        )
+        channels = CFreq.objects.using('favorites').filter(cgroup__conventional_system__favorites_list=favorites_list)
+        self.assertEqual(
+            list(channels.filter(cgroup__name_tag='Group 1').values_list('order', 'name_tag')),
+            [(0, 'Channel 0'), (1, 'Channel 1'), (2, 'Channel 2')],
+        )
+        self.assertEqual(list(channels.filter(cgroup__name_tag='Late').values_list('order', 'name_tag')),
+                         [(0, 'Late channel')])
+        late_rectangles = Rectangle.objects.using('favorites').filter(cgroup__name_tag='Late')
+        self.assertEqual(list(late_rectangles.values_list('order', 'latitude1')), [(0, 1), (1, 5)])
+        # DQKs_Status belongs to the system it follows, even after one of its groups
+        second = ConventionalSystem.objects.using('favorites').get(name_tag='Second')
+        self.assertEqual(second.dqks_status, ['On', 'On'])
+        # A later band plan line for a site replaces the earlier one
+        band_plans = BandPlanMot.objects.using('favorites').filter(site__name_tag='Late site')
+        self.assertEqual([plan.band_plan['0']['lower'] for plan in band_plans], [852000000])
+        tgroups = TGroup.objects.using('favorites').filter(trunk_system__favorites_list=favorites_list)
+        self.assertEqual(list(tgroups.values_list('order', 'name_tag')), [(0, 'Department 0'), (1, 'Department 1')])
+        self.assertEqual(Rectangle.objects.using('favorites').filter(tgroup__in=tgroups).count(), 2)
+
+
+class ParseTreesTests(TestCase):
+    databases = set()
+
+    def test_worker_processes_give_the_same_trees_and_errors_as_one_process(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        paths = []
+        for number, groups in enumerate((1, 4, 2), start=1):
+            path = Path(folder.name) / f'f_00000{number}.hpd'
+            path.write_text(build_hpd(groups), newline='')
+            paths.append(path)
+        # One path that cannot be opened and one that is not a file, between good ones
+        paths.insert(1, Path(folder.name) / 'f_000009.hpd')
+        paths.insert(3, Path(folder.name))
+
+        def results(jobs):
+            return [
+                (path, tree, None if error is None else (type(error), str(error)))
+                for path, tree, error in parse_trees(paths, jobs=jobs)
+            ]
+
+        serial = results(jobs=1)
+        self.assertEqual(results(jobs=2), serial)
+        self.assertEqual([error[0] for _, _, error in serial if error], [FileNotFoundError, IsADirectoryError])
+        self.assertEqual([len(tree.cgroups) for _, tree, _ in serial if tree], [1, 4, 2])
+
+    def test_only_a_few_files_are_parsed_ahead_of_the_caller(self):
+        submitted = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def __init__(self, max_workers, mp_context=None, initializer=None):
+                super().__init__(max_workers=max_workers)
+
+            def submit(self, fn, path):
+                submitted.append(path)
+                return super().submit(fn, path)
+
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        paths = []
+        for number in range(20):
+            path = Path(folder.name) / f'f_{number:06d}.hpd'
+            path.write_text(build_hpd(1), newline='')
+            paths.append(str(path))
+
+        with mock.patch('uniden_assistant.favourites.favorites_hpd_parser.ProcessPoolExecutor', RecordingExecutor):
+            results = parse_trees(paths, jobs=2)
+            for consumed, (path, tree, error) in enumerate(results, start=1):
+                self.assertEqual(path, paths[consumed - 1])
+                self.assertIsNone(error)
+                self.assertLessEqual(len(submitted), 2 * 2 + consumed)
+        self.assertEqual(submitted, paths)
+
+
+class SpecFieldNameTests(TestCase):
+    databases = set()
+
+    def test_name_lists_are_shared_immutable_tuples(self):
+        f_list = get_spec_field_names('F-List', ['User'] * 30)
+        self.assertIsInstance(f_list, tuple)
+        self.assertIs(get_spec_field_names('F-List', ['Other'] * 30), f_list)
+        self.assertEqual(f_list[-1], 'S-Qkey_13')
+        self.assertIs(get_spec_field_names('C-Freq', ['1']), get_spec_field_names('C-Freq', ['1'] * 17))
+
+    def test_avoid_layout_follows_its_third_field(self):
+        self.assertEqual(get_spec_field_names('Avoid', ['1', '2', 'SiteId=3'])[-1], 'SiteId')
+        self.assertEqual(get_spec_field_names('Avoid', ['1', '2', 'DeptId=3'])[-1], 'DeptId')
+
+
+class RecordDecoderTests(TestCase):
+    databases = set()
+
+    MODELS = {
+        'Conventional': ConventionalSystem, 'Trunk': TrunkSystem, 'C-Group': CGroup, 'C-Freq': CFreq, 'Site': Site,
+        'T-Freq': TFreq, 'T-Group': TGroup, 'TGID': TGID, 'Rectangle': Rectangle, 'FleetMap': FleetMap,
+        'UnitIds': UnitId, 'F-List': FavoritesList,
+    }
+    LISTS = {
+        'FleetMap': {'blocks': ('B0', 'B7')},
+        'F-List': {'startup_keys': ('StartupKey0', 'StartupKey9'), 's_qkeys': ('S-Qkey_00', 'S-Qkey_99')},
+    }
+    RENAMED = {('T-Freq', 'Reserve'): 'reserve1'}
+
+    def test_every_spec_column_lands_on_its_model_field(self):
+        self.assertEqual(set(DECODERS), set(self.MODELS))
+        for record_type, model in self.MODELS.items():
+            with self.subTest(record_type):
+                names = FIXED_FIELD_MAPS[record_type]
+                fields = [str(10 + idx) for idx in range(len(names))]
+                decoded = decode_record(record_type, fields)
+
+                expected = {}
+                spans = {attr: (names.index(first), names.index(last) + 1)
+                         for attr, (first, last) in self.LISTS.get(record_type, {}).items()}
+                for attr, (start, stop) in spans.items():
+                    expected[attr] = fields[start:stop]
+                scalars = min([start for start, _ in spans.values()] or [len(names)])
+                for idx, name in enumerate(names[:scalars]):
+                    attr = self.RENAMED.get((record_type, name)) or spec_to_attribute(name)
+                    field = model._meta.get_field(attr)
+                    if field.get_internal_type() in ('IntegerField', 'BigIntegerField'):
+                        expected[attr] = int(fields[idx])
+                    elif field.get_internal_type() in ('DecimalField', 'FloatField'):
+                        expected[attr] = float(fields[idx])
+                    else:
+                        expected[attr] = fields[idx]
+                self.assertEqual(decoded, expected)
+
+    def test_short_records_get_the_column_defaults(self):
+        cfreq = decode_record('C-Freq', ['', '', 'Dispatch', 'Off', '154000000'])
+        self.assertEqual(cfreq['name_tag'], 'Dispatch')
+        self.assertEqual(cfreq['frequency'], 154000000)
+        self.assertEqual(
+            (cfreq['modulation'], cfreq['audio_option'], cfreq['func_tag_id'], cfreq['delay'], cfreq['alert_pattern']),
+            ('AUTO', '', 21, 2, 'On'),
+        )
+        for record_type, model in self.MODELS.items():
+            with self.subTest(record_type):
+                decoded = decode_record(record_type, [])
+                self.assertEqual(set(decoded), set(decode_record(record_type, ['1'] * 200)))
+                for attr, value in decoded.items():
+                    field = model._meta.get_field(attr)
+                    if field.has_default() and not callable(field.default):
+                        self.assertEqual(value, field.default, attr)
+
+        f_list = decode_record('F-List', [' Home ', 'f_000001.hpd', 'On', 'Off', '1', '2', 'On'])
+        self.assertEqual((f_list['user_name'], f_list['location_control']), ('Home', 'On'))
+        self.assertEqual(f_list['startup_keys'], ['On'] + ['Off'] * 9)
+        self.assertEqual(f_list['s_qkeys'], ['Off'] * 100)
+        # FleetMap blocks are kept as given, not padded
+        self.assertEqual(decode_record('FleetMap', ['', '1', '2'])['blocks'], ['1', '2'])
+
+    def test_numeric_columns_fall_back_to_their_default(self):
+        cfreq = decode_record('C-Freq', ['', '', '', '', '-154', '', '', 'x', '', '-3', 'y'])
+        self.assertEqual((cfreq['frequency'], cfreq['func_tag_id'], cfreq['delay'], cfreq['volume_offset']), (0, 21, -3, 0))
+        cgroup = decode_record('C-Group', ['', '', '', '', '35.5', 'north', ''])
+        self.assertEqual((cgroup['latitude'], cgroup['longitude'], cgroup['range_miles']), (35.5, None, None))
+        conventional = decode_record('Conventional', [''] * 11 + ['250', ''])
+        self.assertEqual((conventional['digital_waiting_time'], conventional['digital_threshold_level']), (250, 8))
+        self.assertIsNone(decode_record('TargetModel', ['BCDx36HP']))
+
+
+class IncrementalImportTests(FavoritesFixtureMixin, TestCase):
+
+    def upload(self, files: dict) -> dict:
+        uploads = [SimpleUploadedFile(name, data.encode()) for name, data in files.items()]
+        request = APIRequestFactory().post('/api/favourites/import-files/', {'files': uploads}, format='multipart')
+        response = FavoritesImportViewSet.as_view({'post': 'create'})(request)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_only_changed_files_are_reimported(self):
+        f_list = ''.join(
+            f'F-List\tList {i}\tf_00000{i}.hpd\tOff\tOff\t{i}\tOff' + '\tOff' * 10 + '\tOn' * 100 + '\r\n'
+            for i in (1, 2)
+        )
+        files = {'f_list.cfg': f_list, 'f_000001.hpd': build_hpd(5), 'f_000002.hpd': build_hpd(5)}
+        self.assertEqual(self.upload(files)['imported'], 2)
+        first, second = FavoritesList.objects.using('favorites').order_by('order')
+        untouched = set(CFreq.objects.using('favorites').filter(
+            cgroup__conventional_system__favorites_list=first
+        ).values_list('pk', flat=True))
+
+        files['f_000002.hpd'] = build_hpd(8)
+        result = self.upload(files)
+
+        self.assertEqual((result['imported'], result['skipped'], result['errors']), (1, 1, []))
+        self.assertEqual(set(FavoritesList.objects.using('favorites').values_list('pk', flat=True)), {first.pk, second.pk})
+        self.assertEqual(set(CFreq.objects.using('favorites').filter(
+            cgroup__conventional_system__favorites_list=first
+        ).values_list('pk', flat=True)), untouched)
+        self.assertEqual(CFreq.objects.using('favorites').filter(
+            cgroup__conventional_system__favorites_list=second
+        ).count(), 8 * 3)
+        self.assertEqual(ScannerRecordSource.objects.using('favorites').count(), 3)
+
+        # A list edited since its import is re-imported even though its file did not change
+        bump_export_generation(first.pk)
+        self.assertEqual(self.upload(files)['imported'], 1)
+        self.assertEqual(self.upload(files)['skipped'], 2)
+
+    def test_changed_file_is_applied_as_a_delta(self):
+        f_list = 'F-List\tList 1\tf_000001.hpd\tOff\tOff\t1\tOff' + '\tOff' * 10 + '\tOn' * 100 + '\r\n'
+        lines = build_hpd(5).split('\r\n')
+        self.upload({'f_list.cfg': f_list, 'f_000001.hpd': '\r\n'.join(lines)})
+        favorites_list = FavoritesList.objects.using('favorites').get()
+        cfreqs = CFreq.objects.using('favorites').order_by('pk')
+        before = list(cfreqs.values_list('pk', 'name_tag'))
+
+        # Rename one channel and add one to the first group
+        channel = lines.index(next(line for line in lines if line.startswith('C-Freq')))
+        lines[channel] = lines[channel].replace('Channel 0', 'Renamed')
+        lines.insert(channel + 1, lines[channel + 1].replace('Channel 1', 'Added'))
+        with CaptureQueriesContext(connections['favorites']) as queries:
+            self.upload({'f_list.cfg': f_list, 'f_000001.hpd': '\r\n'.join(lines)})
+
+        after = list(cfreqs.values_list('pk', 'name_tag'))
+        self.assertEqual([pk for pk, _ in after[:len(before)]], [pk for pk, _ in before])
+        self.assertEqual(after[0][1], 'Renamed')
+        self.assertEqual(after[-1][1], 'Added')
+        first_group = cfreqs.get(pk=before[0][0]).cgroup_id
+        self.assertEqual(
+            list(cfreqs.filter(cgroup=first_group).order_by('order').values_list('name_tag', flat=True)),
+            ['Renamed', 'Added', 'Channel 1', 'Channel 2'],
+        )
+        writes = [query for query in queries.captured_queries if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertLess(len(writes), 20)
+        self.assertEqual(
+            [record.raw_line for record in ScannerFileRecord.objects.using('favorites').filter(
+                source__file_path='favorites_lists/f_000001.hpd'
+            ).select_related('schema').order_by('line_number')],
+            [line for line in lines if line],
+        )
+        self.assertEqual(FavoritesList.objects.using('favorites').get().pk, favorites_list.pk)
+
+    def test_header_only_change_invalidates_the_export(self):
+        f_list = 'F-List\tList 1\tf_000001.hpd\tOff\tOff\t1\tOff' + '\tOff' * 10 + '\tOn' * 100 + '\r\n'
+        hpd = build_hpd(2)
+        self.upload({'f_list.cfg': f_list, 'f_000001.hpd': hpd})
+        before = FavoritesList.objects.using('favorites').get().export_generation
+
+        result = self.upload({'f_list.cfg': f_list, 'f_000001.hpd': hpd.replace('BCDx36HP', 'SDS100')})
+
+        self.assertEqual(result['imported'], 1)
+        favorites_list = FavoritesList.objects.using('favorites').get()
+        self.assertEqual(favorites_list.scanner_model, 'SDS100')
+        self.assertGreater(favorites_list.export_generation, before)
+        # The next upload of the same file matches what was recorded for it
+        self.assertEqual(self.upload({'f_list.cfg': f_list, 'f_000001.hpd': hpd.replace('BCDx36HP', 'SDS100')})['skipped'], 1)
+
+
+class FrequencySearchTests(FavoritesFixtureMixin, TestCase):
+
+    def search(self, **params):
+        request = APIRequestFactory().get('/api/favourites/frequency-search/', params)
+        return FrequencySearchView.as_view()(request)
+
+    def test_range_and_nearest_queries_return_channel_paths(self):
+        favorites_list = self.make_favorites_list('f_000001.hpd', groups=2)
+
+        response = self.search(frequency='154.0125', tolerance='12.5', kind='cfreq')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual([hit['offset'] for hit in response.data['results']], [-12500] * 2 + [0] * 2 + [12500] * 2)
+        hit = response.data['results'][0]
+        self.assertEqual((hit['name_tag'], hit['group_name'], hit['system_name']), ('Channel 0', 'Group 0', 'Conventional'))
+        self.assertEqual((hit['favorites_list_id'], hit['favorites_list_name']), (favorites_list.pk, 'f_000001.hpd'))
+
+        nearest = self.search(frequency='851.030', nearest='2').data['results']
+        self.assertEqual([(hit['kind'], hit['frequency'], hit['site_name']) for hit in nearest], [
+            ('tfreq', 851025000, 'Site 1'), ('tfreq', 851000000, 'Site 0'),
+        ])
+        self.assertEqual(self.search(frequency='abc').status_code, 400)
+        self.assertEqual(self.search(frequency='154', kind='tgid').status_code, 400)
+
+    def test_out_of_range_values_are_rejected(self):
+        for params in (
+            {'frequency': 'inf'}, {'frequency': '-Infinity'}, {'frequency': 'NaN'}, {'frequency': '1e30'},
+            {'frequency': '154', 'tolerance': 'inf'}, {'frequency': '154', 'tolerance': '1e30'},
+            {'frequency': 'inf', 'nearest': '1'},
+            {'frequency': '460.125', 'limit': '-5'}, {'frequency': '460.125', 'limit': '0'},
+            {'frequency': '460.125', 'nearest': '3', 'limit': '-1'},
+        ):
+            with self.subTest(**params):
+                response = self.search(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
+
+    def test_range_query_uses_the_frequency_index(self):
+        queryset = CFreq.objects.using('favorites').filter(frequency__gte=1, frequency__lte=2).order_by('frequency')
+        self.assertIn('cfreq_frequency_idx', queryset.explain())
+
+
+class NameSearchTests(FavoritesFixtureMixin, TestCase):
+
+    def search(self, **params):
+        request = APIRequestFactory().get('/api/favourites/name-search/', params)
+        return NameSearchView.as_view()(request)
+
+    def names(self, **params):
+        return [(hit['kind'], hit['name']) for hit in self.search(**params).data['results']]
+
+    def test_prefix_search_returns_ranked_hits_with_paths(self):
+        favorites_list = self.make_favorites_list('f_000001.hpd', groups=2)
+
+        response = self.search(q='depart 1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        hit = response.data['results'][0]
+        self.assertEqual((hit['kind'], hit['name']), ('tgroup', 'Department 1'))
+        self.assertEqual(hit['path'], [
+            {'kind': 'favorites_list', 'id': favorites_list.pk, 'name': 'f_000001.hpd'},
+            {'kind': 'trunk_system', 'id': favorites_list.trunk_systems.get().pk, 'name': 'Trunk'},
+        ])
+
+        channels = self.search(q='chan', kind='cfreq').data['results']
+        self.assertEqual(len(channels), 6)
+        self.assertEqual([step['kind'] for step in channels[0]['path']], ['favorites_list', 'conventional_system', 'cgroup'])
+        self.assertEqual(channels[0]['frequency'], 154000000)
+        self.assertEqual(self.names(q='talkgroup', kind='tgid,site'), [('tgid', 'Talkgroup 0'), ('tgid', 'Talkgroup 1')])
+        self.assertEqual(self.search(q=' "* ').status_code, 400)
+        self.assertEqual(self.search(q='x', kind='frequency').status_code, 400)
+
+    def test_index_follows_imports_renames_and_deletes(self):
+        favorites_list = self.make_favorites_list('f_000001.hpd', groups=1)
+        group = CGroup.objects.using('favorites').get()
+
+        group.name_tag = 'Fire Dispatch'
+        group.save()
+        self.assertEqual(self.names(q='fire'), [('cgroup', 'Fire Dispatch')])
+        self.assertEqual(self.names(q='group'), [])
+
+        favorites_list.delete()
+        self.assertEqual(self.names(q='fire'), [])
+        with connections['favorites'].cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM favourites_name_search')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+
+class LocationSearchTests(FavoritesFixtureMixin, TestCase):
+
+    def search(self, **params):
+        request = APIRequestFactory().get('/api/favourites/location-search/', params)
+        return LocationSearchView.as_view()(request)
+
+    def names(self, **params):
+        return sorted((hit['kind'], hit['name_tag']) for hit in self.search(**params).data['results'])
+
+    def test_circles_and_rectangles_cover_the_point(self):
+        favorites_list = self.make_favorites_list('f_000001.hpd', groups=2)
+
+        response = self.search(latitude='35.12', longitude='-80.21')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 6)
+        hit = response.data['results'][0]
+        self.assertLess(hit['distance_miles'], 2)
+        self.assertEqual((hit['favorites_list_id'], hit['system_name']), (favorites_list.pk, 'Conventional'))
+        self.assertEqual(self.names(latitude='35.12', longitude='-80.21', kind='site'),
+                         [('site', 'Site 0'), ('site', 'Site 1')])
+
+        # Inside the rectangles but 30 miles from the circle centres
+        self.assertEqual(self.names(latitude='35.5', longitude='-80.5'), [])
+        CGroup.objects.using('favorites').filter(name_tag='Group 1').update(location_type='Rectangles')
+        tgroup = TGroup.objects.using('favorites').get(name_tag='Department 0')
+        tgroup.range_miles = 40
+        tgroup.save()
+        self.assertEqual(self.names(latitude='35.5', longitude='-80.5'),
+                         [('cgroup', 'Group 1'), ('tgroup', 'Department 0')])
+
+        self.assertEqual(self.search(latitude='95', longitude='0').status_code, 400)
+        self.assertEqual(self.search(latitude='abc', longitude='0').status_code, 400)
+        for bad in ('sNaN', 'NaN', 'inf'):
+            self.assertEqual(self.search(latitude=bad, longitude='1').status_code, 400)
+            self.assertEqual(self.search(latitude='35', longitude=bad).status_code, 400)
+        self.assertEqual(self.search(latitude='35', longitude='-80', kind='cfreq').status_code, 400)
+
+    def test_index_follows_edits_and_deletes(self):
+        favorites_list = self.make_favorites_list('f_000001.hpd', groups=1)
+        Site.objects.using('favorites').update(latitude=60, longitude=10, range_miles=100)
+        # 99.8 miles away, near the edge of the circle's bounding box
+        self.assertEqual(self.names(latitude='60.02', longitude='12.89'), [('site', 'Site 0')])
+        self.assertEqual(self.names(latitude='60.02', longitude='12.91'), [])
+        self.assertEqual(self.names(latitude='35.12', longitude='-80.21'),
+                         [('cgroup', 'Group 0'), ('tgroup', 'Department 0')])
+
+        favorites_list.delete()
+        with connections['favorites'].cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM favourites_location_index')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+
+class ClearDataTests(FavoritesFixtureMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.favorites_list = self.make_favorites_list('f_000001.hpd', groups=3)
+        self.raw_file = ScannerRawFile.objects.using('favorites').create(
+            file_name='s_000001.hpd', file_path='HPDB/s_000001.hpd', file_type='.hpd',
+            **raw_storage.pack(b'Conventional\r\n'),
+        )
+        ImportedFile.objects.using('favorites').create(
+            file_path='HPDB/s_000001.hpd', file_size=14, digest='0' * 64, raw_file=self.raw_file,
+        )
+
+    def post(self, view, **data):
+        return view.as_view()(APIRequestFactory().post('/api/favourites/clear/', data, format='json'))
+
+    def index_sizes(self):
+        with connections['favorites'].cursor() as cursor:
+            cursor.execute('SELECT (SELECT count(*) FROM favourites_name_search), '
+                           '(SELECT count(*) FROM favourites_location_index)')
+            return cursor.fetchone()
+
+    def test_clear_user_settings_deletes_everything_but_raw_files(self):
+        response = self.post(ClearUserSettingsDataView)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['mode'], 'delete')
+        self.assertEqual(response.data['deleted']['cfreq'], 9)
+        self.assertEqual(response.data['deleted']['importedfile'], 1)
+        self.assertGreater(response.data['deleted']['scannerfilerecord'], 0)
+        self.assertIn('elapsed_seconds', response.data)
+
+        self.assertFalse(FavoritesList.objects.using('favorites').exists())
+        self.assertFalse(ScannerFileRecord.objects.using('favorites').exists())
+        self.assertEqual(self.index_sizes(), (0, 0))
+        self.assertTrue(ScannerRawFile.objects.using('favorites').filter(pk=self.raw_file.pk).exists())
+        self.assertEqual(self.post(ClearUserSettingsDataView, mode='truncate').status_code, 400)
+
+    def test_recreate_mode_keeps_the_other_data(self):
+        records = ScannerFileRecord.objects.using('favorites').count()
+        indexed = self.index_sizes()
+
+        response = self.post(ClearScannerRawDataView, mode='recreate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['mode'], response.data['deleted']), ('recreate', {
+            'importedfile': 1, 'scannerrawfile': 1,
+        }))
+        self.assertFalse(ScannerRawFile.objects.using('favorites').exists())
+        self.assertEqual(ScannerFileRecord.objects.using('favorites').count(), records)
+        self.assertEqual(self.index_sizes(), indexed)
+
+        response = self.post(ClearUserSettingsDataView, mode='recreate')
+        self.assertEqual(response.data['deleted']['favoriteslist'], 1)
+        self.assertFalse(FavoritesList.objects.using('favorites').exists())
+        self.assertEqual(self.index_sizes(), (0, 0))
+        # The rebuilt database is fully usable
+        self.make_favorites_list('f_000002.hpd', groups=1)
+        self.assertEqual(self.index_sizes(), (10, 6))
+
+
+class ReplaceImportTests(FavoritesFixtureMixin, TransactionTestCase):
+
+    F_LIST = ''.join(
+        f'F-List\tList {i}\tf_00000{i}.hpd\tOff\tOff\t{i}\tOff' + '\tOff' * 10 + '\tOn' * 100 + '\r\n'
+        for i in (1, 2)
+    )
+
+    def write_files(self, groups: int) -> dict:
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        paths = {}
+        for name, data in [('f_list.cfg', self.F_LIST), ('f_000001.hpd', build_hpd(groups)),
+                           ('f_000002.hpd', build_hpd(groups))]:
+            paths[name] = Path(folder) / name
+            paths[name].write_text(data, newline='')
+        return paths
+
+    def live_list_names(self) -> list:
+        """List names as another thread (a reader) sees them."""
+        names = []
+
+        def read():
+            names.extend(FavoritesList.objects.using('favorites').order_by('order').values_list('user_name', flat=True))
+            connections.close_all()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        return names
+
+    def test_replace_builds_a_shadow_and_swaps_it_in(self):
+        import_favorites_folder(self.write_files(2))
+        old_ids = set(FavoritesList.objects.using('favorites').values_list('pk', flat=True))
+        raw_file = ScannerRawFile.objects.using('favorites').create(
+            file_name='hpdb.cfg', file_path='HPDB/hpdb.cfg', file_type='.cfg', **raw_storage.pack(b'x\r\n'),
+        )
+        seen_during_import = []
+
+        def on_progress(processed, total, message):
+            seen_during_import.append(self.live_list_names())
+
+        result = import_favorites_folder(self.write_files(4), replace=True, on_progress=on_progress)
+
+        self.assertEqual((result['imported'], result['total_favorites_lists']), (2, 2))
+        self.assertTrue(all(names == ['List 1', 'List 2'] for names in seen_during_import))
+        self.assertEqual(CFreq.objects.using('favorites').count(), 2 * 4 * 3)
+        self.assertTrue(old_ids.isdisjoint(FavoritesList.objects.using('favorites').values_list('pk', flat=True)))
+        self.assertTrue(ScannerRawFile.objects.using('favorites').filter(pk=raw_file.pk).exists())
+        self.assertEqual(ScannerRecordSource.objects.using('favorites').count(), 3)
+        self.assertEqual(len(name_search.search_names('Channel', kinds=('cfreq',), limit=100)), 24)
+        self.assertIn('cfreq_frequency_idx', CFreq.objects.using('favorites').filter(frequency=1).explain())
+
+    def test_stopped_replace_leaves_the_live_database_untouched(self):
+        import_favorites_folder(self.write_files(2))
+        cfreqs = set(CFreq.objects.using('favorites').values_list('pk', flat=True))
+
+        def on_progress(processed, total, message):
+            if processed:
+                raise RuntimeError('cancelled')
+
+        with self.assertRaises(RuntimeError):
+            import_favorites_folder(self.write_files(4), replace=True, on_progress=on_progress)
+
+        self.assertEqual(set(CFreq.objects.using('favorites').values_list('pk', flat=True)), cfreqs)
+        self.assertEqual(self.live_list_names(), ['List 1', 'List 2'])
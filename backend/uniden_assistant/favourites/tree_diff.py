@@ -0,0 +1,324 @@
+"""Apply a changed f_*.hpd file to its favourites list as a minimal delta.
+
+The previous version of the file is rebuilt from its stored
+ScannerFileRecord lines and parsed into a ParsedFavoritesFile, so old and
+new trees can be compared field by field exactly as the parser produced
+them. Each level is then aligned under its matched parents by content and
+order, and only the differences are written: changed rows are updated in
+place, new rows inserted and vanished rows deleted (their children go with
+them). Untouched rows keep their ids.
+
+The stored records only describe the database while nothing else has
+edited the list since the import, so callers must check that first;
+TreeMismatch is raised if the rows found do not line up with the old tree.
+"""
+import json
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .export_cache import bump_export_generation
+from .favorites_hpd_parser import FavoritesHPDParser, ParsedFavoritesFile
+from .models import (
+    AvoidTgid, BandPlanMot, BandPlanP25, CFreq, CGroup, ConventionalSystem, FavoritesList, FleetMap,
+    Rectangle, ScannerFileRecord, ScannerRecordSource, Site, TFreq, TGID, TGroup, TrunkSystem, UnitId,
+)
+from .record_schemas import build_records
+
+ROOT = 0  # Parent index of top-level systems; they hang off the favourites list
+
+
+class TreeMismatch(Exception):
+    """The stored records no longer describe the list's rows; re-create the tree instead."""
+
+
+def opcodes(old: list, new: list) -> List[Tuple[str, int, int, int, int]]:
+    """SequenceMatcher opcodes, with the common head and tail matched up front.
+
+    Edits are usually local, so trimming keeps the quadratic matcher to the
+    changed middle of long files.
+    """
+    head = 0
+    limit = min(len(old), len(new))
+    while head < limit and old[head] == new[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and old[-1 - tail] == new[-1 - tail]:
+        tail += 1
+
+    codes = [('equal', 0, head, 0, head)] if head else []
+    middle = SequenceMatcher(None, old[head:len(old) - tail], new[head:len(new) - tail], autojunk=False)
+    for tag, i1, i2, j1, j2 in middle.get_opcodes():
+        codes.append((tag, head + i1, head + i2, head + j1, head + j2))
+    if tail:
+        codes.append(('equal', len(old) - tail, len(old), len(new) - tail, len(new)))
+    return codes
+
+
+def _content_key(kwargs: dict) -> str:
+    return json.dumps({key: value for key, value in kwargs.items() if key != 'order'}, sort_keys=True, default=str)
+
+
+def _raw_line(record: dict) -> str:
+    return '\t'.join([record['record_type']] + record['fields'])
+
+
+def stored_source(favorites_list: FavoritesList, using: str = 'favorites') -> Optional[ScannerRecordSource]:
+    sources = list(ScannerRecordSource.objects.using(using).filter(
+        file_path='favorites_lists/' + favorites_list.filename
+    )[:2])
+    return sources[0] if len(sources) == 1 else None
+
+
+def stored_tree(source: ScannerRecordSource, using: str = 'favorites') -> ParsedFavoritesFile:
+    """Re-parse a source's stored lines into the tree they were imported as."""
+    records = ScannerFileRecord.objects.using(using).filter(source=source).select_related('schema')
+    lines = ((record.line_number, record.raw_line) for record in records.order_by('line_number').iterator())
+    return FavoritesHPDParser().parse_lines(lines, source.file_name)
+
+
+class TreeDelta:
+    """Minimal inserts, updates and deletes turning one stored tree into another."""
+
+    def __init__(self, favorites_list: FavoritesList, using: str = 'favorites', batch_size: Optional[int] = None) -> None:
+        self.favorites_list = favorites_list
+        self.using = using
+        self.parser = FavoritesHPDParser(batch_size=batch_size)
+        self.counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        self._updates = []  # (model, pk, changed fields)
+        self._deletes = defaultdict(list)  # model -> pks
+
+    def apply(self, source: ScannerRecordSource, old: ParsedFavoritesFile, new: ParsedFavoritesFile) -> dict:
+        """Write the difference between `old` (what the rows hold now) and `new`; returns row counts."""
+        list_id = self.favorites_list.pk
+        with transaction.atomic(using=self.using):
+            root_match, root_old, root_new = {ROOT: ROOT}, {ROOT: list_id}, {ROOT: list_id}
+            conventional = self._level(
+                ConventionalSystem, 'favorites_list', 'favorites_list',
+                [(ROOT, kwargs) for kwargs in old.conventional_systems],
+                [(ROOT, kwargs) for kwargs in new.conventional_systems],
+                root_match, root_old, root_new,
+            )
+            cgroups = self._level(
+                CGroup, 'conventional_system', 'conventional_system__favorites_list',
+                old.cgroups, new.cgroups, *conventional,
+            )
+            self._level(CFreq, 'cgroup', 'cgroup__conventional_system__favorites_list', old.cfreqs, new.cfreqs, *cgroups)
+
+            trunk = self._level(
+                TrunkSystem, 'favorites_list', 'favorites_list',
+                [(ROOT, kwargs) for kwargs in old.trunk_systems],
+                [(ROOT, kwargs) for kwargs in new.trunk_systems],
+                root_match, root_old, root_new,
+            )
+            for model, attr in ((FleetMap, 'fleet_maps'), (UnitId, 'unit_ids'), (AvoidTgid, 'avoid_tgids')):
+                self._level(
+                    model, 'trunk_system', 'trunk_system__favorites_list',
+                    getattr(old, attr), getattr(new, attr), *trunk,
+                )
+            sites = self._level(Site, 'trunk_system', 'trunk_system__favorites_list', old.sites, new.sites, *trunk)
+            self._one_per_parent(BandPlanP25, old.bandplans_p25, new.bandplans_p25, *sites)
+            self._one_per_parent(BandPlanMot, old.bandplans_mot, new.bandplans_mot, *sites)
+            self._level(TFreq, 'site', 'site__trunk_system__favorites_list', old.tfreqs, new.tfreqs, *sites)
+            tgroups = self._level(
+                TGroup, 'trunk_system', 'trunk_system__favorites_list', old.tgroups, new.tgroups, *trunk,
+            )
+            self._level(TGID, 'tgroup', 'tgroup__trunk_system__favorites_list', old.tgids, new.tgids, *tgroups)
+
+            parents = {'site': sites, 'tgroup': tgroups, 'cgroup': cgroups}
+            list_paths = {
+                'site': 'site__trunk_system__favorites_list',
+                'tgroup': 'tgroup__trunk_system__favorites_list',
+                'cgroup': 'cgroup__conventional_system__favorites_list',
+            }
+            for parent_type, parent_levels in parents.items():
+                self._level(
+                    Rectangle, parent_type, list_paths[parent_type],
+                    [(idx, kwargs) for kind, idx, kwargs in old.rectangles if kind == parent_type],
+                    [(idx, kwargs) for kind, idx, kwargs in new.rectangles if kind == parent_type],
+                    *parent_levels,
+                )
+
+            self._write()
+            lines_changed = self._apply_records(source, old.records, new.records)
+            header_changed = self._apply_list_header(new)
+        if any(self.counts.values()) or lines_changed or header_changed:
+            bump_export_generation(list_id)
+        return dict(self.counts)
+
+    def _rows(self, model, parent_field: str, list_path: str) -> Dict[int, list]:
+        """(pk, order) of the list's rows of `model`, grouped by parent id in export order."""
+        rows = defaultdict(list)
+        for pk, parent_id, order in model.objects.using(self.using).filter(
+            **{list_path: self.favorites_list.pk}
+        ).order_by(parent_field, 'order', 'pk').values_list('pk', parent_field, 'order'):
+            rows[parent_id].append((pk, order))
+        return rows
+
+    def _level(self, model, parent_field, list_path, old_items, new_items, parent_match, old_parent_ids, new_parent_ids):
+        """Diff one level of the hierarchy under its already matched parents.
+
+        Items are (parent index, kwargs). Returns the same triple the level
+        was given for its parents: {new index: old index} for matched rows,
+        {old index: pk} and {new index: pk}.
+        """
+        old_children = defaultdict(list)
+        for idx, (parent, _) in enumerate(old_items):
+            old_children[parent].append(idx)
+        new_children = defaultdict(list)
+        for idx, (parent, _) in enumerate(new_items):
+            new_children[parent].append(idx)
+
+        rows = self._rows(model, parent_field, list_path)
+        if sum(len(parent_rows) for parent_rows in rows.values()) != len(old_items):
+            raise TreeMismatch(model.__name__)
+        old_rows = {}
+        for old_parent, parent_pk in old_parent_ids.items():
+            indexes = old_children.get(old_parent, [])
+            parent_rows = rows.get(parent_pk, [])
+            if len(indexes) != len(parent_rows):
+                raise TreeMismatch(model.__name__)
+            old_rows.update(zip(indexes, parent_rows))
+
+        match, new_ids, inserts = {}, {}, []
+        for new_parent, parent_pk in new_parent_ids.items():
+            new_indexes = new_children.get(new_parent, [])
+            old_parent = parent_match.get(new_parent)
+            old_indexes = old_children.get(old_parent, []) if old_parent is not None else []
+            codes = opcodes(
+                [_content_key(old_items[idx][1]) for idx in old_indexes],
+                [_content_key(new_items[idx][1]) for idx in new_indexes],
+            )
+            for tag, i1, i2, j1, j2 in codes:
+                paired = min(i2 - i1, j2 - j1)
+                for old_idx, new_idx in zip(old_indexes[i1:i1 + paired], new_indexes[j1:j1 + paired]):
+                    pk, order = old_rows[old_idx]
+                    match[new_idx] = old_idx
+                    new_ids[new_idx] = pk
+                    self._update(model, pk, order, old_items[old_idx][1], new_items[new_idx][1])
+                for old_idx in old_indexes[i1 + paired:i2]:
+                    self._deletes[model].append(old_rows[old_idx][0])
+                for new_idx in new_indexes[j1 + paired:j2]:
+                    inserts.append((new_idx, model(**{parent_field + '_id': parent_pk}, **new_items[new_idx][1])))
+
+        self.parser._insert(model, [obj for _, obj in inserts])
+        for new_idx, obj in inserts:
+            new_ids[new_idx] = obj.pk
+        self.counts['inserted'] += len(inserts)
+        return match, {idx: pk for idx, (pk, _) in old_rows.items()}, new_ids
+
+    def _one_per_parent(self, model, old_items, new_items, parent_match, old_parent_ids, new_parent_ids):
+        """Diff a record that occurs at most once per parent (a site's band plan)."""
+        rows = dict(model.objects.using(self.using).filter(
+            site__trunk_system__favorites_list=self.favorites_list.pk
+        ).values_list('site', 'pk'))
+        if len(rows) != len(old_items):
+            raise TreeMismatch(model.__name__)
+        inserts = []
+        for new_parent, parent_pk in new_parent_ids.items():
+            old_parent = parent_match.get(new_parent)
+            old_kwargs = old_items.get(old_parent) if old_parent is not None else None
+            new_kwargs = new_items.get(new_parent)
+            pk = rows.get(old_parent_ids[old_parent]) if old_kwargs is not None else None
+            if old_kwargs is not None and pk is None:
+                raise TreeMismatch(model.__name__)
+            if new_kwargs is None:
+                if pk is not None:
+                    self._deletes[model].append(pk)
+            elif pk is None:
+                inserts.append(model(site_id=parent_pk, **new_kwargs))
+            else:
+                self._update(model, pk, None, old_kwargs, new_kwargs)
+        self.parser._insert(model, inserts)
+        self.counts['inserted'] += len(inserts)
+
+    def _update(self, model, pk: int, order: Optional[int], old_kwargs: dict, new_kwargs: dict) -> None:
+        changed = {
+            key: value for key, value in new_kwargs.items()
+            if key != 'order' and old_kwargs.get(key) != value
+        }
+        # Fields only set by an optional record (e.g. DQKs_Status) go back to their defaults
+        for key in old_kwargs.keys() - new_kwargs.keys():
+            changed[key] = model._meta.get_field(key).get_default()
+        if order is not None and order != new_kwargs.get('order', order):
+            changed['order'] = new_kwargs['order']
+        if changed:
+            self._updates.append((model, pk, changed))
+
+    def _write(self) -> None:
+        now = timezone.now()
+        for model, pk, changed in self._updates:
+            model.objects.using(self.using).filter(pk=pk).update(updated_at=now, **changed)
+        self.counts['updated'] += len(self._updates)
+        for model, pks in self._deletes.items():
+            model.objects.using(self.using).filter(pk__in=pks).delete()
+            self.counts['deleted'] += len(pks)
+
+    def _apply_records(self, source: ScannerRecordSource, old_records: list, new_records: list) -> bool:
+        """Patch the stored lines: drop and add changed ranges, renumber the rest; True if any line changed."""
+        records = ScannerFileRecord.objects.using(self.using).filter(source=source)
+        old_lines = [_raw_line(record) for record in old_records]
+        new_lines = [_raw_line(record) for record in new_records]
+        inserts = []
+        moves = []
+        deleted = False
+        for tag, i1, i2, j1, j2 in opcodes(old_lines, new_lines):
+            if tag == 'equal':
+                # Runs of lines that moved by the same amount (blank lines may differ)
+                for old_record, new_record in zip(old_records[i1:i2], new_records[j1:j2]):
+                    line_number = old_record['line_number']
+                    shift = new_record['line_number'] - line_number
+                    if moves and moves[-1][2] == shift and moves[-1][1] == line_number - 1:
+                        moves[-1][1] = line_number
+                    else:
+                        moves.append([line_number, line_number, shift])
+                continue
+            if i2 > i1:
+                records.filter(
+                    line_number__gte=old_records[i1]['line_number'],
+                    line_number__lte=old_records[i2 - 1]['line_number'],
+                ).delete()
+                deleted = True
+            inserts.extend(new_records[j1:j2])
+
+        # Renumber through negative line numbers so moved ranges never overlap ones still to move
+        moves = [move for move in moves if move[2]]
+        for first, last, shift in moves:
+            records.filter(line_number__gte=first, line_number__lte=last).update(
+                line_number=-(F('line_number') + shift)
+            )
+        if moves:
+            records.filter(line_number__lt=0).update(line_number=-F('line_number'))
+        if inserts:
+            self.parser._insert(ScannerFileRecord, build_records(source, inserts, using=self.using))
+        return bool(deleted or inserts or moves)
+
+    def _apply_list_header(self, new: ParsedFavoritesFile) -> bool:
+        """Copy a changed TargetModel or FormatVersion onto the list; True if either changed."""
+        changed = {}
+        if new.scanner_model is not None and new.scanner_model != self.favorites_list.scanner_model:
+            changed['scanner_model'] = new.scanner_model
+        if new.format_version is not None and new.format_version != self.favorites_list.format_version:
+            changed['format_version'] = new.format_version
+        if changed:
+            for field_name, value in changed.items():
+                setattr(self.favorites_list, field_name, value)
+            self.favorites_list.save(update_fields=list(changed))
+        return bool(changed)
+
+
+def apply_file_delta(favorites_list: FavoritesList, tree: ParsedFavoritesFile, using: str = 'favorites') -> dict:
+    """Bring the list's rows and stored lines up to date with a re-parsed file.
+
+    Raises TreeMismatch (leaving the database untouched) if the stored
+    records cannot be lined up with the rows.
+    """
+    source = stored_source(favorites_list, using=using)
+    if source is None:
+        raise TreeMismatch('stored records')
+    with transaction.atomic(using=using):
+        return TreeDelta(favorites_list, using=using).apply(source, stored_tree(source, using=using), tree)
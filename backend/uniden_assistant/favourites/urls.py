@@ -4,7 +4,8 @@ from .views import (
     ScannerProfileViewSet, FrequencyViewSet, ChannelGroupViewSet, AgencyViewSet, SDCardViewSet,
     FavoritesListViewSet, FavoritesImportViewSet, UserSettingsStatsView, ClearUserSettingsDataView,
     ClearScannerRawDataView, ExportFavoritesFolderView, CGroupViewSet, TGroupViewSet,
-    CFreqViewSet, TGIDViewSet, ConventionalSystemViewSet, TrunkSystemViewSet,
+    CFreqViewSet, TGIDViewSet, ConventionalSystemViewSet, TrunkSystemViewSet, FrequencySearchView,
+    NameSearchView, LocationSearchView,
 )
 
 router = DefaultRouter()
@@ -27,5 +28,8 @@ urlpatterns = [
     path('clear-data/', ClearUserSettingsDataView.as_view()),
     path('clear-raw-data/', ClearScannerRawDataView.as_view()),
     path('export-favorites/', ExportFavoritesFolderView.as_view()),
+    path('frequency-search/', FrequencySearchView.as_view()),
+    path('name-search/', NameSearchView.as_view()),
+    path('location-search/', LocationSearchView.as_view()),
     path('', include(router.urls)),
 ]
@@ -5,17 +5,21 @@ from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from django.db.utils import DatabaseError
 from django.db import models
+from django.db.models import Count
+import codecs
 import logging
+from collections import defaultdict
 from django.shortcuts import get_object_or_404
 from django.conf import settings
 from pathlib import Path
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 import io
 import zipfile
+from decimal import Decimal, InvalidOperation
 from .models import (
-    ScannerProfile, Frequency, ChannelGroup, Agency, FavoritesList, ScannerRawFile, ScannerRawLine,
-    ConventionalSystem, TrunkSystem, CGroup, CFreq, Site, BandPlanP25, BandPlanMot, TFreq, TGroup,
-    TGID, Rectangle, FleetMap, UnitId, AvoidTgid
+    ScannerProfile, Frequency, ChannelGroup, Agency, FavoritesList,
+    ConventionalSystem, TrunkSystem, CGroup, CFreq, Site, BandPlanP25, BandPlanMot, TGroup,
+    TGID, Rectangle, FleetMap
 )
 from .serializers import (
     ScannerProfileSerializer, FrequencySerializer, ChannelGroupSerializer,
@@ -24,6 +28,10 @@ from .serializers import (
     CGroupWriteSerializer, TGroupWriteSerializer
 )
 from .parsers import UnidenFileParser
+from .export_cache import ExportCache, bump_export_generation
+from .export_data import FavoritesExportData
+from . import bulk_clear, frequency_search, location_search, name_search
+from .incremental_import import import_favorites_folder
 import tempfile
 
 logger = logging.getLogger(__name__)
@@ -64,36 +72,44 @@ class UserSettingsStatsView(APIView):
             })
 
 
+def _clear_mode(request):
+    """True for mode=recreate, False for mode=delete (the default); ValidationError otherwise."""
+    mode = request.data.get('mode') or request.query_params.get('mode') or 'delete'
+    if mode not in ('delete', 'recreate'):
+        raise ValidationError({'mode': 'must be delete or recreate'})
+    return mode == 'recreate'
+
+
+def _json_compact(request):
+    """compact=true|false (default false) for JSON exports; ValidationError otherwise."""
+    value = request.data.get('compact', request.query_params.get('compact', False))
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ('true', '1', 'yes', 'on'):
+        return True
+    if str(value).lower() in ('false', '0', 'no', 'off', ''):
+        return False
+    raise ValidationError({'compact': 'must be true or false'})
+
+
 class ClearUserSettingsDataView(APIView):
-    """Clear all user settings and favourites data"""
+    """Clear all user settings and favourites data
+
+    mode=delete (default) empties the tables in one transaction;
+    mode=recreate rebuilds the database file with only the scanner raw
+    data (see bulk_clear.py). The response reports rows deleted per model
+    and the elapsed time.
+    """
 
     def post(self, request):
+        recreate = _clear_mode(request)
         try:
             logger.info("Clearing all user settings and favourites data")
-            
-            # Clear all data from favorites database
-            ScannerProfile.objects.using('favorites').all().delete()
-            Frequency.objects.using('favorites').all().delete()
-            ChannelGroup.objects.using('favorites').all().delete()
-            Agency.objects.using('favorites').all().delete()
-            FavoritesList.objects.using('favorites').all().delete()
-            ConventionalSystem.objects.using('favorites').all().delete()
-            TrunkSystem.objects.using('favorites').all().delete()
-            CGroup.objects.using('favorites').all().delete()
-            CFreq.objects.using('favorites').all().delete()
-            Site.objects.using('favorites').all().delete()
-            BandPlanP25.objects.using('favorites').all().delete()
-            BandPlanMot.objects.using('favorites').all().delete()
-            TFreq.objects.using('favorites').all().delete()
-            TGroup.objects.using('favorites').all().delete()
-            TGID.objects.using('favorites').all().delete()
-            Rectangle.objects.using('favorites').all().delete()
-            FleetMap.objects.using('favorites').all().delete()
-            UnitId.objects.using('favorites').all().delete()
-            AvoidTgid.objects.using('favorites').all().delete()
-            
+            result = bulk_clear.clear(bulk_clear.USER_SETTINGS_PLAN, recreate=recreate)
+            ExportCache().clear()
+
             logger.info("Cleared all user settings and favourites data successfully")
-            return Response({'success': True, 'message': 'All user settings and favourites data cleared'})
+            return Response(dict(result, success=True, message='All user settings and favourites data cleared'))
         except DatabaseError as e:
             logger.exception("Failed to clear user settings data", exc_info=e)
             return Response(
@@ -109,46 +125,259 @@ class ClearUserSettingsDataView(APIView):
 
 
 class ClearScannerRawDataView(APIView):
-    """Clear all raw scanner file data from the database"""
+    """Clear all raw scanner file data from the database
+
+    Accepts the same mode=delete|recreate as ClearUserSettingsDataView.
+    """
 
     def post(self, request):
+        recreate = _clear_mode(request)
         try:
             logger.info("Clearing scanner raw data")
-            # Delete raw files and lines (cascades to lines automatically)
-            ScannerRawFile.objects.using('favorites').all().delete()
-            
+            # Each raw file is a single row holding the compressed file
+            result = bulk_clear.clear(bulk_clear.SCANNER_RAW_PLAN, recreate=recreate)
+
             logger.info("Scanner raw data cleared successfully")
-            return Response({'message': 'Scanner raw data cleared successfully'}, status=status.HTTP_200_OK)
+            return Response(dict(result, message='Scanner raw data cleared successfully'), status=status.HTTP_200_OK)
         except Exception as e:
             logger.exception("Failed to clear scanner raw data", exc_info=e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class FrequencySearchView(APIView):
+    """Find C-Freq and T-Freq channels by frequency across all favourites lists.
+
+    Query parameters: frequency (MHz), then either tolerance (kHz, default 0)
+    for every channel within +/- tolerance, or nearest=N for the N closest
+    channels. kind=cfreq|tfreq limits the search to one channel type.
+    """
+
+    MAX_RESULTS = 5000
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            frequency = frequency_search.mhz_to_hz(params.get('frequency', ''))
+            tolerance = frequency_search.khz_to_hz(params.get('tolerance') or '0')
+            nearest = int(params['nearest']) if params.get('nearest') else None
+            limit = int(params['limit']) if params.get('limit') else self.MAX_RESULTS
+            if limit < 1:
+                raise ValueError(f'Invalid limit: {limit}')
+            limit = min(limit, self.MAX_RESULTS)
+        except ValueError:
+            return Response({'error': 'frequency must be in MHz, tolerance in kHz, nearest and limit whole numbers '
+                                      '(limit at least 1)'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        kinds = frequency_search.KINDS
+        if params.get('kind'):
+            if params['kind'] not in frequency_search.KINDS:
+                return Response({'error': f"kind must be one of {', '.join(frequency_search.KINDS)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            kinds = (params['kind'],)
+
+        try:
+            if nearest is not None:
+                results = frequency_search.nearest_frequencies(frequency, min(max(nearest, 1), limit), kinds=kinds)
+            else:
+                results = frequency_search.frequency_range(
+                    frequency - abs(tolerance), frequency + abs(tolerance), kinds=kinds, limit=limit,
+                )
+                for hit in results:
+                    hit['offset'] = hit['frequency'] - frequency
+        except DatabaseError as exc:
+            logger.exception("Frequency search failed", exc_info=exc)
+            return Response({'error': str(exc), 'host': _favorites_db_host()},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({'frequency': frequency, 'count': len(results), 'results': results})
+
+
+class NameSearchView(APIView):
+    """Search list, system, group, site and channel names across all favourites lists.
+
+    Query parameters: q (every word is matched as a prefix), optional
+    kind=<kind>[,<kind>...] to limit the record types, and limit. Hits are
+    ranked best first and carry their list/system/group path.
+    """
+
+    MAX_RESULTS = 500
+
+    def get(self, request):
+        params = request.query_params
+        text = params.get('q', '')
+        if not name_search.match_query(text):
+            return Response({'error': 'q must contain at least one word'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(params.get('limit') or 50), self.MAX_RESULTS)
+        except ValueError:
+            return Response({'error': 'limit must be a whole number'}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = name_search.KINDS
+        if params.get('kind'):
+            kinds = tuple(params['kind'].split(','))
+            if not set(kinds) <= set(name_search.KINDS):
+                return Response({'error': f"kind must be one of {', '.join(name_search.KINDS)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = name_search.search_names(text, kinds=kinds, limit=max(limit, 1))
+        except DatabaseError as exc:
+            logger.exception("Name search failed", exc_info=exc)
+            return Response({'error': str(exc), 'host': _favorites_db_host()},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({'query': text, 'count': len(results), 'results': results})
+
+
+class LocationSearchView(APIView):
+    """Groups and sites whose location control covers a GPS position.
+
+    Query parameters: latitude and longitude (decimal degrees), optional
+    kind=cgroup|tgroup|site[,...]. Circle entries match within their range,
+    Rectangles entries when the point is inside one of their rectangles.
+    """
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            latitude = float(Decimal(params.get('latitude', '')))
+            longitude = float(Decimal(params.get('longitude', '')))
+        except (InvalidOperation, ValueError):
+            latitude = longitude = None
+        if latitude is None or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return Response({'error': 'latitude and longitude must be decimal degrees'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        kinds = location_search.KINDS
+        if params.get('kind'):
+            kinds = tuple(params['kind'].split(','))
+            if not set(kinds) <= set(location_search.KINDS):
+                return Response({'error': f"kind must be one of {', '.join(location_search.KINDS)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = location_search.active_at(latitude, longitude, kinds=kinds)
+        except DatabaseError as exc:
+            logger.exception("Location search failed", exc_info=exc)
+            return Response({'error': str(exc), 'host': _favorites_db_host()},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({'latitude': latitude, 'longitude': longitude, 'count': len(results), 'results': results})
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink for zipfile that hands written bytes to a generator."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
 class ExportFavoritesFolderView(APIView):
-    """Export all favorites lists to a zip file containing favorites_lists directory."""
+    """Export all favorites lists to a zip file containing favorites_lists directory.
+
+    The archive is streamed: each entry is compressed and sent as it is
+    generated, so memory use does not grow with the number of lists. The
+    finished archive and each f_*.hpd are kept in the export cache and served
+    from disk until a list changes.
+    """
+
+    # Lists whose hierarchy is loaded together; bounds memory while streaming
+    STREAM_BATCH_SIZE = 25
+    # Uncompressed text gathered before each write into the zip stream
+    STREAM_CHUNK_SIZE = 64 * 1024
 
     def get(self, request):
+        favorites_lists = list(FavoritesList.objects.using('favorites').all().order_by('order', 'filename'))
+        cache = ExportCache()
+        cached = cache.get(cache.zip_path(favorites_lists))
+        if cached is not None:
+            response = FileResponse(open(cached, 'rb'), content_type='application/zip')
+        else:
+            response = StreamingHttpResponse(self._iter_zip(favorites_lists, cache), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="favorites_lists_export.zip"'
+        return response
+
+    def _iter_zip(self, favorites_lists, cache: ExportCache):
+        buffer = _ZipStreamBuffer()
         try:
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                f_list_content = self._build_f_list_cfg()
-                zip_file.writestr('favorites_lists/f_list.cfg', f_list_content)
-
-                favorites_lists = FavoritesList.objects.using('favorites').all().order_by('order', 'filename')
-                for favorites_list in favorites_lists:
-                    hpd_content = self._build_favorites_hpd(favorites_list)
-                    zip_file.writestr(f"favorites_lists/{favorites_list.filename}", hpd_content)
-
-            zip_buffer.seek(0)
-            response = HttpResponse(zip_buffer.read(), content_type='application/zip')
-            response['Content-Disposition'] = 'attachment; filename="favorites_lists_export.zip"'
-            return response
+            # The archive is written to the cache as it streams; it is kept only if it completes
+            with cache.writer(cache.zip_path(favorites_lists)) as cache_file:
+                def drain():
+                    output = buffer.drain()
+                    cache_file.write(output)
+                    return output
+
+                with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                    zip_file.writestr('favorites_lists/f_list.cfg', self._build_f_list_cfg(favorites_lists))
+                    yield drain()
+
+                    for start in range(0, len(favorites_lists), self.STREAM_BATCH_SIZE):
+                        batch = favorites_lists[start:start + self.STREAM_BATCH_SIZE]
+                        uncached = [fl for fl in batch if cache.get(cache.hpd_path(fl)) is None]
+                        data = FavoritesExportData(uncached) if uncached else None
+                        for favorites_list in batch:
+                            with zip_file.open(f"favorites_lists/{favorites_list.filename}", 'w') as entry:
+                                for chunk in self._iter_hpd_chunks(favorites_list, data, cache):
+                                    entry.write(chunk)
+                                    output = drain()
+                                    if output:
+                                        yield output
+                            yield drain()
+                # Central directory
+                yield drain()
         except Exception as exc:
+            # Headers are already sent; the client sees a truncated archive
             logger.exception("Failed to export favorites folder", exc_info=exc)
-            return Response({'error': str(exc)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            raise
 
-    def _build_f_list_cfg(self) -> str:
-        favorites_lists = FavoritesList.objects.using('favorites').all().order_by('filename')
+    def _iter_hpd_chunks(self, favorites_list: FavoritesList, data: FavoritesExportData, cache: ExportCache):
+        """Yield the encoded f_*.hpd of one list, from the cache or generated and cached on the way."""
+        path = cache.hpd_path(favorites_list)
+        try:
+            fh = open(path, 'rb')
+        except FileNotFoundError:
+            # Not cached, or invalidated by an edit since the batch was loaded
+            pass
+        else:
+            with fh:
+                while True:
+                    chunk = fh.read(self.STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+        if data is not None and not data.holds(favorites_list):
+            # The batch skipped this list because it was cached then; never export it from rows it lacks
+            data = None
+        with cache.writer(path) as cache_file:
+            for text in self._iter_text_chunks(self._iter_favorites_hpd_lines(favorites_list, data)):
+                chunk = text.encode('utf-8')
+                cache_file.write(chunk)
+                yield chunk
+
+    def _iter_text_chunks(self, lines):
+        """Group CRLF-terminated lines into chunks of about STREAM_CHUNK_SIZE characters."""
+        pending = []
+        size = 0
+        for line in lines:
+            pending.append(line)
+            size += len(line) + 2
+            if size >= self.STREAM_CHUNK_SIZE:
+                yield '\r\n'.join(pending) + '\r\n'
+                pending = []
+                size = 0
+        if pending:
+            yield '\r\n'.join(pending) + '\r\n'
+
+    def _build_f_list_cfg(self, favorites_lists: list[FavoritesList]) -> str:
+        favorites_lists = sorted(favorites_lists, key=lambda fav: fav.filename)
         scanner_model = favorites_lists[0].scanner_model if favorites_lists else 'BCDx36HP'
         format_version = favorites_lists[0].format_version if favorites_lists else '1.00'
 
@@ -177,15 +406,19 @@ class ExportFavoritesFolderView(APIView):
 
         return '\r\n'.join(lines) + '\r\n'
 
-    def _build_favorites_hpd(self, favorites_list: FavoritesList) -> str:
-        lines = [
-            self._join_record('TargetModel', [favorites_list.scanner_model or 'BCDx36HP']),
-            self._join_record('FormatVersion', [favorites_list.format_version or '1.00']),
-        ]
+    def _build_favorites_hpd(self, favorites_list: FavoritesList, data: FavoritesExportData = None) -> str:
+        return '\r\n'.join(self._iter_favorites_hpd_lines(favorites_list, data)) + '\r\n'
+
+    def _iter_favorites_hpd_lines(self, favorites_list: FavoritesList, data: FavoritesExportData = None):
+        """Yield the records of one f_*.hpd file, without line endings."""
+        if data is None:
+            data = FavoritesExportData([favorites_list])
 
-        conventional_systems = favorites_list.conventional_systems.using('favorites').all().order_by('order')
-        for system in conventional_systems:
-            lines.append(self._join_record('Conventional', [
+        yield self._join_record('TargetModel', [favorites_list.scanner_model or 'BCDx36HP'])
+        yield self._join_record('FormatVersion', [favorites_list.format_version or '1.00'])
+
+        for system in data.conventional_systems_for(favorites_list):
+            yield self._join_record('Conventional', [
                 system.my_id or '',
                 system.parent_id or '',
                 system.name_tag or '',
@@ -200,14 +433,13 @@ class ExportFavoritesFolderView(APIView):
                 str(system.digital_waiting_time),
                 system.digital_threshold_mode or 'Manual',
                 str(system.digital_threshold_level),
-            ]))
+            ])
 
             dqks_flags = self._pad_list(system.dqks_status, 100, 'Off')
-            lines.append(self._join_record('DQKs_Status', [system.dqks_my_id or '', *dqks_flags]))
+            yield self._join_record('DQKs_Status', [system.dqks_my_id or '', *dqks_flags])
 
-            cgroups = system.cgroups.using('favorites').all().order_by('order')
-            for group in cgroups:
-                lines.append(self._join_record('C-Group', [
+            for group in data.cgroups_for(system):
+                yield self._join_record('C-Group', [
                     group.my_id or '',
                     group.parent_id or '',
                     group.name_tag or '',
@@ -218,11 +450,10 @@ class ExportFavoritesFolderView(APIView):
                     group.location_type or 'Circle',
                     group.quick_key or 'Off',
                     group.filter or '',
-                ]))
+                ])
 
-                cfreqs = group.cfreqs.using('favorites').all().order_by('order')
-                for cfreq in cfreqs:
-                    lines.append(self._join_record('C-Freq', [
+                for cfreq in data.cfreqs_for(group):
+                    yield self._join_record('C-Freq', [
                         cfreq.my_id or '',
                         cfreq.parent_id or '',
                         cfreq.name_tag or '',
@@ -240,21 +471,19 @@ class ExportFavoritesFolderView(APIView):
                         cfreq.alert_pattern or 'On',
                         cfreq.number_tag or 'Off',
                         cfreq.priority_channel or 'Off',
-                    ]))
+                    ])
 
-                rectangles = group.rectangles.using('favorites').all().order_by('order')
-                for rect in rectangles:
-                    lines.append(self._join_record('Rectangle', [
+                for rect in data.rectangles_for(group):
+                    yield self._join_record('Rectangle', [
                         rect.my_id or '',
                         self._format_decimal(rect.latitude1, 6),
                         self._format_decimal(rect.longitude1, 6),
                         self._format_decimal(rect.latitude2, 6),
                         self._format_decimal(rect.longitude2, 6),
-                    ]))
+                    ])
 
-        trunk_systems = favorites_list.trunk_systems.using('favorites').all().order_by('order')
-        for system in trunk_systems:
-            lines.append(self._join_record('Trunk', [
+        for system in data.trunk_systems_for(favorites_list):
+            yield self._join_record('Trunk', [
                 system.my_id or '',
                 system.parent_id or '',
                 system.name_tag or '',
@@ -276,19 +505,17 @@ class ExportFavoritesFolderView(APIView):
                 system.alert_color or 'Off',
                 system.alert_pattern or 'On',
                 system.tgid_format or '',
-            ]))
+            ])
 
             dqks_flags = self._pad_list(system.dqks_status, 100, 'Off')
-            lines.append(self._join_record('DQKs_Status', [system.dqks_my_id or '', *dqks_flags]))
+            yield self._join_record('DQKs_Status', [system.dqks_my_id or '', *dqks_flags])
 
-            fleet_maps = system.fleet_maps.using('favorites').all().order_by('order')
-            for fleet in fleet_maps:
+            for fleet in data.fleet_maps_for(system):
                 blocks = self._pad_list(fleet.blocks, 8, '0')
-                lines.append(self._join_record('FleetMap', [fleet.my_id or '', *blocks]))
+                yield self._join_record('FleetMap', [fleet.my_id or '', *blocks])
 
-            unit_ids = system.unit_ids.using('favorites').all().order_by('order')
-            for unit in unit_ids:
-                lines.append(self._join_record('UnitIds', [
+            for unit in data.unit_ids_for(system):
+                yield self._join_record('UnitIds', [
                     unit.reserve1 or '',
                     unit.reserve2 or '',
                     unit.name_tag or '',
@@ -297,15 +524,13 @@ class ExportFavoritesFolderView(APIView):
                     unit.alert_volume or 'Auto',
                     unit.alert_color or 'Off',
                     unit.alert_pattern or 'On',
-                ]))
+                ])
 
-            avoid_tgids = system.avoid_tgids.using('favorites').all().order_by('order')
-            for avoid in avoid_tgids:
-                lines.append(self._join_record('AvoidTgids', [avoid.my_id or '', *avoid.tgids]))
+            for avoid in data.avoid_tgids_for(system):
+                yield self._join_record('AvoidTgids', [avoid.my_id or '', *avoid.tgids])
 
-            sites = system.sites.using('favorites').all().order_by('order')
-            for site in sites:
-                lines.append(self._join_record('Site', [
+            for site in data.sites_for(system):
+                yield self._join_record('Site', [
                     site.my_id or '',
                     site.parent_id or '',
                     site.name_tag or '',
@@ -322,16 +547,17 @@ class ExportFavoritesFolderView(APIView):
                     site.digital_threshold_mode or 'Manual',
                     str(site.digital_threshold_level),
                     site.quick_key or 'Off',
-                ]))
+                ])
 
-                if hasattr(site, 'bandplan_p25') and site.bandplan_p25:
-                    lines.append(self._join_record('BandPlan_P25', self._format_bandplan_p25(site.bandplan_p25)))
-                if hasattr(site, 'bandplan_mot') and site.bandplan_mot:
-                    lines.append(self._join_record('BandPlan_Mot', self._format_bandplan_mot(site.bandplan_mot)))
+                bandplan_p25 = data.bandplan_p25_for(site)
+                if bandplan_p25:
+                    yield self._join_record('BandPlan_P25', self._format_bandplan_p25(bandplan_p25, site))
+                bandplan_mot = data.bandplan_mot_for(site)
+                if bandplan_mot:
+                    yield self._join_record('BandPlan_Mot', self._format_bandplan_mot(bandplan_mot, site))
 
-                tfreqs = site.tfreqs.using('favorites').all().order_by('order')
-                for tfreq in tfreqs:
-                    lines.append(self._join_record('T-Freq', [
+                for tfreq in data.tfreqs_for(site):
+                    yield self._join_record('T-Freq', [
                         tfreq.reserve_my_id or '',
                         tfreq.parent_id or '',
                         tfreq.reserve1 or '',
@@ -339,21 +565,19 @@ class ExportFavoritesFolderView(APIView):
                         str(tfreq.frequency),
                         str(tfreq.lcn),
                         tfreq.color_code_ran_area or '',
-                    ]))
+                    ])
 
-                rectangles = site.rectangles.using('favorites').all().order_by('order')
-                for rect in rectangles:
-                    lines.append(self._join_record('Rectangle', [
+                for rect in data.rectangles_for(site):
+                    yield self._join_record('Rectangle', [
                         rect.my_id or '',
                         self._format_decimal(rect.latitude1, 6),
                         self._format_decimal(rect.longitude1, 6),
                         self._format_decimal(rect.latitude2, 6),
                         self._format_decimal(rect.longitude2, 6),
-                    ]))
+                    ])
 
-            tgroups = system.tgroups.using('favorites').all().order_by('order')
-            for tgroup in tgroups:
-                lines.append(self._join_record('T-Group', [
+            for tgroup in data.tgroups_for(system):
+                yield self._join_record('T-Group', [
                     tgroup.my_id or '',
                     tgroup.parent_id or '',
                     tgroup.name_tag or '',
@@ -363,11 +587,10 @@ class ExportFavoritesFolderView(APIView):
                     self._format_decimal(tgroup.range_miles, 1),
                     tgroup.location_type or 'Circle',
                     tgroup.quick_key or 'Off',
-                ]))
+                ])
 
-                tgids = tgroup.tgids.using('favorites').all().order_by('order')
-                for tgid in tgids:
-                    lines.append(self._join_record('TGID', [
+                for tgid in data.tgids_for(tgroup):
+                    yield self._join_record('TGID', [
                         tgid.my_id or '',
                         tgid.parent_id or '',
                         tgid.name_tag or '',
@@ -384,19 +607,17 @@ class ExportFavoritesFolderView(APIView):
                         tgid.number_tag or 'Off',
                         tgid.priority_channel or 'Off',
                         tgid.tdma_slot or 'Any',
-                    ]))
+                    ])
 
-                rectangles = tgroup.rectangles.using('favorites').all().order_by('order')
-                for rect in rectangles:
-                    lines.append(self._join_record('Rectangle', [
+                for rect in data.rectangles_for(tgroup):
+                    yield self._join_record('Rectangle', [
                         rect.my_id or '',
                         self._format_decimal(rect.latitude1, 6),
                         self._format_decimal(rect.longitude1, 6),
                         self._format_decimal(rect.latitude2, 6),
                         self._format_decimal(rect.longitude2, 6),
-                    ]))
+                    ])
 
-        return '\r\n'.join(lines) + '\r\n'
 
     @staticmethod
     def _join_record(record_type: str, fields: list[str]) -> str:
@@ -437,8 +658,8 @@ class ExportFavoritesFolderView(APIView):
             return ''
 
     @staticmethod
-    def _format_bandplan_p25(bandplan: BandPlanP25) -> list[str]:
-        my_id = bandplan.site.my_id if bandplan.site else ''
+    def _format_bandplan_p25(bandplan: BandPlanP25, site: Site) -> list[str]:
+        my_id = site.my_id if site else ''
         fields = [my_id]
         for idx in range(16):
             entry = bandplan.band_plan.get(str(idx), {}) if bandplan.band_plan else {}
@@ -447,8 +668,8 @@ class ExportFavoritesFolderView(APIView):
         return fields
 
     @staticmethod
-    def _format_bandplan_mot(bandplan: BandPlanMot) -> list[str]:
-        my_id = bandplan.site.my_id if bandplan.site else ''
+    def _format_bandplan_mot(bandplan: BandPlanMot, site: Site) -> list[str]:
+        my_id = site.my_id if site else ''
         fields = [my_id]
         for idx in range(6):
             entry = bandplan.band_plan.get(str(idx), {}) if bandplan.band_plan else {}
@@ -595,9 +816,42 @@ class SDCardViewSet(viewsets.ViewSet):
         return Response({'exported': exported, 'errors': errors})
 
 
-class FavoritesListViewSet(viewsets.ModelViewSet):
+class ExportGenerationMixin:
+    """Bump the owning FavoritesList's export generation on every write.
+
+    favorites_list_path is the attribute chain from the viewset's model to the
+    id of the FavoritesList it belongs to; custom actions that write through
+    the ORM call touch_favorites_list themselves.
+    """
+    favorites_list_path = 'favorites_list_id'
+
+    def favorites_list_id(self, instance):
+        value = instance
+        for attr in self.favorites_list_path.split('.'):
+            value = getattr(value, attr)
+        return value
+
+    def touch_favorites_list(self, instance):
+        bump_export_generation(self.favorites_list_id(instance))
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.touch_favorites_list(serializer.instance)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.touch_favorites_list(serializer.instance)
+
+    def perform_destroy(self, instance):
+        favorites_list_id = self.favorites_list_id(instance)
+        super().perform_destroy(instance)
+        bump_export_generation(favorites_list_id)
+
+
+class FavoritesListViewSet(ExportGenerationMixin, viewsets.ModelViewSet):
     """ViewSet for Favorites Lists"""
     serializer_class = FavoritesListSerializer
+    favorites_list_path = 'pk'
     
     def get_queryset(self):
         return FavoritesList.objects.using('favorites').all()
@@ -607,14 +861,31 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
         """Get detailed information from favorite list including all systems and groups"""
         favorite = self.get_object()
         
+        # One query per level; group counts come from annotations instead of a query per group
+        conv_systems = list(favorite.conventional_systems.using('favorites').all().order_by('order'))
+        cgroups_by_system = defaultdict(list)
+        cgroups = CGroup.objects.using('favorites').filter(
+            conventional_system__favorites_list=favorite
+        ).annotate(freq_count=Count('cfreqs')).order_by('order', 'pk')
+        for cgroup in cgroups:
+            cgroups_by_system[cgroup.conventional_system_id].append(cgroup)
+
+        trunk_systems = list(favorite.trunk_systems.using('favorites').all().order_by('order'))
+        tgroups_by_system = defaultdict(list)
+        tgroups = TGroup.objects.using('favorites').filter(
+            trunk_system__favorites_list=favorite
+        ).annotate(tgid_count=Count('tgids')).order_by('order', 'pk')
+        for tgroup in tgroups:
+            tgroups_by_system[tgroup.trunk_system_id].append(tgroup)
+
         # Build groups list from conventional and trunk systems
         groups = []
         
         # Process conventional systems and their groups
-        for conv_sys in favorite.conventional_systems.using('favorites').all().order_by('order'):
+        for conv_sys in conv_systems:
             # Add an entry for the system itself (even if no groups exist)
-            cgroups = conv_sys.cgroups.using('favorites').all().order_by('order')
-            if cgroups.count() == 0:
+            cgroups = cgroups_by_system[conv_sys.id]
+            if not cgroups:
                 # System with no groups - add a placeholder
                 groups.append({
                     'id': f"sys_{conv_sys.id}",
@@ -632,13 +903,11 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
             else:
                 # System with groups - add its groups
                 for cgroup in cgroups:
-                    # Count frequencies in this group
-                    freq_count = cgroup.cfreqs.using('favorites').count()
                     groups.append({
                         'id': str(cgroup.id),
                         'name_tag': cgroup.name_tag,
-                        'frequency_count': freq_count,
-                        'freq_count': freq_count,
+                        'frequency_count': cgroup.freq_count,
+                        'freq_count': cgroup.freq_count,
                         'system_type': 'Conventional',
                         'system_name': conv_sys.name_tag,
                         'avoid': cgroup.avoid,
@@ -647,9 +916,9 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
                     })
         
         # Process trunk systems and their groups (tgroups)
-        for trunk_sys in favorite.trunk_systems.using('favorites').all().order_by('order'):
-            tgroups = trunk_sys.tgroups.using('favorites').all().order_by('order')
-            if tgroups.count() == 0:
+        for trunk_sys in trunk_systems:
+            tgroups = tgroups_by_system[trunk_sys.id]
+            if not tgroups:
                 # System with no groups - add a placeholder
                 groups.append({
                     'id': f"sys_{trunk_sys.id}",
@@ -667,13 +936,11 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
             else:
                 # System with groups - add its groups
                 for tgroup in tgroups:
-                    # Count TGIDs in this group
-                    tgid_count = tgroup.tgids.using('favorites').count()
                     groups.append({
                         'id': str(tgroup.id),
                         'name_tag': tgroup.name_tag,
-                        'frequency_count': tgid_count,
-                        'freq_count': tgid_count,
+                        'frequency_count': tgroup.tgid_count,
+                        'freq_count': tgroup.tgid_count,
                         'system_type': 'Trunked',
                         'system_name': trunk_sys.name_tag,
                         'avoid': tgroup.avoid,
@@ -691,8 +958,8 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
             'groups': groups,
             'total_groups': len(groups),
             'total_frequencies': sum(g['frequency_count'] for g in groups),
-            'conventional_systems': len(favorite.conventional_systems.using('favorites').all()),
-            'trunk_systems': len(favorite.trunk_systems.using('favorites').all())
+            'conventional_systems': len(conv_systems),
+            'trunk_systems': len(trunk_systems)
         })
     
     @action(detail=True, methods=['get'], url_path='get-systems')
@@ -700,10 +967,12 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
         """Get all systems (Conventional and Trunk) for this favorites list"""
         favorite = self.get_object()
         
+        conv_systems = list(favorite.conventional_systems.using('favorites').all().order_by('order'))
+        trunk_systems = list(favorite.trunk_systems.using('favorites').all().order_by('order'))
         systems = []
         
         # Get conventional systems
-        for conv_sys in favorite.conventional_systems.using('favorites').all().order_by('order'):
+        for conv_sys in conv_systems:
             systems.append({
                 'id': str(conv_sys.id),
                 'name': conv_sys.name_tag,
@@ -732,7 +1001,7 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
             })
         
         # Get trunk systems
-        for trunk_sys in favorite.trunk_systems.using('favorites').all().order_by('order'):
+        for trunk_sys in trunk_systems:
             systems.append({
                 'id': str(trunk_sys.id),
                 'name': trunk_sys.name_tag,
@@ -764,8 +1033,8 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
             'user_name': favorite.user_name,
             'systems': systems,
             'total_systems': len(systems),
-            'conventional_count': favorite.conventional_systems.using('favorites').count(),
-            'trunk_count': favorite.trunk_systems.using('favorites').count()
+            'conventional_count': len(conv_systems),
+            'trunk_count': len(trunk_systems)
         })
 
     @action(detail=True, methods=['post'], url_path='add-system')
@@ -797,6 +1066,7 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
                     digital_threshold_level=request.data.get('digital_threshold_level', 8),
                     order=max_order + 1
                 )
+                self.touch_favorites_list(favorite)
 
                 return Response({
                     'id': str(system.id),
@@ -830,6 +1100,7 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
                 tgid_format=request.data.get('nxdn_format', ''),
                 order=max_order + 1
             )
+            self.touch_favorites_list(favorite)
 
             return Response({
                 'id': str(system.id),
@@ -877,6 +1148,7 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
                     filter='',
                     order=max_order + 1
                 )
+                self.touch_favorites_list(favorite)
                 
                 return Response({
                     'id': str(cgroup.id),
@@ -911,6 +1183,7 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
                     quick_key='Off',
                     order=max_order + 1
                 )
+                self.touch_favorites_list(favorite)
                 
                 return Response({
                     'id': str(tgroup.id),
@@ -922,38 +1195,61 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @staticmethod
+    def _json_response(favorites_lists, filename: str, compact: bool = False):
+        """The JSON export of these lists, from the cache or streamed and cached on the way."""
+        cache = ExportCache()
+        path = cache.json_path(favorites_lists, compact=compact)
+        if cache.get(path) is not None:
+            response = FileResponse(open(path, 'rb'), content_type='application/json')
+        else:
+            response = StreamingHttpResponse(
+                FavoritesListViewSet._iter_json(favorites_lists, path, compact, cache),
+                content_type='application/json',
+            )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @staticmethod
+    def _iter_json(favorites_lists, path: Path, compact: bool, cache: ExportCache):
+        from .json_handler import FavoritesListJSONHandler
+
+        try:
+            # Kept in the cache only if the whole document was generated
+            with cache.writer(path) as cache_file:
+                for text in FavoritesListJSONHandler.iter_json(favorites_lists, compact=compact):
+                    chunk = text.encode('utf-8')
+                    cache_file.write(chunk)
+                    yield chunk
+        except Exception as exc:
+            # Headers are already sent; the client sees a truncated document
+            logger.exception("Failed to export favourite lists to JSON", exc_info=exc)
+            raise
+
     @action(detail=True, methods=['get'], url_path='export-json')
     def export_json(self, request, pk=None):
-        """Export a single Favourite List to JSON format"""
+        """Export a single Favourite List to JSON format (compact=true drops the indentation)"""
+        compact = _json_compact(request)
         try:
-            from .json_handler import FavoritesListJSONHandler
-            
             favorites_list = self.get_object()
-            json_content = FavoritesListJSONHandler.export_to_json([favorites_list])
-            
-            response = HttpResponse(json_content, content_type='application/json')
-            response['Content-Disposition'] = f'attachment; filename="{favorites_list.user_name or "favorites"}.json"'
-            return response
+            return self._json_response(
+                [favorites_list], f'{favorites_list.user_name or "favorites"}.json', compact=compact,
+            )
         except Exception as e:
             logger.exception("Failed to export favourite list to JSON", exc_info=e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @action(detail=False, methods=['post'], url_path='export-json-multiple')
     def export_json_multiple(self, request):
-        """Export multiple Favourite Lists to a single JSON file"""
+        """Export multiple Favourite Lists to a single JSON file (compact=true drops the indentation)"""
+        compact = _json_compact(request)
         try:
-            from .json_handler import FavoritesListJSONHandler
-            
             list_ids = request.data.get('ids', [])
             if not list_ids:
                 return Response({'error': 'No list IDs provided'}, status=status.HTTP_400_BAD_REQUEST)
             
             favorites_lists = FavoritesList.objects.using('favorites').filter(id__in=list_ids)
-            json_content = FavoritesListJSONHandler.export_to_json(list(favorites_lists))
-            
-            response = HttpResponse(json_content, content_type='application/json')
-            response['Content-Disposition'] = f'attachment; filename="favorites_lists_export.json"'
-            return response
+            return self._json_response(list(favorites_lists), 'favorites_lists_export.json', compact=compact)
         except Exception as e:
             logger.exception("Failed to export favourite lists to JSON", exc_info=e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -967,10 +1263,10 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
             if 'file' not in request.FILES:
                 return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
             
-            json_file = request.FILES['file']
-            json_content = json_file.read().decode('utf-8')
+            # Decoded as it is read; the upload is never held in memory as one string
+            json_stream = codecs.getreader('utf-8')(request.FILES['file'])
             
-            imported_count, errors = FavoritesListJSONHandler.import_from_json(json_content)
+            imported_count, errors = FavoritesListJSONHandler.import_from_json(json_stream)
             
             if errors:
                 return Response({
@@ -989,15 +1285,68 @@ class FavoritesListViewSet(viewsets.ModelViewSet):
             logger.exception("Failed to import favourite list from JSON", exc_info=e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=['get'], url_path='export-csv')
+    def export_csv(self, request, pk=None):
+        """Export the channels and TGIDs of a Favourite List to CSV, one row each, streamed"""
+        from .csv_handler import FavoritesListCSVHandler
+
+        try:
+            favorites_list = self.get_object()
+        except Exception as e:
+            logger.exception("Failed to export favourite list to CSV", exc_info=e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        def iter_csv():
+            try:
+                for text in FavoritesListCSVHandler.iter_csv(favorites_list):
+                    yield text.encode('utf-8')
+            except Exception as exc:
+                # Headers are already sent; the client sees a truncated file
+                logger.exception("Failed to export favourite list to CSV", exc_info=exc)
+                raise
+
+        response = StreamingHttpResponse(iter_csv(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{favorites_list.user_name or "favorites"}.csv"'
+        return response
+
+    @action(detail=True, methods=['post'], url_path='import-csv')
+    def import_csv(self, request, pk=None):
+        """Import channels and TGIDs from a CSV file into a Favourite List"""
+        try:
+            from .csv_handler import FavoritesListCSVHandler
+
+            if 'file' not in request.FILES:
+                return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+            favorites_list = self.get_object()
+            # Read row by row; utf-8-sig drops the byte order mark spreadsheets write
+            csv_stream = io.TextIOWrapper(request.FILES['file'].file, encoding='utf-8-sig', newline='')
+
+            imported_count, errors = FavoritesListCSVHandler.import_from_csv(csv_stream, favorites_list)
+
+            if errors:
+                return Response({
+                    'imported': imported_count,
+                    'errors': errors,
+                    'success': False
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response({
+                'imported': imported_count,
+                'errors': [],
+                'message': f'Successfully imported {imported_count} channel(s) and TGID(s)',
+                'success': True
+            })
+        except Exception as e:
+            logger.exception("Failed to import favourite list from CSV", exc_info=e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 
 class FavoritesImportViewSet(viewsets.ViewSet):
     """Import favorites from uploaded files using new hierarchical structure"""
 
     def create(self, request):
-        """Import favorites lists from f_list.cfg and f_*.hpd files"""
-        from .favorites_hpd_parser import FavoritesHPDParser
-        from .favorites_parser import FavoritesListParser
-        
+        """Import favorites lists from f_list.cfg and f_*.hpd files, skipping unchanged ones"""
         files = request.FILES.getlist('files')
         if not files:
             return Response({'error': 'No files uploaded.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -1018,46 +1367,13 @@ class FavoritesImportViewSet(viewsets.ViewSet):
                         out.write(chunk)
                 saved[Path(f.name).name.lower()] = target
 
-            # Step 1: Parse f_list.cfg using FavoritesListParser
-            if 'f_list.cfg' in saved:
-                favorites_list_parser = FavoritesListParser()
-                # Note: parse_favorites_list doesn't return anything but creates FavoritesList objects
-                favorites_list_parser.parse_favorites_list(str(saved['f_list.cfg']))
-                # Get the created FavoritesList objects
-                f_list_count = FavoritesList.objects.using('favorites').count()
-            else:
-                return Response({'error': 'Failed to parse f_list.cfg'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Step 2: Parse each f_*.hpd file using FavoritesHPDParser
-            imported = 0
-            errors = []
-            
-            for name, path in saved.items():
-                if not name.endswith('.hpd'):
-                    continue
-                
-                # Extract the filename (e.g., "f_000001.hpd")
-                hpd_filename = path.name
-                
-                # Find the corresponding FavoritesList entry
-                favorites_list = FavoritesList.objects.using('favorites').filter(filename=hpd_filename).first()
-                if not favorites_list:
-                    errors.append({'file': hpd_filename, 'error': 'No matching F-List entry found'})
-                    continue
-                
-                try:
-                    parser = FavoritesHPDParser()
-                    parser.parse_file(str(path), favorites_list)
-                    imported += 1
-                    logger.info(f"Successfully imported {hpd_filename}")
-                except Exception as exc:
-                    logger.exception(f"Error parsing {hpd_filename}", exc_info=exc)
-                    errors.append({'file': hpd_filename, 'error': str(exc)})
-
+            # Files imported before with the same size and SHA-256 are skipped
+            result = import_favorites_folder(saved, jobs=settings.FAVORITES_IMPORT_JOBS)
             return Response({
-                'imported': imported,
-                'errors': errors,
-                'total_favorites_lists': f_list_count
+                'imported': result['imported'],
+                'skipped': len(result['skipped']),
+                'errors': result['errors'],
+                'total_favorites_lists': result['total_favorites_lists']
             })
         except DatabaseError as exc:
             logger.exception("Favourites import failed", exc_info=exc)
@@ -1077,9 +1393,10 @@ class FavoritesImportViewSet(viewsets.ViewSet):
                 pass
 
 
-class CGroupViewSet(viewsets.ModelViewSet):
+class CGroupViewSet(ExportGenerationMixin, viewsets.ModelViewSet):
     """ViewSet for CGroups (Conventional Groups) with their frequencies"""
     serializer_class = CGroupWriteSerializer
+    favorites_list_path = 'conventional_system.favorites_list_id'
     
     def get_queryset(self):
         return CGroup.objects.using('favorites').all()
@@ -1126,7 +1443,7 @@ class CGroupViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
 
     def partial_update(self, request, *args, **kwargs):
@@ -1161,6 +1478,7 @@ class CGroupViewSet(viewsets.ModelViewSet):
                 priority_channel=request.data.get('priority_channel', 'Off'),
                 order=max_order + 1
             )
+            self.touch_favorites_list(cgroup)
             
             return Response({
                 'id': str(cfreq_obj.id),
@@ -1186,9 +1504,10 @@ class CGroupViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TGroupViewSet(viewsets.ModelViewSet):
+class TGroupViewSet(ExportGenerationMixin, viewsets.ModelViewSet):
     """ViewSet for TGroups (Trunk Groups) with their TGIDs"""
     serializer_class = TGroupWriteSerializer
+    favorites_list_path = 'trunk_system.favorites_list_id'
     
     def get_queryset(self):
         return TGroup.objects.using('favorites').all()
@@ -1233,7 +1552,7 @@ class TGroupViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
 
     def partial_update(self, request, *args, **kwargs):
@@ -1267,6 +1586,7 @@ class TGroupViewSet(viewsets.ModelViewSet):
                 tdma_slot=request.data.get('tdma_slot', 'Any'),
                 order=max_order + 1
             )
+            self.touch_favorites_list(tgroup)
             
             return Response({
                 'id': str(tgid_obj.id),
@@ -1291,9 +1611,10 @@ class TGroupViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CFreqViewSet(viewsets.ModelViewSet):
+class CFreqViewSet(ExportGenerationMixin, viewsets.ModelViewSet):
     """ViewSet for CFreq (Conventional Frequencies)"""
     serializer_class = CFreqSerializer
+    favorites_list_path = 'cgroup.conventional_system.favorites_list_id'
     
     def get_queryset(self):
         return CFreq.objects.using('favorites').all()
@@ -1304,7 +1625,7 @@ class CFreqViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
     
     def partial_update(self, request, *args, **kwargs):
@@ -1313,9 +1634,10 @@ class CFreqViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
 
-class TGIDViewSet(viewsets.ModelViewSet):
+class TGIDViewSet(ExportGenerationMixin, viewsets.ModelViewSet):
     """ViewSet for TGID (Talkgroup IDs)"""
     serializer_class = TGIDSerializer
+    favorites_list_path = 'tgroup.trunk_system.favorites_list_id'
     
     def get_queryset(self):
         return TGID.objects.using('favorites').all()
@@ -1326,7 +1648,7 @@ class TGIDViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
     
     def partial_update(self, request, *args, **kwargs):
@@ -1335,7 +1657,7 @@ class TGIDViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
 
-class ConventionalSystemViewSet(viewsets.ModelViewSet):
+class ConventionalSystemViewSet(ExportGenerationMixin, viewsets.ModelViewSet):
     """ViewSet for Conventional Systems"""
     serializer_class = ConventionalSystemWriteSerializer
 
@@ -1347,7 +1669,7 @@ class ConventionalSystemViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
 
     def partial_update(self, request, *args, **kwargs):
@@ -1375,6 +1697,7 @@ class ConventionalSystemViewSet(viewsets.ModelViewSet):
                 filter='',
                 order=max_order + 1
             )
+            self.touch_favorites_list(system)
 
             return Response({
                 'id': str(cgroup.id),
@@ -1385,7 +1708,7 @@ class ConventionalSystemViewSet(viewsets.ModelViewSet):
             return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TrunkSystemViewSet(viewsets.ModelViewSet):
+class TrunkSystemViewSet(ExportGenerationMixin, viewsets.ModelViewSet):
     """ViewSet for Trunk Systems"""
     serializer_class = TrunkSystemWriteSerializer
 
@@ -1397,7 +1720,7 @@ class TrunkSystemViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
 
     def partial_update(self, request, *args, **kwargs):
@@ -1425,6 +1748,7 @@ class TrunkSystemViewSet(viewsets.ModelViewSet):
                 filter='',
                 order=max_order + 1
             )
+            self.touch_favorites_list(system)
 
             return Response({
                 'id': str(tgroup.id),
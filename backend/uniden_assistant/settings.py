@@ -98,6 +98,20 @@ WSGI_APPLICATION = 'uniden_assistant.wsgi.application'
 # Database
 FAVOURITES_DB_PATH = BASE_DIR / 'favourites.sqlite3'
 
+# SQLite tuning for the favourites database (see favourites/sqlite_profile.py):
+# 'performance' = WAL, synchronous=NORMAL, mmap, larger cache and persistent connections;
+# 'default' = stock SQLite settings, reconnect per request (a file left in WAL mode is switched
+# back to the rollback journal once per process, when nothing else has it open)
+FAVOURITES_SQLITE_PROFILE = get_setting('FAVOURITES_SQLITE_PROFILE', default='performance')
+FAVOURITES_SQLITE_MMAP_SIZE = get_setting('FAVOURITES_SQLITE_MMAP_SIZE', default=268435456, cast=int)  # bytes
+FAVOURITES_SQLITE_CACHE_SIZE = get_setting('FAVOURITES_SQLITE_CACHE_SIZE', default=-65536, cast=int)  # negative = KiB
+FAVOURITES_SQLITE_BUSY_TIMEOUT = get_setting('FAVOURITES_SQLITE_BUSY_TIMEOUT', default=5000, cast=int)  # ms
+FAVOURITES_CONN_MAX_AGE = get_setting(
+    'FAVOURITES_CONN_MAX_AGE',
+    default=600 if FAVOURITES_SQLITE_PROFILE == 'performance' else 0,
+    cast=int,
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -106,6 +120,8 @@ DATABASES = {
     'favorites': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': FAVOURITES_DB_PATH,
+        'CONN_MAX_AGE': FAVOURITES_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': FAVOURITES_CONN_MAX_AGE > 0,
     },
 }
 
@@ -168,3 +184,28 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_NUMBER_FILES = 10000  # Allow up to 10,000 files per upload
 UNIDEN_DATA_DIR = get_setting('UNIDEN_DATA_DIR', default=str(BASE_DIR.parent / 'data'))
+
+# Worker processes used to parse f_*.hpd files during favourites imports
+# (1 = parse in-process, 0 = one worker per CPU)
+FAVORITES_IMPORT_JOBS = get_setting('FAVORITES_IMPORT_JOBS', default=1, cast=int)
+
+# Generated export files (f_*.hpd, JSON, zip) reused until their favourites list changes
+EXPORT_CACHE_DIR = get_setting('EXPORT_CACHE_DIR') or str(BASE_DIR / 'export_cache')
+
+# How the uniden_manager gateway reaches the favourites API:
+# 'inprocess' calls the resolved view directly, 'http' makes a loopback HTTP request
+UNIDEN_GATEWAY_MODE = get_setting('UNIDEN_GATEWAY_MODE', default='inprocess')
+
+# Upload import queue (uniden_manager.jobs): imports running at once, seconds
+# between progress writes, seconds without a heartbeat before a running job is
+# treated as interrupted (running jobs beat every quarter of this), and days
+# finished jobs are kept
+IMPORT_JOB_WORKERS = get_setting('IMPORT_JOB_WORKERS', default=1, cast=int)
+IMPORT_JOB_PROGRESS_INTERVAL = get_setting('IMPORT_JOB_PROGRESS_INTERVAL', default=0.5, cast=float)
+IMPORT_JOB_STALE_SECONDS = get_setting('IMPORT_JOB_STALE_SECONDS', default=300, cast=int)
+IMPORT_JOB_RETENTION_DAYS = get_setting('IMPORT_JOB_RETENTION_DAYS', default=7, cast=int)
+
+# Server-sent progress stream (import/events/): seconds between job reads and
+# between keepalive comments on an idle stream
+IMPORT_PROGRESS_STREAM_INTERVAL = get_setting('IMPORT_PROGRESS_STREAM_INTERVAL', default=0.25, cast=float)
+IMPORT_PROGRESS_STREAM_KEEPALIVE = get_setting('IMPORT_PROGRESS_STREAM_KEEPALIVE', default=15, cast=int)
@@ -0,0 +1,230 @@
+"""Persistent FIFO import job queue with a bounded worker pool.
+
+Jobs live in the ImportJob table, so any server process can report their
+progress and they survive restarts. Each process runs at most
+IMPORT_JOB_WORKERS jobs at a time, and a job is only claimed while fewer
+than that many are running across all processes, so imports do not
+compete for the favourites database. Queued jobs are claimed oldest first.
+
+Worker threads are only alive while there is work: enqueue() and
+ensure_started() wake the pool, and each worker exits once the queue is
+empty.
+"""
+import logging
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, close_old_connections, connections, transaction
+from django.utils import timezone
+
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once a cancel has been requested."""
+
+
+class JobProgress:
+    """Batched progress writer for a running job.
+
+    update() only touches the database every flush_interval seconds; each
+    flush also refreshes the heartbeat and checks for a cancel request.
+    """
+
+    def __init__(self, job: ImportJob, flush_interval: Optional[float] = None) -> None:
+        self.job = job
+        self.flush_interval = settings.IMPORT_JOB_PROGRESS_INTERVAL if flush_interval is None else flush_interval
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def __getitem__(self, field):
+        return getattr(self.job, field)
+
+    def update(self, **fields) -> None:
+        for field, value in fields.items():
+            setattr(self.job, field, value)
+        self._pending.update(fields)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        ImportJob.objects.filter(pk=self.job.pk).update(updated_at=timezone.now(), **self._pending)
+        self._pending = {}
+        if ImportJob.objects.filter(pk=self.job.pk, cancel_requested=True).exists():
+            raise JobCancelled()
+
+
+class Heartbeat:
+    """Keeps a running job's updated_at fresh from a background thread.
+
+    Long steps such as building the shadow database or waiting on parser
+    processes send no progress, so without this another process would treat
+    the job as interrupted after IMPORT_JOB_STALE_SECONDS.
+    """
+
+    def __init__(self, job: ImportJob, interval: Optional[float] = None) -> None:
+        self.job = job
+        self.interval = settings.IMPORT_JOB_STALE_SECONDS / 4 if interval is None else interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'import-heartbeat-{job.pk}', daemon=True)
+
+    def __enter__(self) -> 'Heartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    ImportJob.objects.filter(pk=self.job.pk, status=ImportJob.RUNNING).update(updated_at=timezone.now())
+                except DatabaseError as exc:
+                    # The worker may be holding a write lock; the next beat retries
+                    logger.warning(f"Import job {self.job.job_id} heartbeat failed: {exc}")
+        finally:
+            connections.close_all()
+
+
+def enqueue(import_type: str, mode: str, temp_path: str, job_id: str) -> ImportJob:
+    prune_finished_jobs()
+    job = ImportJob.objects.create(
+        job_id=job_id,
+        import_type=import_type,
+        mode=mode,
+        temp_path=temp_path,
+        stage='Queued',
+        message='Waiting for earlier imports to finish...',
+    )
+    return job
+
+
+def cancel(job: ImportJob) -> ImportJob:
+    """Cancel a queued job immediately; ask a running job to stop at its next progress flush."""
+    now = timezone.now()
+    if ImportJob.objects.filter(pk=job.pk, status=ImportJob.QUEUED).update(
+        status=ImportJob.CANCELLED, cancel_requested=True, message='Import cancelled', finished_at=now,
+    ):
+        shutil.rmtree(job.temp_path, ignore_errors=True)
+    else:
+        ImportJob.objects.filter(pk=job.pk, status=ImportJob.RUNNING).update(cancel_requested=True)
+    job.refresh_from_db()
+    return job
+
+
+def claim_next_job(limit: int) -> Optional[ImportJob]:
+    """Mark the oldest queued job as running, unless `limit` jobs are already running."""
+    try:
+        with transaction.atomic():
+            if ImportJob.objects.filter(status=ImportJob.RUNNING).count() >= limit:
+                return None
+            job = ImportJob.objects.filter(status=ImportJob.QUEUED).order_by('id').first()
+            if job is None:
+                return None
+            now = timezone.now()
+            claimed = ImportJob.objects.filter(pk=job.pk, status=ImportJob.QUEUED).update(
+                status=ImportJob.RUNNING, started_at=now, updated_at=now,
+            )
+    except OperationalError:
+        # Another process wrote to the queue first; it will pick the job up
+        return None
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def fail_stale_jobs() -> int:
+    """Fail running jobs whose worker stopped sending heartbeats (e.g. the server restarted)."""
+    cutoff = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+    return ImportJob.objects.filter(status=ImportJob.RUNNING, updated_at__lt=cutoff).update(
+        status=ImportJob.FAILED, message='Import was interrupted', finished_at=timezone.now(),
+    )
+
+
+def prune_finished_jobs() -> int:
+    cutoff = timezone.now() - timedelta(days=settings.IMPORT_JOB_RETENTION_DAYS)
+    deleted, _ = ImportJob.objects.filter(status__in=ImportJob.FINISHED, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def run_job(job: ImportJob, handler: Callable[[ImportJob, JobProgress], None]) -> ImportJob:
+    """Run one claimed job to completion and record its final state."""
+    progress = JobProgress(job)
+    try:
+        with Heartbeat(job):
+            handler(job, progress)
+        progress.flush()
+        final = {'status': ImportJob.COMPLETED, 'message': 'Import completed successfully'}
+    except JobCancelled:
+        final = {'status': ImportJob.CANCELLED, 'message': 'Import cancelled'}
+    except Exception as exc:
+        logger.exception(f"Import job {job.job_id} failed", exc_info=exc)
+        final = {'status': ImportJob.FAILED, 'message': str(exc)}
+    finally:
+        shutil.rmtree(job.temp_path, ignore_errors=True)
+
+    now = timezone.now()
+    fields = dict(progress._pending, finished_at=now, updated_at=now, **final)
+    # A job another process already failed as stale keeps that status
+    ImportJob.objects.filter(pk=job.pk, status=ImportJob.RUNNING).update(**fields)
+    job.refresh_from_db()
+    return job
+
+
+class ImportJobPool:
+    """Bounded pool that drains the ImportJob queue in FIFO order."""
+
+    def __init__(self, handler: Callable[[ImportJob, JobProgress], None], workers: Optional[int] = None) -> None:
+        self.handler = handler
+        self._workers = workers
+        self._executor = None
+        self._active = 0
+        self._lock = threading.Lock()
+        self._started = False
+
+    @property
+    def workers(self) -> int:
+        return max(1, self._workers or settings.IMPORT_JOB_WORKERS)
+
+    def ensure_started(self) -> None:
+        """Resume jobs persisted by an earlier server process."""
+        with self._lock:
+            first_start = not self._started
+            self._started = True
+        if first_start:
+            fail_stale_jobs()
+        self.wake()
+
+    def wake(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='import-job')
+            if self._active >= self.workers:
+                return
+            self._active += 1
+        self._executor.submit(self._drain)
+
+    def _drain(self) -> None:
+        try:
+            while True:
+                job = claim_next_job(self.workers)
+                if job is None:
+                    return
+                run_job(job, self.handler)
+        except Exception as exc:
+            logger.exception("Import job worker stopped", exc_info=exc)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self._active -= 1
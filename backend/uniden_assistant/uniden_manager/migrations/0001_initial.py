@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=36, unique=True)),
+                ('import_type', models.CharField(max_length=20)),
+                ('mode', models.CharField(max_length=10)),
+                ('temp_path', models.CharField(max_length=500)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], db_index=True, default='queued', max_length=20)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('stage', models.CharField(blank=True, default='', max_length=255)),
+                ('message', models.TextField(blank=True, default='')),
+                ('current_file', models.CharField(blank=True, default='', max_length=500)),
+                ('processed_files', models.IntegerField(default=0)),
+                ('total_files', models.IntegerField(default=0)),
+                ('current_records', models.IntegerField(default=0)),
+                ('total_records', models.BigIntegerField(default=0)),
+                ('hpdb_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('hpdb_job_id', models.CharField(blank=True, max_length=36, null=True)),
+                ('favorites_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+    ]
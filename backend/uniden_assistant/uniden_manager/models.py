@@ -0,0 +1,75 @@
+"""
+Import job queue for the Uniden Manager gateway.
+Stored in the default database, so progress writes never contend with the
+import itself for the favourites database.
+"""
+from django.db import models
+
+
+class ImportJob(models.Model):
+    """One queued or running upload import (see jobs.py)."""
+
+    QUEUED = 'queued'
+    RUNNING = 'processing'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Processing'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+    FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+    job_id = models.CharField(max_length=36, unique=True)
+    import_type = models.CharField(max_length=20)  # sd_card, hpdb or favorites
+    mode = models.CharField(max_length=10)  # replace or merge
+    temp_path = models.CharField(max_length=500)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    cancel_requested = models.BooleanField(default=False)
+
+    # Progress, in the shape the import dialog polls for
+    stage = models.CharField(max_length=255, blank=True, default='')
+    message = models.TextField(blank=True, default='')
+    current_file = models.CharField(max_length=500, blank=True, default='')
+    processed_files = models.IntegerField(default=0)
+    total_files = models.IntegerField(default=0)
+    current_records = models.IntegerField(default=0)
+    total_records = models.BigIntegerField(default=0)
+    hpdb_status = models.CharField(max_length=20, null=True, blank=True)
+    hpdb_job_id = models.CharField(max_length=36, null=True, blank=True)
+    favorites_status = models.CharField(max_length=20, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Heartbeat while running
+
+    PROGRESS_FIELDS = (
+        'stage', 'message', 'current_file', 'processed_files', 'total_files',
+        'current_records', 'total_records', 'hpdb_status', 'hpdb_job_id', 'favorites_status',
+    )
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        app_label = 'uniden_manager'
+
+    def __str__(self):
+        return f"{self.import_type} import {self.job_id} ({self.status})"
+
+    def to_progress(self) -> dict:
+        progress = {field: getattr(self, field) for field in self.PROGRESS_FIELDS}
+        progress.update({
+            'job_id': self.job_id,
+            'status': self.status,
+            'type': self.import_type,
+            'cancel_requested': self.cancel_requested,
+        })
+        if self.status == self.QUEUED:
+            progress['queue_position'] = ImportJob.objects.filter(
+                status=self.QUEUED, id__lt=self.id
+            ).count() + 1
+        return progress
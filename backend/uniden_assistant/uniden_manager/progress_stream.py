@@ -0,0 +1,103 @@
+"""Server-sent events stream of import job progress.
+
+The stream watches the ImportJob row and sends a full snapshot first, then
+only the fields that changed, plus records_per_sec while records are being
+stored. It ends with a 'done' event once the job has finished. Under ASGI
+the stream is an async generator, so an open connection does not hold a
+worker thread; under WSGI it falls back to a plain generator.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+from .models import ImportJob
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets EventSource requests (Accept: text/event-stream) through content negotiation."""
+
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event(data, event='error')
+
+
+def format_event(data, event=None) -> bytes:
+    lines = []
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class ProgressDeltas:
+    """Turns successive progress snapshots into SSE events."""
+
+    def __init__(self) -> None:
+        self._last = None
+        self._last_records = None
+        self._last_event_at = time.monotonic()
+
+    def events(self, progress: dict, now: float):
+        """Events for one snapshot; the terminal snapshot also yields 'done'."""
+        if self._last is None:
+            delta = dict(progress)
+        else:
+            delta = {key: value for key, value in progress.items() if self._last.get(key) != value}
+
+        records = progress.get('current_records') or 0
+        if self._last_records is not None and 'current_records' in delta:
+            elapsed = now - self._last_records[1]
+            if elapsed > 0:
+                delta['records_per_sec'] = round((records - self._last_records[0]) / elapsed, 1)
+        if self._last_records is None or 'current_records' in delta:
+            self._last_records = (records, now)
+
+        self._last = progress
+        if delta:
+            self._last_event_at = now
+            yield format_event(delta)
+        elif now - self._last_event_at >= settings.IMPORT_PROGRESS_STREAM_KEEPALIVE:
+            # Comment line so proxies keep the idle connection open
+            self._last_event_at = now
+            yield b': keepalive\n\n'
+
+        if progress['status'] in ImportJob.FINISHED:
+            yield format_event(progress, event='done')
+
+
+def _snapshot(job_id):
+    job = ImportJob.objects.filter(job_id=job_id).first()
+    return job.to_progress() if job else None
+
+
+def iter_progress_events(job_id):
+    deltas = ProgressDeltas()
+    while True:
+        progress = _snapshot(job_id)
+        if progress is None:
+            return
+        yield from deltas.events(progress, time.monotonic())
+        if progress['status'] in ImportJob.FINISHED:
+            return
+        time.sleep(settings.IMPORT_PROGRESS_STREAM_INTERVAL)
+
+
+async def aiter_progress_events(job_id):
+    deltas = ProgressDeltas()
+    snapshot = sync_to_async(_snapshot)
+    while True:
+        progress = await snapshot(job_id)
+        if progress is None:
+            return
+        for event in deltas.events(progress, time.monotonic()):
+            yield event
+        if progress['status'] in ImportJob.FINISHED:
+            return
+        await asyncio.sleep(settings.IMPORT_PROGRESS_STREAM_INTERVAL)
@@ -0,0 +1,318 @@
+import io
+import json
+import os
+import tempfile
+import time
+import urllib.request
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
+from django.test import AsyncClient, LiveServerTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from uniden_assistant.favourites.models import CFreq, FavoritesList, ScannerRawFile
+from uniden_assistant.favourites.tests import build_hpd
+
+from . import jobs
+from .models import ImportJob
+from .progress_stream import ProgressDeltas
+from .views import _run_import_job
+
+
+class InProcessGatewayTests(TestCase):
+    databases = {'default', 'favorites'}
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(EXPORT_CACHE_DIR=cache_dir.name, UNIDEN_GATEWAY_MODE='inprocess')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.favorites_list = FavoritesList.objects.using('favorites').create(
+            user_name='Gateway', filename='f_000001.hpd',
+        )
+
+    def test_requests_are_dispatched_without_loopback_http(self):
+        with mock.patch('urllib.request.urlopen') as urlopen:
+            response = self.client.get(f'/api/uniden_manager/favourites/favorites-lists/{self.favorites_list.pk}/')
+            response_404 = self.client.get('/api/uniden_manager/favourites/no-such-endpoint/')
+
+        urlopen.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user_name'], 'Gateway')
+        self.assertEqual(response_404.status_code, 404)
+
+    def test_request_body_and_query_reach_the_upstream_view(self):
+        response = self.client.post(
+            f'/api/uniden_manager/favourites/favorites-lists/{self.favorites_list.pk}/add-department/',
+            data=json.dumps({'system_type': 'Conventional', 'name_tag': 'Fire'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        group_id = response.json()['id']
+
+        response = self.client.post(
+            f'/api/uniden_manager/favourites/cgroups/{group_id}/add-frequency/',
+            data=json.dumps({'name_tag': 'Dispatch', 'frequency': 154430000}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CFreq.objects.using('favorites').get(pk=response.json()['id']).name_tag, 'Dispatch')
+
+        response = self.client.get('/api/uniden_manager/favourites/favorites-lists/', {'search': 'Gate'})
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_file_downloads_pass_through_unchanged(self):
+        response = self.client.get('/api/uniden_manager/favourites/export-favorites/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertEqual(b''.join(response.streaming_content)[:2], b'PK')
+
+
+@override_settings(UNIDEN_GATEWAY_MODE='http')
+class HttpGatewayStreamingTests(LiveServerTestCase):
+    databases = {'default', 'favorites'}
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(EXPORT_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def gateway(self, path, data=None, headers=None):
+        request = urllib.request.Request(
+            f'{self.live_server_url}/api/uniden_manager/favourites/{path}', data=data, headers=headers or {},
+        )
+        return urllib.request.urlopen(request)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=64 * 1024)
+    def test_upload_and_download_are_streamed(self):
+        # The upload is larger than DATA_UPLOAD_MAX_MEMORY_SIZE: reading
+        # request.body in the gateway would reject it
+        hpd = build_hpd(groups=200).encode('utf-8')
+        self.assertGreater(len(hpd), 64 * 1024)
+        f_list = b'TargetModel\tBCDx36HP\r\nFormatVersion\t1.00\r\nF-List\tStreamed\tf_000001.hpd\tOff\tOff\tOff\tOff\r\n'
+        boundary = 'gatewayboundary'
+        body = b''
+        for name, content in [('f_list.cfg', f_list), ('f_000001.hpd', hpd)]:
+            body += (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="files"; filename="{name}"\r\n'
+                'Content-Type: application/octet-stream\r\n\r\n'
+            ).encode('ascii') + content + b'\r\n'
+        body += f'--{boundary}--\r\n'.encode('ascii')
+
+        with self.gateway('import-files/', data=body, headers={
+            'Content-Type': f'multipart/form-data; boundary={boundary}',
+        }) as resp:
+            result = json.loads(resp.read())
+        self.assertEqual(result['imported'], 1, result)
+        self.assertEqual(CFreq.objects.using('favorites').count(), 600)
+
+        with self.gateway('export-favorites/') as resp:
+            self.assertEqual(resp.headers['Content-Type'], 'application/zip')
+            self.assertIn('favorites_lists_export.zip', resp.headers['Content-Disposition'])
+            archive = zipfile.ZipFile(io.BytesIO(resp.read()))
+        exported = archive.read('favorites_lists/f_000001.hpd').decode('utf-8')
+        self.assertEqual(exported.count('\r\nC-Freq\t'), 600)
+
+
+class ImportJobQueueTests(TestCase):
+
+    def enqueue(self, import_type='favorites'):
+        temp_dir = tempfile.mkdtemp(prefix='uniden_import_test_')
+        self.addCleanup(lambda: os.path.isdir(temp_dir) and os.rmdir(temp_dir))
+        return jobs.enqueue(import_type=import_type, mode='merge', temp_path=temp_dir, job_id=f'job-{ImportJob.objects.count()}')
+
+    def test_jobs_are_claimed_in_fifo_order_within_the_worker_limit(self):
+        first, second, third = self.enqueue(), self.enqueue('hpdb'), self.enqueue()
+        self.assertEqual(second.to_progress()['queue_position'], 2)
+
+        self.assertEqual(jobs.claim_next_job(limit=1).pk, first.pk)
+        self.assertIsNone(jobs.claim_next_job(limit=1))
+        self.assertEqual(jobs.claim_next_job(limit=2).pk, second.pk)
+
+        jobs.run_job(ImportJob.objects.get(pk=first.pk), lambda job, progress: progress.update(total_files=3))
+        first.refresh_from_db()
+        self.assertEqual(first.status, ImportJob.COMPLETED)
+        self.assertEqual(first.total_files, 3)
+        self.assertFalse(os.path.exists(first.temp_path))
+        self.assertEqual(jobs.claim_next_job(limit=2).pk, third.pk)
+
+    def test_progress_is_written_in_batches_and_stops_on_cancel(self):
+        job = self.enqueue()
+        progress = jobs.JobProgress(job, flush_interval=3600)
+
+        progress.update(message='Parsing f_000001.hpd...', processed_files=1)
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).processed_files, 0)
+        progress.flush()
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).processed_files, 1)
+
+        ImportJob.objects.filter(pk=job.pk).update(cancel_requested=True)
+        with self.assertRaises(jobs.JobCancelled):
+            progress.flush()
+
+    def test_cancel_endpoint(self):
+        queued = self.enqueue()
+        with mock.patch('uniden_assistant.uniden_manager.views.import_job_pool') as pool:
+            response = self.client.post('/api/uniden_manager/import/cancel/', {'job_id': queued.job_id})
+            progress = self.client.get('/api/uniden_manager/import/progress/', {'job_id': queued.job_id})
+            repeat = self.client.post('/api/uniden_manager/import/cancel/', {'job_id': queued.job_id})
+        pool.ensure_started.assert_called_once()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], ImportJob.CANCELLED)
+        self.assertEqual(progress.json()['status'], ImportJob.CANCELLED)
+        self.assertFalse(os.path.exists(queued.temp_path))
+        self.assertEqual(repeat.status_code, 400)
+
+        running = self.enqueue()
+        jobs.claim_next_job(limit=1)
+        self.client.post('/api/uniden_manager/import/cancel/', {'job_id': running.job_id})
+        running = jobs.run_job(
+            ImportJob.objects.get(pk=running.pk), lambda job, progress: progress.flush(),
+        )
+        self.assertEqual(running.status, ImportJob.CANCELLED)
+
+
+class ImportJobHeartbeatTests(TransactionTestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.mkdtemp(prefix='uniden_import_test_')
+        self.addCleanup(lambda: os.path.isdir(temp_dir) and os.rmdir(temp_dir))
+        jobs.enqueue(import_type='favorites', mode='merge', temp_path=temp_dir, job_id='heartbeat-job')
+        self.job = jobs.claim_next_job(limit=1)
+
+    def backdate(self):
+        ImportJob.objects.filter(pk=self.job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+
+    @override_settings(IMPORT_JOB_STALE_SECONDS=0.4)
+    def test_job_without_progress_is_not_failed_as_stale(self):
+        stale_failures = []
+
+        def silent_handler(job, progress):
+            # A long step that reports no progress, like building the shadow database
+            self.backdate()
+            deadline = time.monotonic() + 5
+            while ImportJob.objects.get(pk=job.pk).updated_at < timezone.now() - timedelta(minutes=1):
+                self.assertLess(time.monotonic(), deadline, 'no heartbeat was sent')
+                time.sleep(0.02)
+            stale_failures.append(jobs.fail_stale_jobs())
+
+        job = jobs.run_job(self.job, silent_handler)
+
+        self.assertEqual(stale_failures, [0])
+        self.assertEqual(job.status, ImportJob.COMPLETED)
+
+    def test_job_failed_as_stale_keeps_that_status(self):
+        def interrupted_handler(job, progress):
+            self.backdate()
+            self.assertEqual(jobs.fail_stale_jobs(), 1)
+
+        job = jobs.run_job(self.job, interrupted_handler)
+
+        self.assertEqual((job.status, job.message), (ImportJob.FAILED, 'Import was interrupted'))
+
+
+class HPDBImportJobTests(TransactionTestCase):
+    databases = {'default', 'favorites'}
+
+    def test_hpdb_upload_is_archived_as_one_compressed_row_per_file(self):
+        temp_dir = tempfile.mkdtemp(prefix='uniden_import_test_')
+        files = {'hpdb.cfg': b'TargetModel\tBCDx36HP\r\nFormatVersion\t1.00\r\n', 's_000001.hpd': build_hpd(50).encode()}
+        for name, data in files.items():
+            with open(os.path.join(temp_dir, name), 'wb') as fh:
+                fh.write(data)
+        job = jobs.enqueue(import_type='hpdb', mode='replace', temp_path=temp_dir, job_id='hpdb-job')
+
+        job = jobs.run_job(jobs.claim_next_job(limit=1), _run_import_job)
+
+        self.assertEqual(job.status, ImportJob.COMPLETED, job.message)
+        self.assertEqual(job.hpdb_status, 'stored')
+        raw_files = ScannerRawFile.objects.using('favorites').all()
+        self.assertEqual({raw.file_path: raw.read_bytes() for raw in raw_files}, {
+            f'HPDB/{name}': data for name, data in files.items()
+        })
+        self.assertEqual(raw_files.get(file_name='hpdb.cfg').read_lines(2), ['FormatVersion\t1.00\r\n'])
+
+    def test_merge_reimport_skips_unchanged_files(self):
+        files = {'hpdb.cfg': b'TargetModel\tBCDx36HP\r\n', 's_000001.hpd': build_hpd(5).encode()}
+
+        def run(job_id):
+            temp_dir = tempfile.mkdtemp(prefix='uniden_import_test_')
+            for name, data in files.items():
+                with open(os.path.join(temp_dir, name), 'wb') as fh:
+                    fh.write(data)
+            jobs.enqueue(import_type='hpdb', mode='merge', temp_path=temp_dir, job_id=job_id)
+            return jobs.run_job(jobs.claim_next_job(limit=1), _run_import_job)
+
+        run('first')
+        cfg = ScannerRawFile.objects.using('favorites').get(file_name='hpdb.cfg')
+        files['s_000001.hpd'] = build_hpd(6).encode()
+        job = run('second')
+
+        self.assertEqual(job.status, ImportJob.COMPLETED, job.message)
+        raw_files = ScannerRawFile.objects.using('favorites')
+        self.assertEqual(raw_files.count(), 2)
+        self.assertEqual(raw_files.get(file_name='hpdb.cfg').pk, cfg.pk)
+        self.assertEqual(raw_files.get(file_name='s_000001.hpd').read_bytes(), files['s_000001.hpd'])
+
+
+class ImportProgressStreamTests(TestCase):
+
+    def setUp(self):
+        self.job = jobs.enqueue(import_type='favorites', mode='merge', temp_path='/nonexistent', job_id='stream-job')
+        pool = mock.patch('uniden_assistant.uniden_manager.views.import_job_pool')
+        pool.start()
+        self.addCleanup(pool.stop)
+
+    @staticmethod
+    def parse_events(body):
+        events = []
+        for block in body.decode('utf-8').strip().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.split('\n') if not line.startswith(':'))
+            if 'data' in fields:
+                events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+        return events
+
+    def test_only_changed_fields_are_sent_after_the_first_snapshot(self):
+        deltas = ProgressDeltas()
+        first = b''.join(deltas.events({'status': 'processing', 'stage': 'Storing', 'current_records': 0}, now=0.0))
+        second = b''.join(deltas.events({'status': 'processing', 'stage': 'Storing', 'current_records': 500}, now=2.0))
+        idle = b''.join(deltas.events({'status': 'processing', 'stage': 'Storing', 'current_records': 500}, now=3.0))
+
+        self.assertEqual(self.parse_events(first)[0][1]['stage'], 'Storing')
+        self.assertEqual(self.parse_events(second), [('message', {'current_records': 500, 'records_per_sec': 250.0})])
+        self.assertEqual(idle, b'')
+
+    def test_stream_ends_with_done_event(self):
+        ImportJob.objects.filter(pk=self.job.pk).update(status=ImportJob.COMPLETED, processed_files=2)
+
+        response = self.client.get(
+            '/api/uniden_manager/import/events/', {'job_id': self.job.job_id}, HTTP_ACCEPT='text/event-stream',
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = self.parse_events(b''.join(response.streaming_content))
+        self.assertEqual([name for name, _ in events], ['message', 'done'])
+        self.assertEqual(events[-1][1]['processed_files'], 2)
+        missing = self.client.get('/api/uniden_manager/import/events/', {'job_id': 'nope'}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_asgi_stream_is_asynchronous(self):
+        await ImportJob.objects.filter(pk=self.job.pk).aupdate(status=ImportJob.FAILED, message='Missing f_list.cfg')
+
+        response = await AsyncClient().get(
+            '/api/uniden_manager/import/events/', {'job_id': self.job.job_id}, HTTP_ACCEPT='text/event-stream',
+        )
+
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(self.parse_events(body)[-1], ('done', await sync_to_async(self.job_progress)()))
+
+    def job_progress(self):
+        return ImportJob.objects.get(pk=self.job.pk).to_progress()
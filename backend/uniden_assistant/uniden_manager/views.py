@@ -3,25 +3,66 @@ import urllib.request
 import tempfile
 import uuid
 import logging
-import threading
 from pathlib import Path
 from urllib.error import HTTPError, URLError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.urls import Resolver404, resolve
+
+from . import jobs
+from .jobs import ImportJobPool, JobCancelled
+from .models import ImportJob
+from .progress_stream import EventStreamRenderer, aiter_progress_events, iter_progress_events
 
 logger = logging.getLogger(__name__)
 
-# In-memory storage for import progress (in production, use a cache like Redis)
-import_progress_store = {}
 
 
 class ProxyAPIView(APIView):
-    """Proxy API that forwards requests to internal tiered APIs without direct DB access."""
+    """Proxy API that forwards requests to internal tiered APIs without direct DB access.
+
+    With UNIDEN_GATEWAY_MODE = 'inprocess' the upstream URL is resolved and its
+    view called directly on the same request; 'http' sends a loopback HTTP
+    request instead, for deployments that serve the tiers separately. Either
+    way the gateway only reaches the tier through its public URL routes.
+    """
 
     upstream_prefix = ''
+    # Block size for relaying bodies in 'http' mode
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    def _proxy(self, request, path_suffix=''):
+        if settings.UNIDEN_GATEWAY_MODE == 'http':
+            return self._proxy_http(request, path_suffix)
+        return self._dispatch_in_process(request, path_suffix)
+
+    def _dispatch_in_process(self, request, path_suffix=''):
+        path = f"/api/{self.upstream_prefix}{path_suffix}"
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return Response({'error': f'Not found: {path}'}, status=404)
+
+        # The body has not been read here, so the upstream view parses it once
+        # (multipart uploads stream to disk as usual). The upstream view sees
+        # its own path for the duration of the call.
+        http_request = request._request
+        saved = (http_request.path, http_request.path_info, http_request.resolver_match)
+        http_request.path = http_request.path_info = path
+        http_request.resolver_match = match
+        try:
+            return match.func(http_request, *match.args, **match.kwargs)
+        except Exception as exc:
+            logger.exception("Gateway dispatch to %s failed", path, exc_info=exc)
+            return Response({'error': str(exc)}, status=500)
+        finally:
+            http_request.path, http_request.path_info, http_request.resolver_match = saved
 
     def _build_upstream_url(self, request, path_suffix=''):
         base = request.build_absolute_uri('/')[:-1]
@@ -32,39 +73,14 @@ class ProxyAPIView(APIView):
             url = f"{url}?{query}"
         return url
 
-    def _proxy(self, request, path_suffix=''):
+    def _proxy_http(self, request, path_suffix=''):
         url = self._build_upstream_url(request, path_suffix)
-        data = request.body if request.method in ['POST', 'PUT', 'PATCH'] else None
-        
-        # Ensure data is bytes for urllib
-        if data and not isinstance(data, bytes):
-            data = data.encode('utf-8')
-        
-        # For empty POST/PUT/PATCH, send empty JSON object instead of None
-        if request.method in ['POST', 'PUT', 'PATCH'] and not data:
-            data = b'{}'
-        
-        headers = {
-            'Content-Type': request.META.get('CONTENT_TYPE', 'application/json'),
-        }
+        data, headers = self._upstream_body(request)
+        headers['Content-Type'] = request.META.get('CONTENT_TYPE', 'application/json')
         
         req = urllib.request.Request(url, data=data, headers=headers, method=request.method)
         try:
-            with urllib.request.urlopen(req) as resp:
-                content = resp.read()
-                content_type = resp.headers.get('Content-Type', 'application/json')
-                if 'application/json' in content_type:
-                    try:
-                        payload = json.loads(content.decode('utf-8'))
-                        return Response(payload, status=resp.status)
-                    except json.JSONDecodeError:
-                        return Response(content.decode('utf-8', errors='replace'), status=resp.status)
-
-                response = HttpResponse(content, status=resp.status, content_type=content_type)
-                disposition = resp.headers.get('Content-Disposition')
-                if disposition:
-                    response['Content-Disposition'] = disposition
-                return response
+            resp = urllib.request.urlopen(req)
         except HTTPError as exc:
             content = exc.read()
             content_type = exc.headers.get('Content-Type', 'application/json')
@@ -79,6 +95,53 @@ class ProxyAPIView(APIView):
         except URLError as exc:
             return Response({'error': str(exc)}, status=502)
 
+        content_type = resp.headers.get('Content-Type', 'application/json')
+        if 'application/json' in content_type:
+            with resp:
+                content = resp.read()
+            try:
+                payload = json.loads(content.decode('utf-8'))
+                return Response(payload, status=resp.status)
+            except json.JSONDecodeError:
+                return Response(content.decode('utf-8', errors='replace'), status=resp.status)
+
+        # Downloads (zip exports, .hpd files) are relayed chunk by chunk
+        response = StreamingHttpResponse(self._iter_upstream(resp), status=resp.status, content_type=content_type)
+        for header in ('Content-Disposition', 'Content-Length'):
+            value = resp.headers.get(header)
+            if value:
+                response[header] = value
+        return response
+
+    def _upstream_body(self, request):
+        """Request body for the upstream call and the headers it needs.
+
+        Bodies are passed to urllib as the request stream itself, so uploads
+        are sent upstream in blocks as they are read from the client.
+        """
+        if request.method not in ['POST', 'PUT', 'PATCH']:
+            return None, {}
+
+        http_request = request._request
+        length = int(http_request.META.get('CONTENT_LENGTH') or 0)
+        # For empty POST/PUT/PATCH, send empty JSON object instead of None
+        if not length:
+            return b'{}', {}
+        # Something upstream of the gateway already buffered the body
+        if hasattr(http_request, '_body'):
+            return http_request.body, {}
+        return http_request, {'Content-Length': str(length)}
+
+    def _iter_upstream(self, resp):
+        try:
+            while True:
+                chunk = resp.read(self.STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            resp.close()
+
 
 class UserSettingsProxyView(ProxyAPIView):
     upstream_prefix = 'favourites/'
@@ -218,80 +281,93 @@ class UnifiedImportViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create a job ID for tracking progress
-        job_id = str(uuid.uuid4())
-        
-        # Initialize progress tracking
-        import_progress_store[job_id] = {
-            'status': 'starting',
-            'type': import_type,
-            'stage': 'Initializing...',
-            'current_file': '',
-            'processed_files': 0,
-            'total_files': 0,
-            'current_records': 0,
-            'total_records': 0,
-            'hpdb_status': None,
-            'favorites_status': None,
-            'message': 'Starting import processing...'
-        }
-        
-        # Start background processing thread
-        thread = threading.Thread(
-            target=self._process_import_background,
-            args=(job_id, temp_dir, import_mode, import_type, request),
-            daemon=True
+        job = jobs.enqueue(
+            import_type=import_type,
+            mode=import_mode,
+            temp_path=str(temp_dir),
+            job_id=str(uuid.uuid4()),
         )
-        thread.start()
+        import_job_pool.wake()
         
         # Return immediately with job ID for polling
         return Response({
-            'job_id': job_id,
+            'job_id': job.job_id,
             'status': 'started',
             'type': import_type,
             'message': f'Starting {import_type} import processing...'
         })
 
-    def _process_import_background(self, job_id, temp_dir, import_mode, import_type, request):
-        """Background thread to process import and update progress"""
-        try:
-            if import_type == 'sd_card':
-                self._process_sd_card_with_progress(job_id, temp_dir, import_mode, request)
-            elif import_type == 'hpdb':
-                self._process_hpdb_with_progress(job_id, temp_dir, import_mode, request)
-            elif import_type == 'favorites':
-                self._process_favorites_with_progress(job_id, temp_dir, import_mode, request)
-            
-            import_progress_store[job_id]['status'] = 'completed'
-            import_progress_store[job_id]['message'] = 'Import completed successfully'
-        except Exception as e:
-            logger.exception(f"Import job {job_id} failed", exc_info=e)
-            import_progress_store[job_id]['status'] = 'failed'
-            import_progress_store[job_id]['message'] = str(e)
-        finally:
-            # Cleanup temp directory
-            try:
-                import shutil
-                shutil.rmtree(temp_dir)
-            except Exception:
-                pass
+    def _run_job(self, job, progress):
+        """Run one queued import; called by the import job pool"""
+        temp_dir = Path(job.temp_path)
+        if job.import_type == 'sd_card':
+            self._process_sd_card_with_progress(progress, temp_dir, job.mode)
+        elif job.import_type == 'hpdb':
+            self._process_hpdb_with_progress(progress, temp_dir, job.mode)
+        elif job.import_type == 'favorites':
+            self._process_favorites_with_progress(progress, temp_dir, job.mode)
+
+    def _get_job(self, job_id):
+        if not job_id:
+            return None
+        return ImportJob.objects.filter(job_id=job_id).first()
 
     @action(detail=False, methods=['get'], url_path='progress')
     def get_progress(self, request):
         """Get the current progress of an import job"""
-        job_id = request.query_params.get('job_id')
-        if not job_id or job_id not in import_progress_store:
+        job = self._get_job(request.query_params.get('job_id'))
+        if job is None:
             return Response(
                 {'error': 'Job not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        return Response(import_progress_store[job_id])
+        # Picks up jobs left queued by an earlier server process
+        import_job_pool.ensure_started()
+        return Response(job.to_progress())
+
+    @action(detail=False, methods=['get'], url_path='events', renderer_classes=[EventStreamRenderer])
+    def events(self, request):
+        """Stream progress of an import job as server-sent events"""
+        job = self._get_job(request.query_params.get('job_id'))
+        if job is None:
+            return Response(
+                {'error': 'Job not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        import_job_pool.ensure_started()
+        if isinstance(request._request, ASGIRequest):
+            stream = aiter_progress_events(job.job_id)
+        else:
+            stream = iter_progress_events(job.job_id)
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='cancel')
+    def cancel(self, request):
+        """Cancel a queued import, or stop a running one at its next progress update"""
+        job = self._get_job(request.data.get('job_id'))
+        if job is None:
+            return Response(
+                {'error': 'Job not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if job.status in ImportJob.FINISHED:
+            return Response(
+                {'error': f'Job already {job.status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        job = jobs.cancel(job)
+        return Response(job.to_progress())
 
-    def _process_hpdb_with_progress(self, job_id, temp_dir, mode, request):
+    def _process_hpdb_with_progress(self, progress, temp_dir, mode):
         """Process HPDB files with progress tracking"""
-        import_progress_store[job_id]['stage'] = 'Processing HPDB files...'
-        import_progress_store[job_id]['status'] = 'processing'
+        progress.update(stage='Processing HPDB files...')
         
         files = []
         for file_path in temp_dir.rglob('*'):
@@ -304,22 +380,25 @@ class UnifiedImportViewSet(viewsets.ViewSet):
         if not any(name.startswith('s_') and name.endswith('.hpd') for name in filenames):
             raise Exception('Missing s_*.hpd system files')
         
-        import_progress_store[job_id]['total_files'] = len(files)
+        progress.update(total_files=len(files))
         
-        # Use the existing HPDB process method to store raw files and start job
-        result = self._process_hpdb(temp_id=job_id, temp_dir=temp_dir, mode=mode, request=request)
+        # Store the raw files compressed, one row per file
+        result = self._process_hpdb(progress=progress, temp_dir=temp_dir, mode=mode)
         
         if 'error' in result:
             raise Exception(result['error'])
         
-        import_progress_store[job_id]['hpdb_status'] = 'started'
-        import_progress_store[job_id]['hpdb_job_id'] = result.get('job_id')
-        import_progress_store[job_id]['message'] = f"HPDB import completed - job ID: {result.get('job_id')}"
+        progress.update(
+            hpdb_status=result['status'],
+            message=(
+                f"HPDB import completed - {len(result['raw_file_ids']) - result['skipped']} files stored, "
+                f"{result['skipped']} unchanged"
+            ),
+        )
 
-    def _process_favorites_with_progress(self, job_id, temp_dir, mode, request):
+    def _process_favorites_with_progress(self, progress, temp_dir, mode):
         """Process favorites files with progress tracking"""
-        import_progress_store[job_id]['stage'] = 'Processing Favourites files...'
-        import_progress_store[job_id]['status'] = 'processing'
+        progress.update(stage='Processing Favourites files...')
         
         files = []
         for file_path in temp_dir.rglob('*'):
@@ -332,56 +411,34 @@ class UnifiedImportViewSet(viewsets.ViewSet):
         if not any(name.endswith('.hpd') for name in filenames):
             raise Exception('Missing .hpd files')
         
-        # Parse f_list.cfg first to create FavoritesList records
-        flist_path = next((f for f in files if f.name.lower() == 'f_list.cfg'), None)
-        if flist_path:
-            import_progress_store[job_id]['message'] = 'Parsing f_list.cfg...'
-            from uniden_assistant.favourites.hpdb_parser import FavoritesListParser
-            try:
-                FavoritesListParser.parse_favorites_list(str(flist_path))
-                import_progress_store[job_id]['message'] = '✓ f_list.cfg parsed'
-            except Exception as exc:
-                logger.exception(f"Failed to parse f_list.cfg", exc_info=exc)
-                import_progress_store[job_id]['message'] = f"✗ f_list.cfg failed: {str(exc)}"
-        
         hpd_files = [f for f in files if f.name.lower().endswith('.hpd')]
-        import_progress_store[job_id]['total_files'] = len(hpd_files)
+        progress.update(total_files=len(hpd_files))
         
-        from uniden_assistant.favourites.models import ScannerProfile
-        from uniden_assistant.favourites.parsers import UnidenFileParser
+        from uniden_assistant.favourites.incremental_import import import_favorites_folder
         
-        parser = UnidenFileParser()
-        imported = 0
-        errors = []
+        def on_progress(processed, total, message):
+            progress.update(processed_files=processed, current_file=message, message=message)
         
-        for idx, file_path in enumerate(hpd_files, 1):
-            import_progress_store[job_id]['processed_files'] = idx - 1
-            import_progress_store[job_id]['current_file'] = f"Processing {file_path.name}..."
-            
-            profile_name = file_path.stem.replace('_', ' ')
-            profile, _ = ScannerProfile.objects.get_or_create(
-                name=profile_name,
-                defaults={'model': 'Uniden', 'firmware_version': ''}
-            )
-            
-            try:
-                with open(file_path, 'rb') as fh:
-                    import_progress_store[job_id]['message'] = f"Parsing {file_path.name}..."
-                    parser.parse(fh, profile)
-                imported += 1
-                import_progress_store[job_id]['message'] = f"✓ {file_path.name} imported"
-            except Exception as exc:
-                errors.append({'file': file_path.name, 'error': str(exc)})
-                import_progress_store[job_id]['message'] = f"✗ {file_path.name} failed: {str(exc)}"
+        # Files imported before with the same size and SHA-256 are skipped
+        result = import_favorites_folder(
+            {f.name.lower(): f for f in files},
+            replace=mode == 'replace',
+            jobs=settings.FAVORITES_IMPORT_JOBS,
+            on_progress=on_progress,
+        )
         
-        import_progress_store[job_id]['processed_files'] = len(hpd_files)
-        import_progress_store[job_id]['favorites_status'] = 'completed'
-        import_progress_store[job_id]['message'] = f"Favourites import completed: {imported}/{len(hpd_files)} imported"
+        progress.update(
+            processed_files=len(hpd_files),
+            favorites_status='completed',
+            message=(
+                f"Favourites import completed: {result['imported']} imported, "
+                f"{len(result['skipped'])} unchanged, {len(result['errors'])} failed"
+            ),
+        )
 
-    def _process_sd_card_with_progress(self, job_id, temp_dir, mode, request):
+    def _process_sd_card_with_progress(self, progress, temp_dir, mode):
         """Process SD card with progress tracking for both HPDB and Favourites"""
-        import_progress_store[job_id]['stage'] = 'Processing SD Card contents...'
-        import_progress_store[job_id]['message'] = 'Scanning for HPDB and Favourites...'
+        progress.update(stage='Processing SD Card contents...', message='Scanning for HPDB and Favourites...')
         
         # Try to process HPDB if present
         hpdb_dir = temp_dir / 'HPDB'
@@ -394,8 +451,8 @@ class UnifiedImportViewSet(viewsets.ViewSet):
                     hpdb_dir = hpdb_cfg_files[0].parent
         
         if hpdb_dir and hpdb_dir.exists() and (hpdb_dir / 'hpdb.cfg').exists():
-            import_progress_store[job_id]['message'] = 'Found HPDB, starting import...'
-            self._process_hpdb_with_progress(job_id, hpdb_dir, mode, request)
+            progress.update(message='Found HPDB, starting import...')
+            self._process_hpdb_with_progress(progress, hpdb_dir, mode)
         
         # Try to process Favourites if present
         fav_dir = temp_dir / 'ubcdx36' / 'favorites_lists'
@@ -410,23 +467,15 @@ class UnifiedImportViewSet(viewsets.ViewSet):
                     fav_dir = flist_cfg_files[0].parent
         
         if fav_dir and fav_dir.exists() and (fav_dir / 'f_list.cfg').exists():
-            import_progress_store[job_id]['message'] = 'Found Favourites, starting import...'
-            self._process_favorites_with_progress(job_id, fav_dir, mode, request)
+            progress.update(message='Found Favourites, starting import...')
+            self._process_favorites_with_progress(progress, fav_dir, mode)
 
-    def _process_hpdb(self, temp_id, temp_dir, mode, request):
-        """Process HPDB files directly without modifying request"""
-        import uuid
-        import threading
-        from pathlib import Path
-        from uniden_assistant.hpdb.models import HPDBRawFile, HPDBRawLine, HPDBImportJob
-        from django.conf import settings
-        import logging
-        
-        logger = logging.getLogger(__name__)
+    def _process_hpdb(self, progress, temp_dir, mode):
+        """Archive HPDB files as compressed raw files (one row per file)"""
+        from uniden_assistant.favourites import bulk_clear, shadow_db
         
         # Update progress
-        if temp_id in import_progress_store:
-            import_progress_store[temp_id]['message'] = 'Scanning HPDB files...'
+        progress.update(message='Scanning HPDB files...')
         
         # Collect files
         files = []
@@ -441,99 +490,88 @@ class UnifiedImportViewSet(viewsets.ViewSet):
         if not any(name.startswith('s_') and name.endswith('.hpd') for name in filenames):
             return {'type': 'hpdb', 'error': 'Missing s_*.hpd system files'}
         
-        if temp_id in import_progress_store:
-            import_progress_store[temp_id]['message'] = f'Found {len(files)} HPDB files - preparing database...'
+        progress.update(
+            message=f'Found {len(files)} HPDB files - preparing database...',
+            total_records=sum(f.stat().st_size for f in files),
+        )
         
-        # Create import job and store raw files directly
-        job_id = str(uuid.uuid4())
         try:
-            if temp_id in import_progress_store:
-                import_progress_store[temp_id]['message'] = 'Creating HPDB import job...'
+            if mode == 'replace':
+                # Stored into a shadow database that replaces the live one when done
+                with shadow_db.replacing(bulk_clear.kept_rows(bulk_clear.HPDB_PLAN)):
+                    stored = self._store_hpdb_files(progress, files)
+            else:
+                stored = self._store_hpdb_files(progress, files)
             
-            job = HPDBImportJob.objects.using('hpdb').create(
-                job_id=job_id,
-                status='uploading',
-                total_files=len(files),
-                total_bytes=sum(f.stat().st_size for f in files)
+            return {
+                'type': 'hpdb',
+                'mode': mode,
+                'raw_file_ids': stored['raw_file_ids'],
+                'skipped': stored['skipped'],
+                'status': 'stored'
+            }
+        except JobCancelled:
+            raise
+        except Exception as e:
+            logger.exception("HPDB import failed", exc_info=e)
+            progress.update(message=f'✗ HPDB import failed: {str(e)}')
+            return {'type': 'hpdb', 'error': str(e)}
+
+    def _store_hpdb_files(self, progress, files):
+        """Store each HPDB file as one compressed raw file, skipping unchanged ones"""
+        from uniden_assistant.favourites import raw_storage
+        from uniden_assistant.favourites.incremental_import import ImportedFiles
+        from uniden_assistant.favourites.models import ScannerRawFile
+        
+        raw_files = ScannerRawFile.objects.using('favorites')
+        imported_files = ImportedFiles('HPDB/')
+        
+        file_ids = []
+        skipped = 0
+        stored_bytes = 0
+        total_lines = 0
+        
+        for file_idx, file_path in enumerate(files, 1):
+            progress.update(
+                current_file=file_path.name,
+                processed_files=file_idx - 1,
+                message=f'Storing {file_path.name} ({file_idx}/{len(files)})',
             )
             
-            if temp_id in import_progress_store:
-                import_progress_store[temp_id]['message'] = 'Storing HPDB files in database...'
-                import_progress_store[temp_id]['total_records'] = job.total_bytes
-            
-            file_ids = []
-            total_lines = 0
+            # Files stored before with the same size and SHA-256 are kept as they are
+            if imported_files.unchanged(file_path.name, file_path):
+                file_ids.append(imported_files.get(file_path.name).raw_file_id)
+                skipped += 1
+                stored_bytes += file_path.stat().st_size
+                progress.update(current_records=stored_bytes, message=f'= {file_path.name} unchanged')
+                continue
             
-            for file_idx, file_path in enumerate(files, 1):
-                if temp_id in import_progress_store:
-                    import_progress_store[temp_id]['current_file'] = file_path.name
-                    import_progress_store[temp_id]['processed_files'] = file_idx - 1
-                    import_progress_store[temp_id]['message'] = f'Reading {file_path.name} ({file_idx}/{len(files)})'
-                
-                file_size = file_path.stat().st_size
-                raw_file = HPDBRawFile.objects.using('hpdb').create(
+            # One insert per file: compressed content plus its line index
+            packed = raw_storage.pack(file_path.read_bytes())
+            with transaction.atomic(using='favorites'):
+                raw_files.filter(file_path=f'HPDB/{file_path.name}').delete()
+                raw_file = raw_files.create(
                     file_name=file_path.name,
+                    file_path=f'HPDB/{file_path.name}',
                     file_type=file_path.suffix.lower(),
-                    file_size=file_size
+                    **packed
                 )
-                file_ids.append(raw_file.id)
-                
-                # Store file content line by line
-                line_number = 0
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    for line in f:
-                        line_number += 1
-                        HPDBRawLine.objects.using('hpdb').create(
-                            raw_file=raw_file,
-                            line_number=line_number,
-                            content=line
-                        )
-                        
-                        total_lines += 1
-                        # Update progress every 100 lines to avoid excessive updates
-                        if total_lines % 100 == 0 and temp_id in import_progress_store:
-                            import_progress_store[temp_id]['current_records'] = total_lines
-                            import_progress_store[temp_id]['message'] = f'Storing {file_path.name}: {total_lines} lines processed'
-                
-                job.uploaded_files += 1
-                job.uploaded_bytes += file_size
-                job.save(update_fields=['uploaded_files', 'uploaded_bytes'])
-                
-                if temp_id in import_progress_store:
-                    import_progress_store[temp_id]['message'] = f'✓ {file_path.name} stored ({line_number} lines)'
-            
-            if temp_id in import_progress_store:
-                import_progress_store[temp_id]['processed_files'] = len(files)
-                import_progress_store[temp_id]['current_records'] = total_lines
-                import_progress_store[temp_id]['message'] = f'Stored {len(files)} files ({total_lines} total lines) - starting parse job...'
-            
-            # Update job status and start background processing
-            job.status = 'uploaded'
-            job.save()
-            
-            if temp_id in import_progress_store:
-                import_progress_store[temp_id]['message'] = f'Background parsing started - job ID: {job_id}'
+                imported_files.mark(file_path.name, file_path, raw_file=raw_file)
+            file_ids.append(raw_file.id)
+            stored_bytes += packed['file_size']
+            total_lines += packed['line_count']
             
-            # Start background processing thread
-            from uniden_assistant.hpdb.views import _run_hpdb_import
-            thread = threading.Thread(
-                target=_run_hpdb_import,
-                args=(job_id, file_ids),
-                daemon=True
+            progress.update(
+                current_records=stored_bytes,
+                message=f"✓ {file_path.name} stored ({packed['line_count']} lines)",
             )
-            thread.start()
-            
-            return {
-                'type': 'hpdb',
-                'mode': mode,
-                'job_id': job_id,
-                'status': 'started'
-            }
-        except Exception as e:
-            logger.exception("HPDB import failed", exc_info=e)
-            if temp_id in import_progress_store:
-                import_progress_store[temp_id]['message'] = f'✗ HPDB import failed: {str(e)}'
-            return {'type': 'hpdb', 'error': str(e)}
+        
+        progress.update(
+            processed_files=len(files),
+            message=f'Stored {len(files) - skipped} files ({total_lines} total lines), {skipped} unchanged',
+        )
+        
+        return {'raw_file_ids': file_ids, 'skipped': skipped}
 
     def _process_favorites(self, temp_dir, mode, request):
         """Process favorites files directly without modifying request"""
@@ -710,7 +748,10 @@ class UnifiedImportViewSet(viewsets.ViewSet):
         try:
             # Find and remove all uniden_import_* directories in system temp
             temp_base = Path(tempfile.gettempdir())
-            import_dirs = list(temp_base.glob('uniden_import_*'))
+            pending = set(
+                ImportJob.objects.exclude(status__in=ImportJob.FINISHED).values_list('temp_path', flat=True)
+            )
+            import_dirs = [path for path in temp_base.glob('uniden_import_*') if str(path) not in pending]
             
             removed_count = 0
             for dir_path in import_dirs:
@@ -731,3 +772,10 @@ class UnifiedImportViewSet(viewsets.ViewSet):
                 {'error': f'Cleanup failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+def _run_import_job(job, progress):
+    UnifiedImportViewSet()._run_job(job, progress)
+
+
+import_job_pool = ImportJobPool(_run_import_job)